@@ -0,0 +1,225 @@
+"""
+Benchmarks Capitol Codex contact extraction: the vectorized tidy_contacts against the previous
+per-issue loop, on the same cleaned sheet. Also checks that both produce the same rows.
+
+The sheet is synthetic by default (districts x issue columns with the cell formats the cleaning
+handles: committee prefixes, specifiers, periods and every separator). Pass --csv with a sheet
+exported from Google Sheets (File > Download > CSV) to benchmark real data offline.
+
+Usage: python -m benchmarks.codex_benchmark [--runs 5] [--districts 80] [--issues 60] [--csv asm.csv --chamber asm]
+"""
+
+from sources.capitol_codex_scraper import (
+    scrape_clean_sheet,
+    tidy_contacts,
+    KEYWORDS_TO_SKIP,
+    SEPARATORS,
+)
+import argparse
+import random
+import statistics
+import time
+import numpy as np
+import pandas as pd
+
+
+def log_debug(message):
+    pass
+
+
+def per_issue_extract(sheet_df, chamber):
+    """
+    The previous extract_contacts loop (one pass per issue column), kept verbatim as the baseline.
+    Output: dictionary of issue area -> DataFrame
+    """
+    results = dict()
+
+    domain_email = f"@{chamber.lower()}.ca.gov"
+    # Loop ends before the final 'district_number' column
+    for issue in sheet_df.columns[:-1]:
+        log_debug(f"Processing {issue}...")
+
+        # Skip null/empty/whitespace-only values at the start - no need to store
+        valid_rows = sheet_df[issue].notna() & (sheet_df[issue].str.strip() != "")
+        contacts = sheet_df.loc[valid_rows, [issue, "district_number"]].copy()
+        log_debug("Filter empty rows")
+
+        # add default staffer type
+        contacts["staffer_type"] = "office"
+        # update staffer type for committee specifiers
+        contacts.loc[contacts[issue].str.contains("CHAIR|CMTE"), ["staffer_type"]] = (
+            "committee"
+        )
+        log_debug("Extract staffer type")
+
+        # add issue area
+        contacts["issue_area"] = issue
+        log_debug("Extract issue area")
+
+        # clean and normalize names: format, specifiers, nicknames, etc.
+        contacts[issue] = (
+            contacts[issue]
+            .str.replace(
+                ".", " ", regex=False
+            )  # Handle internal periods "Foo.X.Bar" -> "Foo X Bar"
+            .str.replace("CMTE/", "")
+            .str.replace(r"VICE CHAIR (\\||-) ", "", regex=True)
+            .str.replace("CHAIR (\\||-) ", "", regex=True)
+            .str.replace(r"\(\w+\) ", "", regex=True)
+            .str.replace(r"\s+", " ", regex=True)  # Collapse multiple spaces
+            .str.strip()
+        )
+        log_debug("Normalize staffer names")
+
+        # split and explode aggregated staffers when they appear
+        contacts[issue + "_values"] = contacts[issue].str.split("|".join(SEPARATORS))
+        contacts = contacts.explode(issue + "_values").drop(columns=[issue])
+        log_debug("Split aggregated staffer names")
+
+        # strip extra whitespace
+        contacts[f"{issue}_values"] = contacts[f"{issue}_values"].str.strip()
+
+        # rename column
+        contacts = contacts.rename(columns={f"{issue}_values": issue})
+
+        # Parse name into a list of parts
+        split_names = contacts[issue].str.strip().str.split(" ")
+
+        # Assign parts to columns (only first and last name, ignore middle name)
+        contacts["first_name"] = split_names.str.get(0)
+        contacts["last_name"] = split_names.str.get(-1)  # Always last element
+        log_debug("Split staffer names into parts")
+
+        # Generate email (first.last@chamber.ca.gov) except for skip conditions
+        contacts["generated_email"] = np.where(
+            contacts[issue].str.strip().isin(KEYWORDS_TO_SKIP),
+            "NA",
+            contacts["first_name"].str.lower()
+            + "."
+            + contacts["last_name"].str.lower()
+            + domain_email,
+        )
+        log_debug("Generate emails with NA value when skipping")
+
+        # Rename issue column to staffer name
+        contacts = contacts.rename(columns={issue: "staffer_contact"})
+
+        # Append
+        final = contacts[
+            [
+                "district_number",
+                "staffer_contact",
+                "generated_email",
+                "issue_area",
+                "staffer_type",
+            ]
+        ]
+        results[issue] = final
+        log_debug(f"{issue} extraction complete")
+    return results
+
+
+# Cell formats seen in the sheet, filled with generated names
+CELL_TEMPLATES = [
+    "{a}",
+    "{a}",
+    "{a} / {b}",
+    "{a} & {b}",
+    "{a}, {b}",
+    "{a} and {b}",
+    "{a}; {b}",
+    "{a}\n{b}",
+    "{a} + {b}",
+    "CMTE/{a}",
+    "CHAIR | {a}",
+    "CHAIR - {a}",
+    "VICE CHAIR - {a}",
+    "(Nickname) {a}",
+    "{a}.{b}",
+    "CHAIR",
+    "",
+    None,
+]
+FIRST_NAMES = ["Ana", "Ben", "Carla", "Dev", "Elena", "Farid", "Grace", "Hugo", "Ivy", "Jon"]
+LAST_NAMES = ["Alvarez", "Brooks", "Chen", "Diaz", "Evans", "Fong", "Garcia", "Huang", "Ito"]
+
+
+def synthetic_sheet(districts, issues, seed=0):
+    """
+    Output: DataFrame shaped like scrape_clean_sheet output (issue columns + district_number)
+    """
+    rng = random.Random(seed)
+
+    def name():
+        middle = rng.choice(["", " Q."])
+        return f"{rng.choice(FIRST_NAMES)}{middle} {rng.choice(LAST_NAMES)}"
+
+    data = {}
+    for i in range(issues):
+        cells = []
+        for _ in range(districts):
+            template = rng.choice(CELL_TEMPLATES)
+            cells.append(
+                None if template is None else template.format(a=name(), b=name())
+            )
+        data[f"Issue {i:02d}"] = cells
+    data["district_number"] = list(range(1, districts + 1))
+    return pd.DataFrame(data)
+
+
+def load_sheet(path, chamber):
+    # Same parsing and cleaning as the pipeline, from a local CSV
+    with open(path, "rb") as f:
+        return scrape_clean_sheet(chamber, f.read())
+
+
+def time_runs(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark vectorized vs per-issue Capitol Codex extraction."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--districts", type=int, default=80)
+    parser.add_argument("--issues", type=int, default=60)
+    parser.add_argument("--csv", help="Sheet exported as CSV (skips the synthetic sheet)")
+    parser.add_argument("--chamber", default="asm", choices=["asm", "sen"])
+    args = parser.parse_args()
+
+    if args.csv:
+        sheet_df = load_sheet(args.csv, args.chamber)
+    else:
+        sheet_df = synthetic_sheet(args.districts, args.issues)
+
+    baseline, baseline_samples = time_runs(
+        lambda: per_issue_extract(sheet_df, args.chamber), args.runs
+    )
+    tidy, tidy_samples = time_runs(lambda: tidy_contacts(sheet_df, args.chamber), args.runs)
+
+    expected = pd.concat(baseline.values(), ignore_index=True)
+    pd.testing.assert_frame_equal(
+        tidy.reset_index(drop=True), expected, check_dtype=False
+    )
+
+    baseline_median = statistics.median(baseline_samples)
+    tidy_median = statistics.median(tidy_samples)
+    print(
+        f"sheet={sheet_df.shape[0]} districts x {sheet_df.shape[1] - 1} issues, "
+        f"contacts={len(tidy)}, runs={args.runs} (outputs match)"
+    )
+    print(f"per-issue loop: median={baseline_median * 1000:.1f}ms")
+    print(
+        f"tidy_contacts:  median={tidy_median * 1000:.1f}ms "
+        f"({baseline_median / tidy_median:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Local stand-in for the Assembly Daily File and Senate calendar sites, served from the saved
+HTML corpus in benchmarks/fixtures.
+
+Paths mirror the live sites so the scrapers only need a different source_url:
+- /schedules-publications/daily-file and /api/dailyfile/agenda?id=<hearing> (Assembly)
+- /calendar?startDate=YYYY-MM-DD&endDate=YYYY-MM-DD and /calendar/agenda/<hearing> (Senate)
+
+Senate day fragments are named by their offset from today (day-03.html is three days out), so the
+calendar always falls inside the scraper's 30-day window and honors the startDate/endDate shards.
+
+Usage: python -m benchmarks.fixture_server [--port 8765]
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+import argparse
+import datetime
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+ASM_PATH = "/schedules-publications/daily-file"
+SEN_PATH = "/calendar"
+
+
+def format_calendar_date(date):
+    # Matches the Senate heading format, ex: "Tuesday, October 20, 2026"
+    return f"{date:%A, %B} {date.day}, {date.year}"
+
+
+def render_senate_calendar(query):
+    today = datetime.date.today()
+    start_date = datetime.date.fromisoformat(query.get("startDate", [today.isoformat()])[0])
+    end_date = datetime.date.fromisoformat(
+        query.get("endDate", [(today + datetime.timedelta(days=30)).isoformat()])[0]
+    )
+
+    days = []
+    for fragment in sorted((FIXTURES / "sen" / "days").glob("day-*.html")):
+        date = today + datetime.timedelta(days=int(fragment.stem.split("-")[1]))
+        if start_date <= date <= end_date:
+            days.append(
+                fragment.read_text().replace("{{date}}", format_calendar_date(date))
+            )
+
+    shell = (FIXTURES / "sen" / "calendar.html").read_text()
+    return shell.replace("{{days}}", "\n".join(days))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == ASM_PATH:
+            body = (FIXTURES / "asm" / "daily-file.html").read_text()
+        elif url.path == "/api/dailyfile/agenda" and "id" in query:
+            body = self.read_fragment("asm", query["id"][0])
+        elif url.path == SEN_PATH:
+            body = render_senate_calendar(query)
+        elif url.path.startswith(SEN_PATH + "/agenda/"):
+            body = self.read_fragment("sen", url.path.rsplit("/", 1)[-1])
+        else:
+            body = None
+
+        if body is None:
+            self.send_error(404)
+            return
+
+        content = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def read_fragment(self, chamber, hearing_id):
+        path = FIXTURES / chamber / "agenda" / f"{Path(hearing_id).name}.html"
+        return path.read_text() if path.exists() else None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_server(port=0):
+    """
+    Input: port number (0 picks a free port)
+    Output: tuple of (server, base URL); the server runs on a daemon thread until shutdown()
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    logger.info(f"Serving scraper fixtures at {base_url}")
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve offline scraper fixtures.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), FixtureHandler)
+    logger.info(f"Serving scraper fixtures at http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmarks both scrape_committee_hearing functions against the local fixture server.
+
+Reports, per chamber and run:
+- hearings scraped and hearings/sec over wall time
+- per-hearing latency percentiles (Assembly agenda load, Senate item scrape including its agenda modal)
+- browser time (per-hearing time spent in Playwright) vs parse time (parse_agenda)
+
+Usage: python -m benchmarks.scraper_benchmark [--runs 3] [--max-pages 4] [--shards 3]
+"""
+
+from benchmarks.fixture_server import start_server, ASM_PATH, SEN_PATH
+import sources.schedule_asm_fetch as assembly
+import sources.schedule_sen_fetch as senate
+import utils.scraping as utils
+from contextlib import contextmanager
+import argparse
+import asyncio
+import statistics
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def timed_calls(module, name, samples):
+    """
+    Temporarily wraps module.name so each call appends its duration (seconds) to samples.
+    """
+    original = getattr(module, name)
+
+    if asyncio.iscoroutinefunction(original):
+
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+    else:
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+    setattr(module, name, wrapper)
+    try:
+        yield samples
+    finally:
+        setattr(module, name, original)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def run_chamber(chamber, scrape, hearing_fn_module, hearing_fn_name):
+    hearing_samples, parse_samples = [], []
+    with timed_calls(hearing_fn_module, hearing_fn_name, hearing_samples), timed_calls(
+        utils, "parse_agenda", parse_samples
+    ):
+        start = time.perf_counter()
+        result = scrape()
+        wall = time.perf_counter() - start
+
+    if result is None:
+        raise Exception(f"[{chamber}] scrape failed against fixture server")
+
+    hearings, bills = result
+    parse_time = sum(parse_samples)
+    return {
+        "chamber": chamber,
+        "hearings": len(hearings),
+        "bills": len(bills),
+        "wall_seconds": wall,
+        "hearings_per_second": len(hearing_samples) / wall if wall else 0.0,
+        "p50": percentile(hearing_samples, 50),
+        "p90": percentile(hearing_samples, 90),
+        "p99": percentile(hearing_samples, 99),
+        "browser_seconds": sum(hearing_samples) - parse_time,
+        "parse_seconds": parse_time,
+    }
+
+
+def report(stats):
+    print(
+        (
+            f"[{stats['chamber']}] hearings={stats['hearings']} bills={stats['bills']} "
+            f"wall={stats['wall_seconds']:.2f}s "
+            f"rate={stats['hearings_per_second']:.2f} hearings/s | "
+            f"latency p50={stats['p50']:.3f}s p90={stats['p90']:.3f}s p99={stats['p99']:.3f}s | "
+            f"browser={stats['browser_seconds']:.2f}s parse={stats['parse_seconds']:.3f}s"
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark hearing scrapers against offline fixtures."
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-pages", type=int, default=utils.MAX_CONCURRENT_PAGES)
+    parser.add_argument("--shards", type=int, default=senate.SHARD_COUNT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server, base_url = start_server()
+    try:
+        for run in range(args.runs):
+            print(f"Run {run + 1}/{args.runs}")
+            report(
+                run_chamber(
+                    "ASM",
+                    lambda: assembly.scrape_committee_hearing(
+                        source_url=base_url + ASM_PATH, max_pages=args.max_pages
+                    ),
+                    assembly,
+                    "scrape_hearing_row",
+                )
+            )
+            report(
+                run_chamber(
+                    "SEN",
+                    lambda: senate.scrape_committee_hearing(
+                        source_url=base_url + SEN_PATH,
+                        shards=args.shards,
+                        max_pages=args.max_pages,
+                    ),
+                    senate,
+                    "scrape_hearing",
+                )
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
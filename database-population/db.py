@@ -1,21 +1,29 @@
 """
 Database connection management for the data pipeline.
-Provides a context manager for psycopg2 cursor lifecycle and
-a retry wrapper for unreliable external API calls.
+Provides a context manager for psycopg2 cursor lifecycle, a thread-safe
+connection pool for work that runs on several connections at once,
+LISTEN/NOTIFY helpers for pipeline events, and a retry wrapper for
+unreliable external API calls.
 
-NOTE: connection logic is duplicated in session/session_update.py
-Consolidate into common DB module references when integrating full stack
-services.
+Shared by the daily pipeline, the monitor and the session update.
 """
 
 from contextlib import contextmanager
+import json
 import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
 from config import config
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Channel the pipeline notifies after writes and view refreshes (see monitor.py --listen)
+PIPELINE_CHANNEL = "pipeline_events"
+# NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_BYTES = 7900
+
 
 @contextmanager
 def get_cursor():
@@ -41,3 +49,67 @@ def get_cursor():
         if conn:
             conn.close()
             logger.debug("Database connection closed")
+
+
+@contextmanager
+def get_pool(size):
+    """
+    Input: maximum number of open connections
+    Output: ThreadedConnectionPool, closed on exit
+    """
+    pool = ThreadedConnectionPool(1, size, **config("postgres"))
+    try:
+        yield pool
+    finally:
+        pool.closeall()
+        logger.debug("Connection pool closed")
+
+
+@contextmanager
+def get_pooled_cursor(pool):
+    """
+    Same transaction handling as get_cursor, on a connection borrowed from pool.
+    """
+    conn = pool.getconn()
+    try:
+        cur = conn.cursor()
+        yield cur
+        conn.commit()
+        logger.debug("Transaction committed")
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Transaction rolled back: {getattr(e, 'pgerror', None) or e}")
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def notify(cur, event, **payload):
+    """
+    Input: cursor, event name, JSON-serializable payload fields
+    Output: None (delivered to listeners when the cursor's transaction commits)
+
+    Payloads too large for NOTIFY are sent with bill_ids=None, which listeners treat as "check
+    everything".
+    """
+    message = json.dumps({"event": event, **payload}, default=str)
+    if len(message.encode("utf-8")) > MAX_NOTIFY_BYTES:
+        message = json.dumps({"event": event, **payload, "bill_ids": None}, default=str)
+    cur.execute("SELECT pg_notify(%s, %s)", (PIPELINE_CHANNEL, message))
+
+
+@contextmanager
+def get_listen_connection(channel=PIPELINE_CHANNEL):
+    """
+    Output: autocommit connection listening on channel, closed on exit
+    """
+    conn = psycopg2.connect(**config("postgres"))
+    try:
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {channel}")
+        logger.info(f"Listening on {channel}")
+        yield conn
+    finally:
+        conn.close()
+        logger.debug("Listen connection closed")
@@ -0,0 +1,213 @@
+"""
+One-time snapshot schema migrations.
+
+Columns, indexes and lookup tables the pipeline code relies on are added here once, instead of
+with IF NOT EXISTS DDL inside every write transaction (ALTER TABLE takes an ACCESS EXCLUSIVE lock
+even when the column already exists, and holds it until the write commits).
+
+Each migration runs in its own transaction with a lock_timeout and is recorded in
+snapshot.schema_migrations, so once applied a run only reads that table. The daily pipeline,
+the monitor and the session update apply pending migrations at startup, before any write
+transaction opens.
+
+Usage: python migrate.py
+"""
+
+import db
+from config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index into credentials.ini for globals
+SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
+MIGRATIONS_TABLE = "schema_migrations"
+# A migration fails instead of queueing behind long-running readers (and blocking the ones after)
+LOCK_TIMEOUT = "10s"
+# Serializes processes that start together (ex: monitor listener and daily pipeline)
+ADVISORY_LOCK_KEY = 7_402_001
+
+# Natural-key hash of a hearing; same value as utils.scraping.hearing_hash. Dates are formatted
+# explicitly so the value does not depend on the session's DateStyle. NULL and '' hash the same on
+# purpose: the Python side writes None as "" too, and changing either side would orphan every
+# stored hash.
+HEARING_HASH_SQL = """
+    md5(
+        COALESCE(chamber_id::TEXT, '') || E'\\x1f' ||
+        COALESCE(to_char(date, 'YYYY-MM-DD'), '') || E'\\x1f' ||
+        COALESCE(name, '') || E'\\x1f' ||
+        COALESCE(time_verbatim, '') || E'\\x1f' ||
+        COALESCE(location, '') || E'\\x1f' ||
+        COALESCE(room, '')
+    )
+"""
+
+# (name, SQL) in apply order. Never edit an applied migration; add a new one instead.
+MIGRATIONS = [
+    (
+        "0001_hearing_hash",
+        """
+        ALTER TABLE {schema}.hearings ADD COLUMN IF NOT EXISTS hearing_hash TEXT;
+        UPDATE {schema}.hearings
+        SET hearing_hash = {hearing_hash}
+        WHERE hearing_hash IS NULL;
+        CREATE UNIQUE INDEX IF NOT EXISTS hearings_hearing_hash_idx
+            ON {schema}.hearings (hearing_hash);
+        -- Active hearings only, for cancel_missing_hearings
+        CREATE INDEX IF NOT EXISTS hearings_active_idx
+            ON {schema}.hearings (chamber_id, name, date)
+            WHERE canceled_at IS NULL;
+        """,
+    ),
+    (
+        "0002_committee_alias",
+        """
+        -- Normalized committee names (and manual aliases for near-miss names) -> committee_id
+        CREATE TABLE IF NOT EXISTS {schema}.committee_alias (
+            chamber_id      INT NOT NULL,
+            alias           TEXT NOT NULL,
+            committee_id    INT NOT NULL,
+            source          TEXT NOT NULL DEFAULT 'manual',
+            PRIMARY KEY (chamber_id, alias)
+        );
+        """,
+    ),
+    (
+        "0003_bill_eligibility",
+        """
+        -- Derived at write time by snapshots.bills.update_bill_eligibility
+        ALTER TABLE {schema}.bill
+            ADD COLUMN IF NOT EXISTS bill_type TEXT,
+            ADD COLUMN IF NOT EXISTS inactive_file BOOLEAN NOT NULL DEFAULT FALSE,
+            ADD COLUMN IF NOT EXISTS is_eligible BOOLEAN NOT NULL DEFAULT FALSE,
+            ADD COLUMN IF NOT EXISTS eligibility_rules TEXT;
+        -- Eligible bills only, for the monitor's visibility check
+        CREATE INDEX IF NOT EXISTS bill_eligible_idx
+            ON {schema}.bill (openstates_bill_id) WHERE is_eligible;
+        """,
+    ),
+    (
+        "0004_pipeline_state",
+        """
+        -- Key/value state kept between runs (utils.db.get_state / set_state)
+        CREATE TABLE IF NOT EXISTS {schema}.pipeline_state (
+            key         TEXT PRIMARY KEY,
+            value       TEXT NOT NULL,
+            dropped     INT NOT NULL DEFAULT 0,
+            updated_at  TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ),
+    (
+        "0005_committee_membership",
+        """
+        -- OpenStates committee ID (NULL until a session update links or inserts the row). Names of
+        -- rows inserted from OpenStates follow OpenStates; curated names of linked rows are kept.
+        ALTER TABLE {schema}.committee
+            ADD COLUMN IF NOT EXISTS openstates_committee_id TEXT,
+            ADD COLUMN IF NOT EXISTS name_from_openstates BOOLEAN NOT NULL DEFAULT FALSE;
+        CREATE UNIQUE INDEX IF NOT EXISTS committee_openstates_id_idx
+            ON {schema}.committee (openstates_committee_id);
+        CREATE TABLE IF NOT EXISTS {schema}.committee_membership (
+            openstates_committee_id TEXT NOT NULL,
+            openstates_people_id    TEXT NOT NULL,
+            role                    TEXT,
+            PRIMARY KEY (openstates_committee_id, openstates_people_id)
+        );
+        """,
+    ),
+    (
+        "0006_view_refresh_history",
+        """
+        -- One row per materialized view refresh (refresh.telemetry.record_refresh)
+        CREATE TABLE IF NOT EXISTS {schema}.view_refresh_history (
+            refresh_id      BIGSERIAL PRIMARY KEY,
+            view_name       TEXT NOT NULL,
+            strategy        TEXT NOT NULL,
+            seconds         DOUBLE PRECISION NOT NULL,
+            estimated_rows  BIGINT,
+            change_ratio    DOUBLE PRECISION,
+            refreshed_at    TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS view_refresh_history_view_idx
+            ON {schema}.view_refresh_history (view_name, refreshed_at DESC);
+        """,
+    ),
+    (
+        "0007_people_contacts_merge_key",
+        """
+        -- snapshots.contacts.MERGE_KEY, for the contacts merge
+        CREATE INDEX IF NOT EXISTS people_contacts_merge_idx
+            ON {schema}.people_contacts
+            (openstates_people_id, issue_area, staffer_contact, staffer_type);
+        """,
+    ),
+]
+
+
+def ensure_migrations_table(cur):
+    create_query = """
+        CREATE TABLE IF NOT EXISTS {schema}.{migrations} (
+            name        TEXT PRIMARY KEY,
+            applied_at  TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """.format(schema=SNAPSHOT_SCHEMA, migrations=MIGRATIONS_TABLE)
+    cur.execute(create_query)
+    return
+
+
+def applied_migrations(cur):
+    cur.execute(
+        "SELECT name FROM {schema}.{migrations}".format(
+            schema=SNAPSHOT_SCHEMA, migrations=MIGRATIONS_TABLE
+        )
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def apply_migrations(migrations=MIGRATIONS):
+    """
+    Input: list of (name, SQL) migrations
+    Output: list of migration names applied by this call (empty when the schema is current)
+    """
+    with db.get_cursor() as cur:
+        ensure_migrations_table(cur)
+        applied = applied_migrations(cur)
+
+    newly_applied = []
+    for name, migration in migrations:
+        if name in applied:
+            continue
+        with db.get_cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (ADVISORY_LOCK_KEY,))
+            # Another process may have applied it while this one waited for the lock
+            if name in applied_migrations(cur):
+                continue
+            cur.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+            cur.execute(
+                migration.format(schema=SNAPSHOT_SCHEMA, hearing_hash=HEARING_HASH_SQL)
+            )
+            cur.execute(
+                "INSERT INTO {schema}.{migrations} (name) VALUES (%s)".format(
+                    schema=SNAPSHOT_SCHEMA, migrations=MIGRATIONS_TABLE
+                ),
+                (name,),
+            )
+        logger.info(f"Applied schema migration {name}")
+        newly_applied.append(name)
+    return newly_applied
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    applied = apply_migrations()
+    logger.info(f"Schema up to date ({len(applied)} migrations applied)")
+    return
+
+
+if __name__ == "__main__":
+    main()
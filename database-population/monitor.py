@@ -1,84 +1,261 @@
-import db 
-from refresh import views 
+"""
+Checks that every eligible snapshot bill is visible in app.bills_mv, and repairs only the stage a
+missing bill is stuck in:
+- "snapshot": the bill row has no actions in the snapshot (a partial write), so the view cannot
+  show it. Re-fetch just those bills from OpenStates, then refresh bills_mv and its dependents.
+- "view": the snapshot is complete but bills_mv has not caught up. Refresh bills_mv and its
+  dependents only.
+Bills still missing after a view refresh are escalated to a snapshot re-fetch once. Slack alerts
+report the time from detection to healed.
+
+Runs once by default (cron). With --listen it runs continuously on the pipeline_events channel:
+the pipeline notifies after its write transaction (with the bill IDs written) and after its view
+refresh, and the monitor checks just those bills as soon as the refresh is done.
+
+Usage: python monitor.py [--listen]
+"""
+
+import argparse
+import db
+import migrate
+import json
+import psycopg2
+import select
+import time
+import logging
+from config import config
+from refresh import views
+from snapshots import bills
 from utils import slack_bot
 
-def main():
-    # define temporary table: snapshot.bill where all app.bills_mv conditions apply
-    temporary_table_query = """
-        CREATE TEMPORARY TABLE eligible_bills AS (
-                SELECT
-                    openstates_bill_id,
-                    session,
-                    chamber,
-                    bill_num,
-                    last_action_date::date
-                FROM snapshot.bill
-                WHERE session='20252026'
-                AND bill_num NOT LIKE 'ACR%'
-                AND bill_num NOT LIKE 'HR%'
-                AND bill_num NOT LIKE 'SCR%'
-                AND bill_num NOT LIKE 'SR%'
-                AND bill_num NOT LIKE 'SJR%'
-                AND bill_num NOT LIKE 'AJR%'
-                AND (
-                    last_action_date >= '2025-12-01'
-                    OR openstates_bill_id IN (
-                        SELECT DISTINCT openstates_bill_id
-                        FROM app.bill_history
-                        WHERE LOWER(description) LIKE '%inactive file%'
-                    )
-                    OR bill_num = 'AB 412'
-                    OR bill_num = 'SB 435'
-                )
-        )
-    """
+logger = logging.getLogger(__name__)
 
-    eligible_bill_count_query = """
-        SELECT COUNT(*) FROM eligible_bills
+# Index into credentials.ini for globals
+SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
+APP_SCHEMA = config("postgresql_schemas")["app_schema"]
+# OpenStates allows 6 requests/minute, so re-fetches are capped per run
+MAX_REFETCH = 20
+# Listen mode: seconds to wait for a notification between checks of the full-check timer
+LISTEN_TIMEOUT = 60
+FULL_CHECK_INTERVAL = 6 * 60 * 60
+# Listen mode: seconds to wait before reopening a dropped listen connection
+RECONNECT_DELAY = 30
+
+
+def find_missing_bills(cur, bill_ids=None):
+    """
+    Input: cursor, optional list of bill IDs to limit the check to
+    Output: dictionary of openstates_bill_id -> stage ("snapshot" or "view")
     """
-    # check if any of the eligible bills are missing from the mat view
+    # Eligibility (bill type, inactive file, last action, session) is set on snapshot.bill at
+    # ingest by snapshots.bills.update_bill_eligibility, per BILL_ELIGIBILITY in the request config
     missing_bills_query = """
-        SELECT COUNT(*)
-        FROM eligible_bills eb
-        WHERE NOT EXISTS (
+        SELECT
+            b.openstates_bill_id,
+            NOT EXISTS (
+                SELECT 1 FROM {0}.bill_action a
+                WHERE a.openstates_bill_id = b.openstates_bill_id
+            ) AS incomplete
+        FROM {0}.bill b
+        WHERE b.is_eligible
+        AND (%(bill_ids)s::TEXT[] IS NULL OR b.openstates_bill_id = ANY(%(bill_ids)s::TEXT[]))
+        AND NOT EXISTS (
             SELECT 1
-            FROM app.bills_mv bm
-            WHERE eb.openstates_bill_id = bm.openstates_bill_id
+            FROM {1}.bills_mv bm
+            WHERE b.openstates_bill_id = bm.openstates_bill_id
+        )
+    """.format(SNAPSHOT_SCHEMA, APP_SCHEMA)
+    cur.execute(missing_bills_query, {"bill_ids": bill_ids})
+    return {
+        bill_id: "snapshot" if incomplete else "view"
+        for bill_id, incomplete in cur.fetchall()
+    }
+
+
+def refetch_bills(bill_ids):
+    """
+    Input: list of bill IDs stuck at the snapshot stage
+    Output: number of bills re-fetched and written (committed before returning)
+    """
+    if len(bill_ids) > MAX_REFETCH:
+        logger.warning(
+            f"{len(bill_ids)} bills need a re-fetch, only the first {MAX_REFETCH} this run"
         )
+        bill_ids = bill_ids[:MAX_REFETCH]
+
+    response = bills.fetch_bills_by_id(bill_ids)
+    with db.get_cursor() as cur:
+        bills.upsert(cur, response)
+    return len(response["bills"])
+
+
+def heal(missing):
+    """
+    Input: dictionary of missing bill ID -> stage
+    Output: dictionary of bill ID -> stage for bills still missing afterwards
     """
+    snapshot_ids = [bill_id for bill_id, stage in missing.items() if stage == "snapshot"]
+    if snapshot_ids:
+        logger.info(f"Re-fetching {len(snapshot_ids)} bills stuck at the snapshot stage")
+        refetch_bills(snapshot_ids)
 
-    app_bill_count_query = """
-        SELECT COUNT(*) FROM app.bills_mv
+    # The rows changed are only these bills, so bills_mv and its dependents refresh concurrently
+    views.refresh({"bill": len(missing)})
+
+    with db.get_cursor() as cur:
+        still_missing = find_missing_bills(cur, list(missing))
+
+    # Snapshot looked complete but the view still skips the bill: re-fetch it once
+    escalate = [bill_id for bill_id in still_missing if missing[bill_id] == "view"]
+    if escalate:
+        logger.info(f"{len(escalate)} bills still missing after refresh, re-fetching")
+        refetch_bills(escalate)
+        views.refresh({"bill": len(escalate)})
+        with db.get_cursor() as cur:
+            still_missing = find_missing_bills(cur, list(missing))
+    return still_missing
+
+
+def check(bill_ids=None, alert_success=True):
+    """
+    Input: optional list of bill IDs to limit the check to (None checks every eligible bill),
+    whether to send a Slack alert when everything is in sync
+    Output: None (repairs missing bills and sends Slack alerts)
     """
+    eligible_bill_count_query = """
+        SELECT COUNT(*) FROM {0}.bill
+        WHERE is_eligible
+        AND (%(bill_ids)s::TEXT[] IS NULL OR openstates_bill_id = ANY(%(bill_ids)s::TEXT[]))
+    """.format(SNAPSHOT_SCHEMA)
 
-    # Execute
+    # Diagnose in a short transaction, so repairs on other connections are not blocked by it
     with db.get_cursor() as cur:
-        cur.execute(temporary_table_query)
-        cur.execute(eligible_bill_count_query)
+        cur.execute(eligible_bill_count_query, {"bill_ids": bill_ids})
         eligible_count = cur.fetchone()[0]
+        missing = find_missing_bills(cur, bill_ids)
 
-        cur.execute(missing_bills_query)
-        missing_count = cur.fetchone()[0]
-
-        if missing_count > 0:
-            # Slack alert that a manual refresh is needed again
-            slack_bot.send_monitor_failure_alert(missing_count)
-            
-            # manual refresh
-            views.refresh(cur)
-
-            # Check app data rows
-            cur.execute(app_bill_count_query)
-            successful_count = cur.fetchone()[0]
-            still_missing = eligible_count - successful_count
-            if still_missing:
-                slack_bot.send_monitor_refresh_failure_alert()
-            else:
-                slack_bot.send_monitor_refresh_success_alert(eligible_count)
-        else:
+    scope = "all" if bill_ids is None else len(bill_ids)
+    if not missing:
+        logger.info(f"Snapshot and app bills in sync | bills checked={scope}")
+        if alert_success:
             # Slack alert that snapshot and app data is in-sync
             slack_bot.send_monitor_success_alert()
+        return
+
+    stages = {
+        stage: sum(1 for s in missing.values() if s == stage)
+        for stage in ("snapshot", "view")
+    }
+    logger.info(f"Missing bills by stage: {stages} | bills checked={scope}")
+    # Slack alert that a targeted repair is running
+    slack_bot.send_monitor_failure_alert(len(missing), stages)
+
+    heal_start = time.time()
+    still_missing = heal(missing)
+    heal_seconds = time.time() - heal_start
+
+    if still_missing:
+        slack_bot.send_monitor_refresh_failure_alert(len(still_missing), heal_seconds)
+    else:
+        slack_bot.send_monitor_refresh_success_alert(eligible_count, len(missing), heal_seconds)
+    return
+
+
+def handle_event(event, written):
+    """
+    Input: decoded pipeline notification, dictionary of run_id -> bill IDs written in that run
+    Output: None (checks the run's bills once its views are refreshed)
+    """
+    run_id = event.get("run_id")
+    if event["event"] == "write":
+        written[run_id] = event.get("bill_ids")
+        logger.info(f"Pipeline write committed | run={run_id}, tables={event.get('tables')}")
+    elif event["event"] == "refresh":
+        # Unknown run (ex: monitor started mid-run) or oversized payload: check everything
+        bill_ids = written.pop(run_id, None)
+        if bill_ids == []:
+            logger.info(f"Pipeline refresh | run={run_id}, no bills written, skipping check")
+            return
+        logger.info(f"Pipeline refresh | run={run_id}, failed views={event.get('failed')}")
+        check(bill_ids, alert_success=False)
+
+
+def guarded(description, fn, *args, **kwargs):
+    """
+    Input: description for the log and alert, function to call and its arguments
+    Output: None (an exception from fn is logged and alerted, so listening continues)
+    """
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"ERROR {description}: {e}", exc_info=True)
+        slack_bot.send_monitor_error_alert(description, str(e))
+    return
+
+
+def listen():
+    """
+    Long-running mode: waits for pipeline notifications and checks the bills each run wrote as
+    soon as its refresh commits, with a full check at start and every FULL_CHECK_INTERVAL.
+
+    Errors in a check or a notification handler are logged and alerted without stopping the
+    listener. A dropped listen connection is reopened, followed by a full check to cover any
+    notifications missed while it was down.
+    """
+    written = {}
+    guarded("running the initial full check", check, alert_success=False)
+    last_full_check = time.time()
+    reconnecting = False
+
+    while True:
+        try:
+            with db.get_listen_connection() as conn:
+                if reconnecting:
+                    # Notifications sent while the connection was down are lost
+                    written.clear()
+                    guarded("running the full check after reconnecting", check, alert_success=False)
+                    last_full_check = time.time()
+                    reconnecting = False
+
+                while True:
+                    if select.select([conn], [], [], LISTEN_TIMEOUT) != ([], [], []):
+                        conn.poll()
+                        while conn.notifies:
+                            notification = conn.notifies.pop(0)
+                            guarded(
+                                f"handling {notification.payload[:200]}",
+                                lambda: handle_event(json.loads(notification.payload), written),
+                            )
+
+                    if time.time() - last_full_check >= FULL_CHECK_INTERVAL:
+                        guarded("running the periodic full check", check, alert_success=False)
+                        last_full_check = time.time()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.error(f"Listen connection lost: {e} | reconnecting in {RECONNECT_DELAY}s")
+            if not reconnecting:
+                slack_bot.send_monitor_error_alert("listening for pipeline events", str(e))
+            reconnecting = True
+            time.sleep(RECONNECT_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that eligible snapshot bills are visible in the app."
+    )
+    parser.add_argument(
+        "--listen",
+        action="store_true",
+        help="Run continuously, checking each pipeline run as it is notified.",
+    )
+    args = parser.parse_args()
+
+    # The eligibility columns checked here are added by migration 0003_bill_eligibility
+    migrate.apply_migrations()
+    if args.listen:
+        listen()
+    else:
+        check()
     return
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
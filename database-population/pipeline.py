@@ -1,5 +1,7 @@
 import db
+import migrate
 import datetime as dt
+from collections import Counter
 import time
 import traceback
 import logging
@@ -25,17 +27,32 @@ def run_pipeline(force_update=False, dev_mode=False):
         "bills_updated": 0,
         "hearings_updated": 0,
         "contacts_updated": 0,
+        "contacts_failed": 0,
+        "contacts_inserted": 0,
+        "contacts_deleted": 0,
+        "contacts_unchanged": 0,
+        "contacts_sheets_skipped": [],
+        "contacts_fetch_seconds": {},
         "fetch_runtime_seconds": 0,
         "db_write_runtime_seconds": 0,
         "db_view_runtime_seconds": 0,
+        "db_view_critical_path_seconds": 0,
+        "tables_changed": {},
+        "views_skipped": [],
+        "view_strategies": {},
         "total_runtime_seconds": 0,
     }
     try:
         timestamp = dt.datetime.now(dt.timezone.utc)
+        run_id = timestamp.isoformat()
         log.info(
             f"Starting daily legislation updates | timestamp={timestamp.strftime('%Y-%m-%d %H:%M %Z')}"
         )
 
+        # Pending one-time schema changes, each in its own short transaction
+        current_step = "schema migrations"
+        migrate.apply_migrations()
+
         # --- Phase 1: Fetch (no DB connection open) ---
         current_step = "bills fetch"
         last_update = bills.get_last_update_timestamp()
@@ -48,13 +65,20 @@ def run_pipeline(force_update=False, dev_mode=False):
         )
 
         current_step = "contacts fetch"
-        contact_updates = contacts.fetch_updates()
+        contact_updates, sheet_states, stats["contacts_fetch_seconds"] = contacts.fetch_updates(
+            force=force_update
+        )
+        stats["contacts_sheets_skipped"] = [
+            chamber for chamber in contacts.SHEET_CHAMBERS if chamber not in contact_updates
+        ]
         for chamber, contact_data in contact_updates.items():
             log.info(
                 (
                     f"{chamber} Codex fetch complete | "
-                    f"issues={len(contact_data)}, "
-                    f"contacts={sum([len(df) for df in contact_data.values()])}"
+                    f"issues={contact_data['issue_area'].nunique()}, "
+                    f"contacts={len(contact_data)}, "
+                    f"download={stats['contacts_fetch_seconds'][chamber]['download']:.2f}s, "
+                    f"extract={stats['contacts_fetch_seconds'][chamber]['extract']:.2f}s"
                 )
             )
 
@@ -70,6 +94,7 @@ def run_pipeline(force_update=False, dev_mode=False):
         # --- Phase 2: Write (first DB connection) ---
         # Reset timer for DB transaction
         db_start = time.time()
+        changed_rows = Counter()
         log.info("Opening DB transaction (writes)...")
         with db.get_cursor() as cur:
             current_step = "bills write"
@@ -77,7 +102,7 @@ def run_pipeline(force_update=False, dev_mode=False):
                 log.info(
                     f"Upserting bills | rows = {n_bills}, force_update={force_update}"
                 )
-                bills.upsert(cur, bill_updates)
+                changed_rows.update(bills.upsert(cur, bill_updates))
                 stats["bills_updated"] = n_bills
             else:
                 log.info("No bill updates to write, skipping")
@@ -85,34 +110,90 @@ def run_pipeline(force_update=False, dev_mode=False):
             current_step = "contacts write"
             for chamber, contact_data in contact_updates.items():
                 log.info(
-                    f"Refreshing {chamber} contacts | rows = {sum([len(df) for df in contact_data.values()])}"
+                    f"Refreshing {chamber} contacts | rows = {len(contact_data)}"
+                )
+                contact_rows, merge_report = contacts.update(cur, contact_data, chamber)
+                changed_rows.update(contact_rows)
+                stats["contacts_updated"] += len(contact_data) - len(merge_report["failed"])
+                stats["contacts_failed"] += len(merge_report["failed"])
+                for key in ("inserted", "deleted", "unchanged"):
+                    stats[f"contacts_{key}"] += merge_report[key]
+                contacts.store_sheet_state(
+                    cur, chamber, sheet_states[chamber], len(merge_report["failed"])
+                )
+            if stats["contacts_sheets_skipped"]:
+                log.info(
+                    f"Codex sheets unchanged, skipping contacts for: {', '.join(stats['contacts_sheets_skipped'])}"
                 )
-                contacts.update(cur, contact_data, chamber)
-                stats["contacts_updated"] += sum([len(df) for df in contact_data.values()])
             
             # TODO: add topics
             current_step = "hearings write"
             if len(hearing_schedule):
-                log.info(
-                    f"Upserting hearing info and scheduled bills"
+                schedule_digest = hearings.schedule_digest(
+                    hearing_schedule, bill_schedule
                 )
-                hearings.upsert(cur, hearing_schedule, bill_schedule)
-                stats["hearings_updated"] = len(hearing_schedule)
+                bills_written = stats["bills_updated"] > 0 or force_update
+                if not force_update and hearings.schedule_unchanged(
+                    cur, schedule_digest, bills_written=bills_written
+                ):
+                    log.info(
+                        f"Hearing schedule unchanged since last write, skipping | digest={schedule_digest[:12]}"
+                    )
+                else:
+                    log.info(
+                        f"Upserting hearing info and scheduled bills"
+                    )
+                    dropped, hearing_rows = hearings.upsert(
+                        cur,
+                        hearing_schedule,
+                        bill_schedule,
+                        full_deadline_sync=force_update,
+                    )
+                    hearings.store_schedule_digest(cur, schedule_digest, dropped)
+                    changed_rows.update(hearing_rows)
+                    stats["hearings_updated"] = len(hearing_schedule)
             else:
                 log.info("No hearing updates to write, skipping")
 
+            stats["tables_changed"] = {
+                table: rows for table, rows in sorted(changed_rows.items()) if rows
+            }
+            # Delivered to monitor listeners when the write transaction commits
+            written_bill_ids = (
+                bill_updates["bills"]["openstates_bill_id"].tolist()
+                if stats["bills_updated"]
+                else []
+            )
+            db.notify(
+                cur,
+                "write",
+                run_id=run_id,
+                bill_ids=written_bill_ids,
+                tables=stats["tables_changed"],
+            )
+
         stats["db_write_runtime_seconds"] = time.time() - db_start
+        log.info(f"Snapshot rows changed: {stats['tables_changed'] or 'none'}")
 
-        # --- Phase 3: Refresh (second DB connection) ---
+        # --- Phase 3: Refresh (pooled DB connections, one transaction per view) ---
         view_start = time.time()
-        log.info("Opening DB transaction (refresh)...")
-        with db.get_cursor() as cur:
-            current_step = "views refresh"
-            log.info("Refreshing materialized views...")
-            views.refresh(cur)
-            log.info("Views refreshed")
+        current_step = "views refresh"
+        log.info("Refreshing materialized views...")
+        refresh_report = views.refresh(changed_rows, force=force_update)
+        log.info("Views refreshed")
 
         stats["db_view_runtime_seconds"] = time.time() - view_start
+        stats["db_view_critical_path_seconds"] = refresh_report["critical_path_seconds"]
+        stats["views_skipped"] = refresh_report["skipped"]
+        stats["view_strategies"] = refresh_report["strategies"]
+        with db.get_cursor() as cur:
+            db.notify(
+                cur,
+                "refresh",
+                run_id=run_id,
+                views=sorted(refresh_report["view_seconds"]),
+                failed=refresh_report["failed"],
+            )
 
         # --- Phase 4: Log ---
         # Store total runtime top to bottom
@@ -127,6 +208,8 @@ def run_pipeline(force_update=False, dev_mode=False):
                 f"fetch_runtime={stats['fetch_runtime_seconds']:2f}s "
                 f"db_write_runtime={stats['db_write_runtime_seconds']:2f}s "
                 f"db_view_runtime={stats['db_view_runtime_seconds']:2f}s "
+                f"db_view_critical_path={stats['db_view_critical_path_seconds']:2f}s "
+                f"views_skipped={len(stats['views_skipped'])} "
                 f"total_runtime={stats['runtime_seconds']:2f}s"
             )
         )
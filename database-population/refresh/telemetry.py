@@ -0,0 +1,85 @@
+"""
+Refresh telemetry for the app schema materialized views.
+
+Row counts come from the catalog instead of a COUNT(*) over the view: after REFRESH ... CONCURRENTLY,
+pg_stat_user_tables.n_live_tup plus this transaction's inserts and deletes from
+pg_stat_xact_user_tables; after a swap rebuild, pg_class.reltuples as set by its ANALYZE.
+
+Each refresh is appended to a history table (created by migrate.py) with its duration, strategy and
+row estimate, and a refresh much slower than the view's recent median is logged as a warning.
+"""
+
+from config import config
+import statistics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index into credentials.ini for globals
+SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
+HISTORY_TABLE = "view_refresh_history"
+# Recent refreshes compared against, and the multiple of their median that counts as a regression
+HISTORY_WINDOW = 10
+REGRESSION_FACTOR = 2.0
+
+
+def estimated_rows(cur, qualified_view, analyzed=False):
+    """
+    Input: cursor, schema-qualified view name, whether the view was just analyzed
+    Output: estimated row count from catalog statistics, or None if never counted
+    """
+    if analyzed:
+        query = """
+            SELECT NULLIF(c.reltuples, -1)::BIGINT
+            FROM pg_class c
+            WHERE c.oid = %s::regclass
+        """
+    else:
+        # Cumulative stats are only flushed at commit, so add the refresh's own row changes
+        query = """
+            SELECT GREATEST(
+                COALESCE(s.n_live_tup, NULLIF(c.reltuples, -1)::BIGINT)
+                    + COALESCE(x.n_tup_ins, 0) - COALESCE(x.n_tup_del, 0),
+                0
+            )
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            LEFT JOIN pg_stat_xact_user_tables x ON x.relid = c.oid
+            WHERE c.oid = %s::regclass
+        """
+    cur.execute(query, (qualified_view,))
+    return cur.fetchone()[0]
+
+
+def record_refresh(cur, view, strategy, seconds, rows, change_ratio=None):
+    """
+    Appends one refresh to the history table and warns if it was much slower than the view's
+    recent median. Runs in the refresh's own transaction, so failed refreshes are not recorded.
+    """
+    cur.execute(
+        """
+        SELECT seconds
+        FROM {schema}.{history}
+        WHERE view_name = %s
+        ORDER BY refreshed_at DESC
+        LIMIT %s
+        """.format(schema=SNAPSHOT_SCHEMA, history=HISTORY_TABLE),
+        (view, HISTORY_WINDOW),
+    )
+    recent = [row[0] for row in cur.fetchall()]
+    if recent:
+        median = statistics.median(recent)
+        if median > 0 and seconds > REGRESSION_FACTOR * median:
+            logger.warning(
+                f"{view}: refresh took {seconds:.2f}s, over {REGRESSION_FACTOR:g}x the median "
+                f"of the last {len(recent)} runs ({median:.2f}s)"
+            )
+
+    cur.execute(
+        """
+        INSERT INTO {schema}.{history} (view_name, strategy, seconds, estimated_rows, change_ratio)
+        VALUES (%s, %s, %s, %s, %s)
+        """.format(schema=SNAPSHOT_SCHEMA, history=HISTORY_TABLE),
+        (view, strategy, seconds, rows, change_ratio),
+    )
+    return
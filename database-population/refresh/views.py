@@ -1,6 +1,30 @@
-""" """
+"""
+Refreshes the app schema materialized views after each pipeline write.
 
+Views are refreshed level by level following VIEW_DEPENDENCIES: every view in a level only reads
+base tables or views from earlier levels, so a level's REFRESH ... CONCURRENTLY statements run in
+parallel, each on its own pooled connection and transaction. A view whose dependency failed to
+refresh is not refreshed in the same run.
+
+Given the rows a run modified per snapshot table, only views that read one of them (directly via
+VIEW_INPUTS, or through a stale upstream view) are refreshed; a run that changed nothing refreshes
+nothing.
+
+Each stale view is refreshed with one of two strategies, chosen from its estimated change ratio
+(rows changed in its inputs / rows in the view per pg_class):
+- "concurrently": REFRESH ... CONCURRENTLY, which diffs the whole view; cheap for small deltas
+- "swap": build and analyze a shadow copy from the view definition with its owner, indexes and
+  grants in one transaction, then drop the old copy and rename the shadow into place in a second,
+  short transaction with a lock_timeout (falling back to a concurrent refresh if the lock is not
+  granted). Readers keep reading the old copy during the rebuild and only wait for the renames.
+  Only used for views no other view depends on, since dependents are bound to the old copy.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
 from config import config
+from refresh import telemetry
+import psycopg2.errors
+import re
 import time
 import logging
 import db
@@ -11,7 +35,6 @@ logging.basicConfig(level=logging.INFO)
 # Index into credentials.ini for globals
 APP_SCHEMA = config("postgresql_schemas")["app_schema"]
 
-# Refresh order matters — dependencies first
 MATERIALIZED_VIEWS = {
     "bills": "bills_mv",
     "actions": "bill_history_mv",
@@ -21,20 +44,360 @@ MATERIALIZED_VIEWS = {
     "letter deadlines": "hearing_deadlines_mv"
 }
 
-def refresh(cur):
-    for atom, view in MATERIALIZED_VIEWS.items():
-        try:
-            logger.info(f"Refreshing materialized view - {view}")
-            start = time.time()
+# View -> materialized views it reads. Keep in sync with the view definitions in the schema repo
+VIEW_DEPENDENCIES = {
+    "bills_mv": set(),
+    "bill_history_mv": {"bills_mv"},
+    "committees_mv": set(),
+    "hearings_mv": {"committees_mv"},
+    "hearing_bills_mv": {"hearings_mv", "bills_mv"},
+    "hearing_deadlines_mv": {"hearings_mv"},
+}
+
+# View -> snapshot tables it reads
+VIEW_INPUTS = {
+    "bills_mv": {"bill", "bill_action", "bill_sponsor", "bill_vote"},
+    "bill_history_mv": {"bill_action"},
+    "committees_mv": {"committee", "committee_membership", "people", "people_roles"},
+    "hearings_mv": {"hearings", "committee"},
+    "hearing_bills_mv": {"hearing_bills", "hearings", "bill"},
+    "hearing_deadlines_mv": {"hearing_deadlines", "hearings"},
+}
+
+# Parallel refreshes (and pooled connections) per level
+REFRESH_WORKERS = 3
+# Estimated share of changed rows at or above which a view is rebuilt and swapped
+SWAP_RATIO = 0.25
+SHADOW_SUFFIX = "__shadow"
+# The swap transaction gives up (and falls back to a concurrent refresh) rather than wait longer
+SWAP_LOCK_TIMEOUT = "5s"
+# "CREATE [UNIQUE] INDEX <name> ON [ONLY] <schema>.<table>" at the start of pg_get_indexdef
+INDEX_PREFIX_PATTERN = re.compile(
+    r'^(CREATE (?:UNIQUE )?INDEX) (?:"(?:[^"]|"")+"|\S+) ON (?:ONLY )?(?:"(?:[^"]|"")+"|[^\s.]+)\.(?:"(?:[^"]|"")+"|\S+)'
+)
+
+
+def refresh_levels(dependencies=VIEW_DEPENDENCIES):
+    """
+    Input: dictionary of view -> set of views it depends on
+    Output: list of levels (sorted lists of views); each level only depends on earlier levels
+    """
+    remaining = {view: set(deps) for view, deps in dependencies.items()}
+    levels = []
+    while remaining:
+        level = sorted(view for view, deps in remaining.items() if not deps)
+        if not level:
+            raise Exception(f"Cycle in materialized view dependencies: {sorted(remaining)}")
+        levels.append(level)
+        for view in level:
+            del remaining[view]
+        for deps in remaining.values():
+            deps.difference_update(level)
+    return levels
+
+
+def stale_views(changed_rows):
+    """
+    Input: dictionary of snapshot table -> rows modified this run, or None if unknown
+    Output: set of views to refresh, including views downstream of a stale view
+    """
+    if changed_rows is None:
+        return set(VIEW_DEPENDENCIES)
+    changed_tables = {table for table, rows in changed_rows.items() if rows}
+    stale = set()
+    for level in refresh_levels():
+        for view in level:
+            if VIEW_INPUTS[view] & changed_tables or VIEW_DEPENDENCIES[view] & stale:
+                stale.add(view)
+    return stale
+
+
+def estimated_changes(changed_rows):
+    """
+    Input: dictionary of snapshot table -> rows modified this run
+    Output: dictionary of view -> upper estimate of changed rows (its inputs plus upstream views)
+    """
+    changes = {}
+    for level in refresh_levels():
+        for view in level:
+            changes[view] = sum(changed_rows.get(table, 0) for table in VIEW_INPUTS[view])
+            changes[view] += sum(changes[dep] for dep in VIEW_DEPENDENCIES[view])
+    return changes
+
+
+def choose_strategy(cur, view, changes):
+    """
+    Input: cursor, view name, estimated changed rows (None if unknown)
+    Output: tuple of ("concurrently" or "swap", estimated change ratio or None)
+    """
+    if changes is None:
+        return "concurrently", None
+
+    cur.execute(
+        """
+        SELECT c.reltuples, EXISTS (
+            SELECT 1
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.refobjid = c.oid
+            AND r.ev_class <> c.oid
+        )
+        FROM pg_class c
+        WHERE c.oid = %s::regclass
+        """,
+        (f"{APP_SCHEMA}.{view}",),
+    )
+    view_rows, has_dependents = cur.fetchone()
+    # reltuples is -1 (or 0) before the view is first analyzed
+    if view_rows <= 0:
+        return "concurrently", None
+    ratio = min(changes / view_rows, 1.0)
+
+    if ratio < SWAP_RATIO:
+        return "concurrently", ratio
+    if has_dependents:
+        logger.info(
+            f"{view}: change ratio {ratio:.2f} but other views depend on it, refreshing concurrently"
+        )
+        return "concurrently", ratio
+    return "swap", ratio
+
+
+def index_definitions(cur, view):
+    """
+    Input: cursor, view name
+    Output: list of (index name, definition rewritten for the shadow view)
+
+    Only the leading "CREATE [UNIQUE] INDEX <name> ON <view>" of each definition is rewritten, so
+    an index or view name that appears inside a column expression is left alone.
+    """
+    cur.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass
+        """,
+        (f"{APP_SCHEMA}.{view}",),
+    )
+    definitions = []
+    for index_name, index_def in cur.fetchall():
+        match = INDEX_PREFIX_PATTERN.match(index_def)
+        if not match:
+            raise Exception(f"Unexpected index definition for {index_name}: {index_def}")
+        shadow_def = (
+            f"{match.group(1)} {quote_ident(index_name + SHADOW_SUFFIX)} "
+            f"ON {APP_SCHEMA}.{view}{SHADOW_SUFFIX}" + index_def[match.end():]
+        )
+        definitions.append((index_name, shadow_def))
+    return definitions
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_shadow(cur, view):
+    """
+    Builds and analyzes {view}__shadow from the view's current definition, with the same owner,
+    indexes and grants (including grant options). Readers of the live view are not blocked.
+    Output: list of index names to rename when the shadow is swapped in
+    """
+    qualified = f"{APP_SCHEMA}.{view}"
+    shadow = f"{APP_SCHEMA}.{view}{SHADOW_SUFFIX}"
+
+    cur.execute(
+        "SELECT pg_get_viewdef(%s::regclass), pg_get_userbyid(relowner) FROM pg_class WHERE oid = %s::regclass",
+        (qualified, qualified),
+    )
+    definition, owner = cur.fetchone()
+    definition = definition.rstrip().rstrip(";")
+    indexes = index_definitions(cur, view)
+    cur.execute(
+        """
+        SELECT CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(a.grantee::regrole::TEXT) END,
+            a.privilege_type,
+            a.is_grantable
+        FROM pg_class c, aclexplode(c.relacl) a
+        WHERE c.oid = %s::regclass
+            AND a.grantee <> c.relowner
+        """,
+        (qualified,),
+    )
+    grants = cur.fetchall()
+
+    cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {shadow}")
+    cur.execute(f"CREATE MATERIALIZED VIEW {shadow} AS {definition}")
+    for _, shadow_def in indexes:
+        cur.execute(shadow_def)
+    cur.execute(f"ALTER MATERIALIZED VIEW {shadow} OWNER TO {quote_ident(owner)}")
+    for grantee, privilege, grantable in grants:
+        grant_option = " WITH GRANT OPTION" if grantable else ""
+        cur.execute(f"GRANT {privilege} ON {shadow} TO {grantee}{grant_option}")
+    # Planner statistics (and reltuples for the next run's change ratio), before the swap
+    cur.execute(f"ANALYZE {shadow}")
+    return [index_name for index_name, _ in indexes]
+
+
+def swap_rebuild(pool, view):
+    """
+    Input: connection pool, view name
+    Output: True if the rebuilt view was swapped in, False if the swap could not get its lock
+    within SWAP_LOCK_TIMEOUT (the shadow is dropped and the caller should refresh concurrently)
+
+    The shadow is built and analyzed in its own transaction. The swap (drop the old copy, rename
+    the shadow and its indexes) is a separate short transaction with a lock_timeout, so readers only
+    wait for the renames, and the swap gives up instead of queueing behind a long-running reader.
+    Queries queued on the old copy re-resolve the name after the swap commits.
+    """
+    qualified = f"{APP_SCHEMA}.{view}"
+    shadow = f"{APP_SCHEMA}.{view}{SHADOW_SUFFIX}"
+
+    with db.get_pooled_cursor(pool) as cur:
+        index_names = build_shadow(cur, view)
+
+    try:
+        with db.get_pooled_cursor(pool) as cur:
+            cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+            cur.execute(f"DROP MATERIALIZED VIEW {qualified}")
+            cur.execute(f"ALTER MATERIALIZED VIEW {shadow} RENAME TO {view}")
+            for index_name in index_names:
+                cur.execute(
+                    f"ALTER INDEX {APP_SCHEMA}.{quote_ident(index_name + SHADOW_SUFFIX)} "
+                    f"RENAME TO {quote_ident(index_name)}"
+                )
+        return True
+    except psycopg2.errors.LockNotAvailable:
+        logger.warning(
+            f"{view}: swap lock not granted within {SWAP_LOCK_TIMEOUT}, refreshing concurrently"
+        )
+        with db.get_pooled_cursor(pool) as cur:
+            cur.execute(f"DROP MATERIALIZED VIEW IF EXISTS {shadow}")
+        return False
+
+
+def critical_path(elapsed, dependencies=VIEW_DEPENDENCIES):
+    """
+    Input: dictionary of view -> refresh seconds (views that did not run are omitted)
+    Output: tuple of (seconds, list of views) for the slowest dependency chain
+    """
+    paths = {}
+    for level in refresh_levels(dependencies):
+        for view in level:
+            parent = max(
+                (paths[dep] for dep in dependencies[view]),
+                key=lambda path: path[0],
+                default=(0.0, []),
+            )
+            if view in elapsed:
+                paths[view] = (parent[0] + elapsed[view], parent[1] + [view])
+            else:
+                paths[view] = parent
+    return max(paths.values(), key=lambda path: path[0], default=(0.0, []))
+
+
+def refresh_view(pool, atom, view, changes=None):
+    """
+    Input: connection pool, label for logging, view name, estimated changed rows (None if unknown)
+    Output: tuple of (refresh seconds, strategy, estimated rows); raises if the refresh fails
+    """
+    with db.get_pooled_cursor(pool) as cur:
+        strategy, ratio = choose_strategy(cur, view, changes)
+    ratio_text = "unknown" if ratio is None else f"{ratio:.2f}"
+    logger.info(
+        f"Refreshing materialized view - {view} | strategy={strategy}, change ratio={ratio_text}"
+    )
+
+    start = time.time()
+    if strategy == "swap" and not swap_rebuild(pool, view):
+        strategy = "concurrently"
+
+    with db.get_pooled_cursor(pool) as cur:
+        if strategy == "concurrently":
+            # Same transaction as the row estimate, which adds this transaction's row changes
             cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {APP_SCHEMA}.{view}")
-            elapsed = time.time() - start
-            logger.info(f"{cur.statusmessage} ({elapsed:.2f}s)")
-            cur.execute(f"SELECT COUNT(*) FROM {APP_SCHEMA}.{view}")
-            atomic_count = cur.fetchone()[0]
-            logger.info(f"{atom.title()} visible in mat view: {atomic_count}")
-        except Exception as e:
-            logger.error(f"ERROR refreshing {view}: {e}")
+            logger.info(f"{view}: {cur.statusmessage}")
+        elapsed = time.time() - start
+        logger.info(f"{view}: refreshed with {strategy} ({elapsed:.2f}s)")
+        rows = telemetry.estimated_rows(
+            cur, f"{APP_SCHEMA}.{view}", analyzed=strategy == "swap"
+        )
+        logger.info(f"{atom.title()} visible in mat view (estimated): {rows}")
+        telemetry.record_refresh(cur, view, strategy, elapsed, rows, ratio)
+    return elapsed, strategy, rows
+
+
+def refresh(changed_rows=None, force=False, workers=REFRESH_WORKERS):
+    """
+    Input: dictionary of snapshot table -> rows modified this run (None refreshes every view
+    concurrently), whether to refresh every view regardless, number of parallel refreshes
+    Output: dictionary with per-view refresh seconds and strategy, failed and skipped views, and the
+    critical path
+    """
+    atoms = {view: atom for atom, view in MATERIALIZED_VIEWS.items()}
+    elapsed, strategies, row_counts, failed, skipped = {}, {}, {}, [], []
+    levels = refresh_levels()
+    stale = stale_views(None if force else changed_rows)
+    changes = None if changed_rows is None else estimated_changes(changed_rows)
+
+    if not stale:
+        logger.info("No materialized view inputs changed, skipping refresh")
+        return {
+            "view_seconds": elapsed,
+            "strategies": strategies,
+            "failed": failed,
+            "skipped": sorted(VIEW_DEPENDENCIES),
+            "critical_path": [],
+            "critical_path_seconds": 0.0,
+        }
+
+    with db.get_pool(workers) as pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, level in enumerate(levels, start=1):
+            level_start = time.time()
+            futures = {}
+            for view in level:
+                if view not in stale:
+                    logger.info(f"Skipping materialized view - {view} (inputs unchanged)")
+                    skipped.append(view)
+                elif VIEW_DEPENDENCIES[view] & set(failed):
+                    logger.error(f"Skipping materialized view - {view} (dependency failed)")
+                    failed.append(view)
+                else:
+                    futures[view] = executor.submit(
+                        refresh_view,
+                        pool,
+                        atoms[view],
+                        view,
+                        None if changes is None else changes[view],
+                    )
+
+            for view, future in futures.items():
+                try:
+                    elapsed[view], strategies[view], row_counts[view] = future.result()
+                except Exception as e:
+                    logger.error(f"ERROR refreshing {view}: {e}")
+                    failed.append(view)
+            if futures:
+                logger.info(
+                    f"Refreshed level {i}/{len(levels)} ({', '.join(futures)}) "
+                    f"in {time.time() - level_start:.2f}s"
+                )
+
+    path_seconds, path = critical_path(elapsed)
+    logger.info(
+        f"Critical path: {' -> '.join(path) or 'none'} ({path_seconds:.2f}s, "
+        f"{sum(elapsed.values()):.2f}s of refresh work)"
+    )
+    return {
+        "view_seconds": elapsed,
+        "strategies": strategies,
+        "row_counts": row_counts,
+        "failed": failed,
+        "skipped": sorted(skipped),
+        "critical_path": path,
+        "critical_path_seconds": path_seconds,
+    }
+
 
 if __name__ == "__main__":
-    with db.get_cursor() as cur:
-        refresh(cur)
+    refresh()
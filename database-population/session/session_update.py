@@ -1,91 +1,176 @@
 """
 Orchestrates the annual session update pipeline:
 - Legislator, party, district, and role information from OpenStates
+- Committees and committee memberships from OpenStates
 - Staffer contact information from Capitol Codex
 
-Run once per legislative session via session/main.py.
+Run once per legislative session via session/main.py. Runs in the same phases as the daily
+pipeline: fetch with no DB connection open, one write transaction, then a refresh of the views
+whose snapshot inputs changed.
 """
 
-import psycopg2
-from datetime import datetime
-from config import config
-from session.snapshots.people import (
-    get_last_update_timestamp,
-    fetch_legislator_updates,
-    upsert_people,
-    update_people_data,
+import db
+import migrate
+import datetime as dt
+from collections import Counter
+import time
+import traceback
+import logging
+
+from session.snapshots import people, committees
+from snapshots import contacts
+from refresh import views
+from utils.slack_bot import send_session_success_alert, send_pipeline_failure_alert
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
 )
-from session.snapshots.contacts import fetch_codex_updates, codex_upsert_contacts
+log = logging.getLogger(__name__)
+
 
+def run_session_update(force_update=False, dev_mode=False):
+    start_time = time.time()
+    current_step = "initializing"
 
-def run_session_update(force_update=False):
-    conn = None
+    # Initialize dictionary in case any errors are raised
+    stats = {
+        "people_updated": 0,
+        "people_rows_fetched": {},
+        "committees_updated": 0,
+        "committee_memberships": {},
+        "contacts_updated": 0,
+        "contacts_failed": 0,
+        "fetch_runtime_seconds": 0,
+        "db_write_runtime_seconds": 0,
+        "db_view_runtime_seconds": 0,
+        "tables_changed": {},
+        "views_skipped": [],
+        "runtime_seconds": 0,
+    }
     try:
-        params = config("postgres")
-        conn = psycopg2.connect(**params)
-        cur = conn.cursor()
-
-        last_update = get_last_update_timestamp(cur)
-        print("Last update timestamp: " + str(last_update))
-        print(
-            "Current timestamp: "
-            + datetime.now().strftime("%Y-%m-%d, %H:%M:%S")
-            + " -- fetching updates from OpenStates"
+        timestamp = dt.datetime.now(dt.timezone.utc)
+        log.info(
+            f"Starting session update | timestamp={timestamp.strftime('%Y-%m-%d %H:%M %Z')}"
         )
 
-        legislator_updates = fetch_legislator_updates(last_update)
-        contact_updates = fetch_codex_updates()
-        print("Summary of legislators being updated:")
-
-        if len(legislator_updates["people"].index) == 0:
-            print("Empty legislator response from OpenStates API.")
-
-            if force_update:
-                upsert_people(cur, legislator_updates["people"])
-                update_people_data(
-                    cur=cur,
-                    people_list=legislator_updates["people"]["openstates_people_id"],
-                    people_role_data=legislator_updates["people_roles"],
-                    people_office_data=legislator_updates["people_offices"],
-                    people_name_data=legislator_updates["people_names"],
-                    people_source_data=legislator_updates["people_sources"],
-                )
-                print("Snapshot forced to update")
-            else:
-                print("Skipping forced refresh -- no legislators to update; finishing.")
+        # Pending one-time schema changes, each in its own short transaction
+        current_step = "schema migrations"
+        migrate.apply_migrations()
+
+        # --- Phase 1: Fetch (no DB connection open) ---
+        current_step = "people fetch"
+        last_update = people.get_last_update_timestamp()
+        log.info(f"Timestamp watermark: updated_since={last_update}")
+        spools = people.fetch_legislator_updates(last_update)
+        stats["people_rows_fetched"] = {
+            table: spool.rows for table, spool in spools.items()
+        }
+        n_people = spools["people"].rows
+        log.info(f"Legislator fetch complete | rows={stats['people_rows_fetched']}")
+
+        current_step = "committees fetch"
+        committee_spools = committees.fetch_committee_updates()
+        log.info(
+            f"Committee fetch complete | committees={committee_spools['committees'].rows}, "
+            f"memberships={committee_spools['committee_memberships'].rows}"
+        )
+
+        write_people = n_people > 0 or force_update
+        contact_updates, sheet_states = {}, {}
+        if write_people:
+            current_step = "contacts fetch"
+            # Districts may have new legislators, so re-resolve contacts even if a sheet is unchanged
+            contact_updates, sheet_states, _ = contacts.fetch_updates(force=True)
         else:
-            for k in legislator_updates:
-                print(k)
-                print(legislator_updates[k])
-                print()
-            print("OpenStates response received. Updating snapshot...")
-
-            upsert_people(cur, legislator_updates["people"])
-            update_people_data(
-                cur=cur,
-                people_list=legislator_updates["people"]["openstates_people_id"],
-                people_role_data=legislator_updates["people_roles"],
-                people_office_data=legislator_updates["people_offices"],
-                people_name_data=legislator_updates["people_names"],
-                people_source_data=legislator_updates["people_sources"],
+            log.info("Empty legislator response from OpenStates API, skipping legislators")
+
+        # Record total data fetch time
+        stats["fetch_runtime_seconds"] = time.time() - start_time
+
+        # --- Phase 2: Write (first DB connection) ---
+        db_start = time.time()
+        changed_rows = Counter()
+        log.info("Opening DB transaction (writes)...")
+        with db.get_cursor() as cur:
+            if write_people:
+                current_step = "people write"
+                log.info(
+                    f"Upserting legislators | rows = {n_people}, force_update={force_update}"
+                )
+                changed_rows["people"] += people.upsert_people(cur, spools["people"])
+                changed_rows.update(people.update_people_data(cur, spools))
+                stats["people_updated"] = n_people
+
+            # After people, so memberships of newly seated legislators are kept
+            current_step = "committees write"
+            committee_rows, stats["committee_memberships"] = committees.sync(
+                cur, committee_spools
             )
+            changed_rows.update(committee_rows)
+            stats["committees_updated"] = committee_rows["committee"]
 
+            current_step = "contacts write"
             for chamber, contact_data in contact_updates.items():
-                codex_upsert_contacts(
-                    cur=cur, contact_data=contact_data, chamber=chamber
+                log.info(
+                    f"Refreshing {chamber} contacts | rows = {len(contact_data)}"
+                )
+                contact_rows, merge_report = contacts.update(cur, contact_data, chamber)
+                changed_rows.update(contact_rows)
+                stats["contacts_updated"] += len(contact_data) - len(merge_report["failed"])
+                stats["contacts_failed"] += len(merge_report["failed"])
+                contacts.store_sheet_state(
+                    cur, chamber, sheet_states[chamber], len(merge_report["failed"])
                 )
 
-            print("Legislator snapshot updated")
+            stats["tables_changed"] = {
+                table: rows for table, rows in sorted(changed_rows.items()) if rows
+            }
 
-        conn.commit()
+        stats["db_write_runtime_seconds"] = time.time() - db_start
+        log.info(f"Snapshot rows changed: {stats['tables_changed'] or 'none'}")
 
-    except psycopg2.Error as e:
-        print(f"[SESSION] Database error: {e.pgerror}")
-    except Exception as e:
-        print(f"[SESSION] Operation failed: {str(e)}")
-    finally:
-        if conn is not None:
-            conn.close()
-            print("Database connection closed")
+        # --- Phase 3: Refresh (pooled DB connections, one transaction per view) ---
+        view_start = time.time()
+        current_step = "views refresh"
+        log.info("Refreshing materialized views...")
+        refresh_report = views.refresh(changed_rows, force=force_update)
+        stats["db_view_runtime_seconds"] = time.time() - view_start
+        stats["views_skipped"] = refresh_report["skipped"]
+
+        # --- Phase 4: Log ---
+        stats["runtime_seconds"] = time.time() - start_time
+        log.info(
+            (
+                "Session update complete | "
+                f"people={stats['people_updated']} "
+                f"committees={stats['committees_updated']} "
+                f"memberships={stats['committee_memberships']} "
+                f"contacts={stats['contacts_updated']} "
+                f"contacts_failed={stats['contacts_failed']} "
+                f"fetch_runtime={stats['fetch_runtime_seconds']:2f}s "
+                f"db_write_runtime={stats['db_write_runtime_seconds']:2f}s "
+                f"db_view_runtime={stats['db_view_runtime_seconds']:2f}s "
+                f"views_skipped={len(stats['views_skipped'])} "
+                f"total_runtime={stats['runtime_seconds']:2f}s"
+            )
+        )
+        if not dev_mode:
+            send_session_success_alert(stats)
+        return stats
 
-    print("Session update finished")
+    except Exception as e:
+        stats["runtime_seconds"] = time.time() - start_time
+        log.error(
+            f"Session update failed at step '{current_step}' | "
+            f"runtime={stats['runtime_seconds']:.2f}s | error={str(e)}",
+            exc_info=True,
+        )
+        error_details = f"Step that failed: {current_step}\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+        if not dev_mode:
+            send_pipeline_failure_alert(
+                f"Session update failed after {stats['runtime_seconds']:.2f} seconds",
+                error_details,
+            )
+        raise
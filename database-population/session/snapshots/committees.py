@@ -0,0 +1,275 @@
+"""
+Committee snapshot for the session update: committees and their memberships from OpenStates.
+
+Each chamber's committee pages are spooled per table as they arrive (as in people.py) and loaded
+with one COPY per table, then merged:
+- Committees are matched to snapshot.committee rows by OpenStates ID, or on the first sync by
+  normalized name within the chamber, so committee_id values already referenced by hearings are
+  kept. Rows linked by name keep their curated name; only committees inserted from OpenStates
+  follow OpenStates renames. Unmatched committees are inserted.
+- Memberships are merged on (committee, person): removals deleted, additions inserted, and role
+  changes updated. Members not in snapshot.people yet are skipped.
+
+Committees that changed re-resolve committee_id for upcoming hearings, and the returned row counts
+let the session update refresh committees_mv only when something changed.
+
+The committee columns, committee_membership and committee_alias tables are created by migrate.py,
+which the session update runs at startup.
+"""
+
+from config import config
+from utils.db import CopySpool
+from snapshots import hearings
+import session.sources.committee_openstates_fetch as openstates
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index into credentials.ini for DB schema names
+SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
+
+MEMBERSHIP_TABLE = "committee_membership"
+# Column order of process_committee_json rows (chamber_id appended per chamber)
+COMMITTEE_COLUMNS = ["openstates_committee_id", "name", "webpage_link", "chamber_id"]
+MEMBERSHIP_COLUMNS = ["openstates_committee_id", "openstates_people_id", "role"]
+# OpenStates chamber -> chamber_id used by hearings and snapshot.committee
+CHAMBER_IDS = {"lower": 1, "upper": 2}
+
+
+def fetch_chamber_committees(chamber, spools, max_page=1000, start_page=1):
+    """
+    Input: chamber in CHAMBER_IDS, dictionary of "committees"/"committee_memberships" -> CopySpool,
+    max page number, start page number
+    Output: number of pages fetched (rows are appended to spools page by page)
+    """
+    current_page = start_page - 1
+    num_pages = start_page
+
+    while current_page < num_pages and current_page < max_page:
+        current_page += 1  # increment
+        committee_data, num_pages = openstates.get_committee_data(
+            page=current_page, chamber=chamber
+        )
+        spools["committees"].write(
+            row + [CHAMBER_IDS[chamber]] for row in committee_data["committees"]
+        )
+        spools["committee_memberships"].write(committee_data["committee_memberships"])
+        logger.info(
+            f"Finished fetching page {current_page} of {num_pages} of {chamber} committees"
+        )
+
+    return current_page - start_page + 1
+
+
+def fetch_committee_updates():
+    """
+    Output: dictionary of "committees"/"committee_memberships" -> CopySpool holding every
+    committee in both chambers (always a full sync, so removed memberships can be detected)
+    """
+    logger.info("Fetching committees...")
+    spools = {"committees": CopySpool(), "committee_memberships": CopySpool()}
+    for chamber in CHAMBER_IDS:
+        fetch_chamber_committees(chamber, spools)
+    return spools
+
+
+def merge_committees(cur, spool):
+    """
+    Input: psycopg2 cursor, CopySpool of committee rows
+    Output: number of snapshot.committee rows linked, updated or inserted
+
+    Leaves committee_temp in place; merge_memberships uses it to scope deletions to the
+    committees fetched.
+    """
+    temp_table_query = """
+        DROP TABLE IF EXISTS committee_temp;
+        CREATE TEMPORARY TABLE committee_temp (
+            openstates_committee_id TEXT,
+            name                    TEXT,
+            webpage_link            TEXT,
+            chamber_id              INT
+        )
+    """
+    cur.execute(temp_table_query)
+    spool.copy_to(cur, "committee_temp", COMMITTEE_COLUMNS)
+
+    # First sync: adopt the existing (manually loaded) row with the same normalized name
+    link_query = """
+        UPDATE {schema}.committee c
+        SET openstates_committee_id = m.openstates_committee_id
+        FROM (
+            SELECT DISTINCT ON (t.openstates_committee_id)
+                t.openstates_committee_id,
+                c.committee_id
+            FROM committee_temp t
+            JOIN {schema}.committee c
+                ON c.chamber_id = t.chamber_id
+                AND c.openstates_committee_id IS NULL
+                AND {existing_name} = {incoming_name}
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {schema}.committee c2
+                WHERE c2.openstates_committee_id = t.openstates_committee_id
+            )
+            ORDER BY t.openstates_committee_id, c.committee_id
+        ) m
+        WHERE c.committee_id = m.committee_id
+    """.format(
+        schema=SNAPSHOT_SCHEMA,
+        existing_name=hearings.committee_alias_sql(hearings.committee_name_sql("c.name")),
+        incoming_name=hearings.committee_alias_sql(hearings.committee_name_sql("t.name")),
+    )
+    cur.execute(link_query)
+    linked = cur.rowcount
+
+    # Curated names (rows linked by name) are kept; only names inserted from OpenStates follow it
+    update_query = """
+        UPDATE {schema}.committee c
+        SET
+            name = CASE WHEN c.name_from_openstates THEN t.name ELSE c.name END,
+            webpage_link = COALESCE(t.webpage_link, c.webpage_link)
+        FROM committee_temp t
+        WHERE c.openstates_committee_id = t.openstates_committee_id
+            AND (c.name, c.webpage_link) IS DISTINCT FROM (
+                CASE WHEN c.name_from_openstates THEN t.name ELSE c.name END,
+                COALESCE(t.webpage_link, c.webpage_link)
+            )
+    """
+    cur.execute(update_query.format(schema=SNAPSHOT_SCHEMA))
+    updated = cur.rowcount
+
+    insert_query = """
+        INSERT INTO {schema}.committee
+            (chamber_id, name, webpage_link, openstates_committee_id, name_from_openstates)
+        SELECT DISTINCT ON (t.openstates_committee_id)
+            t.chamber_id,
+            t.name,
+            t.webpage_link,
+            t.openstates_committee_id,
+            TRUE
+        FROM committee_temp t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {schema}.committee c
+            WHERE c.openstates_committee_id = t.openstates_committee_id
+        )
+        ORDER BY t.openstates_committee_id
+    """
+    cur.execute(insert_query.format(schema=SNAPSHOT_SCHEMA))
+    inserted = cur.rowcount
+
+    logger.info(
+        f"Merged committee snapshot: {linked} linked by name, {updated} updated, {inserted} inserted"
+    )
+    return linked + updated + inserted
+
+
+def merge_memberships(cur, spool):
+    """
+    Input: psycopg2 cursor, CopySpool of membership rows (after merge_committees)
+    Output: dictionary of inserted, deleted, updated and skipped row counts
+    """
+    temp_table_query = """
+        DROP TABLE IF EXISTS committee_membership_temp;
+        CREATE TEMPORARY TABLE committee_membership_temp (
+            openstates_committee_id TEXT,
+            openstates_people_id    TEXT,
+            role                    TEXT
+        )
+    """
+    cur.execute(temp_table_query)
+    fetched = spool.copy_to(cur, "committee_membership_temp", MEMBERSHIP_COLUMNS)
+
+    incoming_query = """
+        DROP TABLE IF EXISTS incoming_memberships;
+        CREATE TEMPORARY TABLE incoming_memberships AS
+        SELECT DISTINCT ON (m.openstates_committee_id, m.openstates_people_id)
+            m.openstates_committee_id,
+            m.openstates_people_id,
+            m.role
+        FROM committee_membership_temp m
+        JOIN {schema}.people p ON p.openstates_people_id = m.openstates_people_id
+    """
+    cur.execute(incoming_query.format(schema=SNAPSHOT_SCHEMA))
+    cur.execute("SELECT COUNT(*) FROM incoming_memberships")
+    incoming = cur.fetchone()[0]
+
+    key_match = (
+        "cm.openstates_committee_id = i.openstates_committee_id "
+        "AND cm.openstates_people_id = i.openstates_people_id"
+    )
+
+    delete_query = """
+        DELETE FROM {schema}.{memberships} cm
+        WHERE cm.openstates_committee_id IN (SELECT openstates_committee_id FROM committee_temp)
+            AND NOT EXISTS (
+                SELECT 1 FROM incoming_memberships i
+                WHERE {key_match}
+            )
+    """
+    cur.execute(
+        delete_query.format(
+            schema=SNAPSHOT_SCHEMA, memberships=MEMBERSHIP_TABLE, key_match=key_match
+        )
+    )
+    deleted = cur.rowcount
+
+    update_query = """
+        UPDATE {schema}.{memberships} cm
+        SET role = i.role
+        FROM incoming_memberships i
+        WHERE {key_match}
+            AND cm.role IS DISTINCT FROM i.role
+    """
+    cur.execute(
+        update_query.format(
+            schema=SNAPSHOT_SCHEMA, memberships=MEMBERSHIP_TABLE, key_match=key_match
+        )
+    )
+    updated = cur.rowcount
+
+    insert_query = """
+        INSERT INTO {schema}.{memberships} (openstates_committee_id, openstates_people_id, role)
+        SELECT i.openstates_committee_id, i.openstates_people_id, i.role
+        FROM incoming_memberships i
+        ON CONFLICT (openstates_committee_id, openstates_people_id) DO NOTHING
+    """
+    cur.execute(
+        insert_query.format(schema=SNAPSHOT_SCHEMA, memberships=MEMBERSHIP_TABLE)
+    )
+    inserted = cur.rowcount
+
+    report = {
+        "inserted": inserted,
+        "deleted": deleted,
+        "updated": updated,
+        "skipped": fetched - incoming,
+    }
+    logger.info(
+        (
+            f"Merged committee memberships: {inserted} inserted, {deleted} deleted, "
+            f"{updated} updated, {report['skipped']} skipped (member not in snapshot or duplicate)"
+        )
+    )
+    return report
+
+
+def sync(cur, spools):
+    """
+    Input: psycopg2 cursor, dictionary of spools from fetch_committee_updates
+    Output: tuple of (dictionary of snapshot table -> rows modified, membership merge report)
+    """
+    committee_rows = merge_committees(cur, spools["committees"])
+    membership_report = merge_memberships(cur, spools["committee_memberships"])
+
+    changed_rows = {
+        "committee": committee_rows,
+        MEMBERSHIP_TABLE: membership_report["inserted"]
+        + membership_report["deleted"]
+        + membership_report["updated"],
+    }
+    # New or renamed committees can resolve hearings that had no committee match (reads
+    # committee_alias, created by migration 0002_committee_alias)
+    if committee_rows:
+        changed_rows["hearings"] = hearings.update_hearing_committee_ids(
+            cur, incoming_only=False
+        )
+    return changed_rows, membership_report
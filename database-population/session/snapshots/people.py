@@ -1,10 +1,19 @@
-""" """
+"""
+Legislator snapshot for the session update: people, roles, offices, alternate names and sources
+from OpenStates.
 
+Each API page is written straight into one COPY spool per table as it arrives, instead of
+concatenating a DataFrame per page. The write phase streams each spool into a temp table with a
+single COPY, upserts people, and replaces the detail rows of every legislator fetched.
+"""
+
+import db
 from config import config
-import pandas as pd
-from io import StringIO
-import csv
+from utils.db import CopySpool
 import session.sources.people_openstates_fetch as people
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Index into credentials.ini for DB schema names
 SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
@@ -19,136 +28,97 @@ OFFICE_COLUMNS = ["openstates_people_id", "name", "phone", "address", "classific
 NAME_COLUMNS = ["openstates_people_id", "alt_name"]
 SOURCE_COLUMNS = ["openstates_people_id", "source_url"]
 
-
-def get_buffer(df):
-    buffer = StringIO()
-    df.to_csv(buffer, index=False, header=False, sep="\t", quoting=csv.QUOTE_NONE)
-    buffer.seek(0)
-    return buffer
-
-
-def get_last_update_timestamp(cur):
+# Snapshot table -> columns, in the order returned by process_legislator_json
+TABLE_COLUMNS = {
+    "people": PEOPLE_COLUMNS,
+    "people_roles": ROLE_COLUMNS,
+    "people_offices": OFFICE_COLUMNS,
+    "people_names": NAME_COLUMNS,
+    "people_sources": SOURCE_COLUMNS,
+}
+DETAIL_TABLES = [table for table in TABLE_COLUMNS if table != "people"]
+CHAMBER_FETCHERS = {
+    "assembly": people.get_assembly_data,
+    "senate": people.get_senate_data,
+}
+
+
+def get_last_update_timestamp():
     """
-    Input: psycopg2 cursor
     Output: timestamp string
 
     Retrieves a timestamp of the most recently updated person, or default value
     """
     query = "SELECT MAX(updated_at) FROM {0}.people"
 
-    cur.execute(query.format(SNAPSHOT_SCHEMA))
-    last_updated = cur.fetchone()[0]
+    with db.get_cursor() as cur:
+        cur.execute(query.format(SNAPSHOT_SCHEMA))
+        last_updated = cur.fetchone()[0]
 
-    if last_updated == "" or last_updated == None:
+    if last_updated == "" or last_updated is None:
         last_updated = LAST_UPDATED_DEFAULT
 
     return last_updated
 
 
-def update_df(df, new_data, table_columns):
-    df = pd.concat(
-        [
-            df,
-            pd.DataFrame(data=new_data, columns=table_columns),
-        ],
-        ignore_index=True,
-    )
-    return df
-
-
 def fetch_chamber_update(
-    chamber_name, updated_since=LAST_UPDATED_DEFAULT, max_page=1000, start_page=1
+    chamber_name, spools, updated_since=LAST_UPDATED_DEFAULT, max_page=1000, start_page=1
 ):
-    df_people = pd.DataFrame(columns=PEOPLE_COLUMNS)
-    df_people_roles = pd.DataFrame(columns=ROLE_COLUMNS)
-    df_people_offices = pd.DataFrame(columns=OFFICE_COLUMNS)
-    df_people_names = pd.DataFrame(columns=NAME_COLUMNS)
-    df_people_sources = pd.DataFrame(columns=SOURCE_COLUMNS)
-
+    """
+    Input: chamber name in CHAMBER_FETCHERS, dictionary of table name -> CopySpool, timestamp,
+    max page number, start page number
+    Output: number of pages fetched (rows are appended to spools page by page)
+    """
     current_page = start_page - 1
     num_pages = start_page
 
     while current_page < num_pages and current_page < max_page:
         current_page += 1  # increment
-        if chamber_name == "assembly":
-            chamber_data, num_pages = people.get_assembly_data(
-                page=current_page, updated_since=updated_since
-            )
-            print(
-                f"Finished fetching page {current_page} of {num_pages} of assembly updates"
-            )
-        else:
-            chamber_data, num_pages = people.get_senate_data(
-                page=current_page, updated_since=updated_since
-            )
-            print(
-                f"Finished fetching page {current_page} of {num_pages} of senate updates"
-            )
-
-        # Update dataframes
-        df_people = update_df(
-            df_people, chamber_data["people"], table_columns=PEOPLE_COLUMNS
-        )
-        df_people_roles = update_df(
-            df_people_roles, chamber_data["people_roles"], table_columns=ROLE_COLUMNS
+        chamber_data, num_pages = CHAMBER_FETCHERS[chamber_name](
+            page=current_page, updated_since=updated_since
         )
-        df_people_offices = update_df(
-            df_people_offices,
-            chamber_data["people_offices"],
-            table_columns=OFFICE_COLUMNS,
-        )
-        df_people_names = update_df(
-            df_people_names, chamber_data["people_names"], table_columns=NAME_COLUMNS
-        )
-        df_people_sources = update_df(
-            df_people_sources,
-            chamber_data["people_sources"],
-            table_columns=SOURCE_COLUMNS,
+        for table, spool in spools.items():
+            spool.write(chamber_data[table])
+        logger.info(
+            f"Finished fetching page {current_page} of {num_pages} of {chamber_name} updates"
         )
 
-    return {
-        "people": df_people,
-        "people_roles": df_people_roles,
-        "people_offices": df_people_offices,
-        "people_names": df_people_names,
-        "people_sources": df_people_sources,
-    }
+    return current_page - start_page + 1
 
 
 def fetch_legislator_updates(updated_since=LAST_UPDATED_DEFAULT):
-    # Get each chamber's updates
-    assembly_update = fetch_chamber_update("assembly", updated_since=updated_since)
-
-    senate_update = fetch_chamber_update("senate", updated_since=updated_since)
-
-    # Concat together the updates
-    results = {}
-    for k in assembly_update.keys():
-        curr = pd.concat([assembly_update[k], senate_update[k]])
-        assert type(curr) == pd.DataFrame
-        results[k] = curr
-
-    # Final results
-    return results
+    """
+    Input: timestamp
+    Output: dictionary of table name -> CopySpool holding both chambers' rows
+    """
+    logger.info("Fetching legislator updates...")
+    spools = {table: CopySpool() for table in TABLE_COLUMNS}
+    for chamber_name in CHAMBER_FETCHERS:
+        fetch_chamber_update(chamber_name, spools, updated_since=updated_since)
+    return spools
 
 
-def upsert_people(cur, people):
-    temp_table_name = "people_temp"
+def create_temp_table(cur, table_name):
     temp_table_query = """
-        CREATE TEMPORARY TABLE {0} AS
+        DROP TABLE IF EXISTS {0}_temp;
+        CREATE TEMPORARY TABLE {0}_temp AS
         SELECT *
-        FROM {1}.people
+        FROM {1}.{0}
         WHERE false
-    """  # assumes people table exists
-
-    cur.execute(temp_table_query.format(temp_table_name, SNAPSHOT_SCHEMA))
+    """  # assumes snapshot table exists
+    cur.execute(temp_table_query.format(table_name, SNAPSHOT_SCHEMA))
+    return
 
-    buffer = StringIO()
 
-    people.to_csv(buffer, index=False, header=False, sep="\t", quoting=csv.QUOTE_NONE)
-    buffer.seek(0)
+def upsert_people(cur, spool):
+    """
+    Input: psycopg2 cursor, CopySpool of people rows
+    Output: number of people rows inserted or updated
 
-    cur.copy_from(file=buffer, table="people_temp", sep="\t", columns=PEOPLE_COLUMNS)
+    Leaves people_temp in place; update_people_data uses it to find the legislators fetched.
+    """
+    create_temp_table(cur, "people")
+    spool.copy_to(cur, "people_temp", PEOPLE_COLUMNS)
 
     update_people_query = """
         INSERT INTO {0}.people
@@ -159,26 +129,21 @@ def upsert_people(cur, people):
             party=EXCLUDED.party,
             updated_at=EXCLUDED.updated_at
     """
-    cur.execute(update_people_query.format(SNAPSHOT_SCHEMA, temp_table_name))
-    return
-
-
-def load_from_buffer(cur, df, table_name, table_columns):
-    cur.copy_from(
-        file=get_buffer(df), table=table_name + "_temp", sep="\t", columns=table_columns
-    )
-    return
+    cur.execute(update_people_query.format(SNAPSHOT_SCHEMA, "people_temp"))
+    return cur.rowcount
 
 
-def flush_table(cur, table_name, people_id_string):
+def flush_table(cur, table_name):
+    """
+    Deletes the rows of every legislator in people_temp, returns the number of rows deleted
+    """
     delete_query = """
         DELETE FROM {0}.{1}
-        WHERE openstates_people_id IN ({2})
+        WHERE openstates_people_id IN (SELECT openstates_people_id FROM people_temp)
     """
-    print("Delete old {} snapshot".format(table_name))
-    cur.execute(delete_query.format(SNAPSHOT_SCHEMA, table_name, people_id_string))
-    print(cur.statusmessage)
-    return
+    cur.execute(delete_query.format(SNAPSHOT_SCHEMA, table_name))
+    logger.info(f"Delete old {table_name} snapshot: {cur.statusmessage}")
+    return cur.rowcount
 
 
 def insert_from_temp(cur, table_name, table_columns):
@@ -192,117 +157,22 @@ def insert_from_temp(cur, table_name, table_columns):
             SNAPSHOT_SCHEMA, table_name, ", ".join(table_columns), table_name + "_temp"
         )
     )
-    print(cur.statusmessage)
-    return
+    logger.info(f"Insert new {table_name} snapshot: {cur.statusmessage}")
+    return cur.rowcount
 
 
-def update_people_data(
-    cur,
-    people_list=[],
-    people_role_data=[],
-    people_office_data=[],
-    people_name_data=[],
-    people_source_data=[],
-):
-
-    # Temp table names
-    people_roles = "people_roles"
-    people_offices = "people_offices"
-    people_names = "people_names"
-    people_sources = "people_sources"
-
-    temp_table_query = """
-        CREATE TEMPORARY TABLE {0}_temp AS
-        SELECT *
-        FROM {1}.{0}
-        WHERE false
+def update_people_data(cur, spools):
     """
-    # Create temporary tables
-    print("Creating temporary tables...")
-    cur.execute(temp_table_query.format(people_roles, SNAPSHOT_SCHEMA))
-    print(cur.statusmessage)
-    cur.execute(temp_table_query.format(people_offices, SNAPSHOT_SCHEMA))
-    print(cur.statusmessage)
-    cur.execute(temp_table_query.format(people_names, SNAPSHOT_SCHEMA))
-    print(cur.statusmessage)
-    cur.execute(temp_table_query.format(people_sources, SNAPSHOT_SCHEMA))
-    print(cur.statusmessage)
-
-    # Load new data
-    print("Loading data from buffer...")
-    load_from_buffer(cur, people_role_data, people_roles, ROLE_COLUMNS)
-    load_from_buffer(cur, people_office_data, people_offices, OFFICE_COLUMNS)
-    load_from_buffer(cur, people_name_data, people_names, NAME_COLUMNS)
-    load_from_buffer(cur, people_source_data, people_sources, SOURCE_COLUMNS)
-
-    # Flush old data
-    print("Flushing old data from tables...")
-    people_id_string = "'" + "','".join(people_list) + "'"
-    flush_table(cur, people_roles, people_id_string)
-    flush_table(cur, people_offices, people_id_string)
-    flush_table(cur, people_names, people_id_string)
-    flush_table(cur, people_sources, people_id_string)
-
-    # Insert new rows
-    print("Updating tables with new data")
-    insert_from_temp(cur, people_roles, ROLE_COLUMNS)
-    insert_from_temp(cur, people_offices, OFFICE_COLUMNS)
-    insert_from_temp(cur, people_names, NAME_COLUMNS)
-    insert_from_temp(cur, people_sources, SOURCE_COLUMNS)
-    return
-
+    Input: psycopg2 cursor, dictionary of table name -> CopySpool (after upsert_people)
+    Output: dictionary of snapshot table -> rows modified (deleted + inserted)
 
-# NOTE: committee fetch via OpenStates API is currently unsupported and unlikely to be re-enabled.
-# Kept for reference only. Committee data is managed manually in snapshot.committee.
-# COMMITTEE_COLUMNS = ['openstates_committee_id', 'name', 'webpage_link']
-# MEMBERSHIP_COLUMNS = ['openstates_committee_id', 'openstates_people_id', 'role']
-# def openstates_upsert_committee_data(cur, committees):
-#     temp_table_name = 'committees_temp'
-#     temp_table_query = """
-#         CREATE TEMPORARY TABLE {0} AS
-#         SELECT *
-#         FROM {1}.people
-#         WHERE false
-#     """ # assumes committee table exists?
-
-#     cur.execute(temp_table_query.format(temp_table_name, SNAPSHOT_SCHEMA))
-
-#     buffer = StringIO()
-
-#     committees.to_csv(buffer, index=False, header=False, sep='\t', quoting=csv.QUOTE_NONE)
-#     buffer.seek(0)
-
-#     cur.copy_from(file=buffer, table=temp_table_name, sep='\t', columns=COMMITTEE_COLUMNS)
-
-#     update_committees_query = """
-#         INSERT INTO {0}.committees
-#         SELECT *
-#         FROM {1}
-#         ON CONFLICT (openstates_committee_id) DO UPDATE SET
-#             name=EXCLUDED.name,
-#             party=EXCLUDED.party,
-#             current_role=EXCLUDED.current_role,
-#             updated_at=EXCLUDED.updated_at
-#     """
-#     cur.execute(update_committees_query.format(SNAPSHOT_SCHEMA, temp_table_name))
-#     return
-
-# def fetch_committee_updates(updated_since=LAST_UPDATED_DEFAULT, max_page=1000, start_page=1):
-#     df_committees = pd.DataFrame(columns=COMMITTEE_COLUMNS)
-#     df_committee_membership = pd.DataFrame(columns=MEMBERSHIP_COLUMNS)
-
-#     current_page = start_page - 1
-#     num_pages = start_page
-
-#     while current_page < num_pages and current_page < max_page:
-#         committee_data, num_pages = openstates.get_committee_data(page=current_page, updated_since=updated_since)
-#         print('Finished fetching page {} of {} of committee updates'.format(current_page, num_pages))
-
-#         df_committees = pd.concat([df_committees, pd.DataFrame(data=committee_data['committees'], columns=PEOPLE_COLUMNS)], ignore_index=True)
-#         df_committee_membership = pd.concat([df_committee_membership, pd.DataFrame(data=committee_data['committee_memberships'], columns=ROLE_COLUMNS)], ignore_index=True)
-#         current_page += 1 # increment index
-
-#     return {
-#         'committees': df_committees,
-#         'committee_membership': df_committee_membership
-#     }
+    Replaces roles, offices, alternate names and sources for every legislator fetched.
+    """
+    changed_rows = {}
+    for table in DETAIL_TABLES:
+        create_temp_table(cur, table)
+        spools[table].copy_to(cur, table + "_temp", TABLE_COLUMNS[table])
+        changed_rows[table] = flush_table(cur, table) + insert_from_temp(
+            cur, table, TABLE_COLUMNS[table]
+        )
+    return changed_rows
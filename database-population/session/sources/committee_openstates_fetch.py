@@ -4,10 +4,12 @@ Parameters and functions that directly fetch from Openstates via GET requests.
 Called in session_update.py
 """
 
-import json
 from config import config
 from time import sleep
 import requests
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 # Global constants
@@ -25,6 +27,10 @@ BASE_PARAMS = {
 
 
 def process_committee_json(data, last_update):
+    """
+    Input: JSON data, update timestamp
+    Output: dictionary of strings mapped to nested lists (committee and membership rows)
+    """
     committees = []
     committee_memberships = []
 
@@ -35,44 +41,57 @@ def process_committee_json(data, last_update):
         cmte = []
         cmte.append(next_committee["id"])
         cmte.append(next_committee["name"])
-
-        for next_link in next_committee["links"]:
-            if next_link["note"] == "homepage":
-                cmte.append(next_link["url"])
+        # First homepage link, if any
+        homepages = [
+            next_link["url"]
+            for next_link in next_committee["links"]
+            if next_link["note"] == "homepage"
+        ]
+        cmte.append(homepages[0] if homepages else None)
 
         committees.append(cmte)
 
         for next_member in next_committee["memberships"]:
+            if not next_member.get("person"):
+                logger.warning(
+                    f"No OpenStates ID for {next_member['person_name']} ({next_committee['name']})"
+                )
+                continue
+
             member = []
             member.append(next_committee["id"])
-            if "person" not in next_member.keys():
-                print("NO OPENSTATES ID FOR THIS PERSON")
-                print(next_member["person_name"])
-            else:
-                member.append(next_member["person"]["id"])
-                member.append(next_member["role"])
+            member.append(next_member["person"]["id"])
+            member.append(next_member["role"])
 
             committee_memberships.append(member)
 
     return {"committees": committees, "committee_memberships": committee_memberships}
 
 
-def fetch_committee_batch(page, updated_since):
+def fetch_committee_batch(page, updated_since, chamber=None):
+    """
+    Input: page number, timestamp, chamber ("lower" or "upper", optional)
+    Output: JSON API response, max page number
+    """
     sleep(WAIT_TIME)
 
-    params = BASE_PARAMS
-    params["page"] = page
+    params = {**BASE_PARAMS, "page": page}
+
+    if chamber is not None:
+        params["chamber"] = chamber
 
     if updated_since != None:
         params["updated_since"] = updated_since
 
-    result = requests.get(url=ENDPOINTS["committees"], params=params).json()
+    response = requests.get(url=ENDPOINTS["committees"], params=params)
+    response.raise_for_status()
+    result = response.json()
 
     return result["results"], result["pagination"]["max_page"]
 
 
-def get_committee_data(page=1, updated_since=None):
-    committee_data, num_pages = fetch_committee_batch(page, updated_since)
+def get_committee_data(page=1, updated_since=None, chamber=None):
+    committee_data, num_pages = fetch_committee_batch(page, updated_since, chamber)
     return process_committee_json(committee_data, updated_since), num_pages
 
 
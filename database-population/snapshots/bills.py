@@ -1,4 +1,10 @@
-""" """
+"""
+Upserts OpenStates bill data into the snapshot schema.
+
+Bill eligibility (whether the app is expected to show a bill) is worked out here at write time
+from BILL_ELIGIBILITY in the request config and stored on snapshot.bill with a bill_type prefix
+and an inactive_file flag, so monitor.py checks it with an indexed anti-join.
+"""
 
 import sources.bill_openstates_fetch as openstates
 import db
@@ -6,6 +12,8 @@ import pandas as pd
 from config import config
 from io import StringIO
 import csv
+import hashlib
+import json
 from yaml import safe_load
 import logging
 
@@ -19,6 +27,8 @@ BILL_COLUMNS = REQUEST_CONFIG["BILL_COLUMNS"]
 BILL_ACTION_COLUMNS = REQUEST_CONFIG["BILL_ACTION_COLUMNS"]
 BILL_SPONSOR_COLUMNS = REQUEST_CONFIG["BILL_SPONSOR_COLUMNS"]
 BILL_VOTE_COLUMNS = REQUEST_CONFIG["BILL_VOTE_COLUMNS"]
+BILL_ELIGIBILITY = REQUEST_CONFIG["BILL_ELIGIBILITY"]
+CURRENT_SESSION = config("resources")["session"]
 
 
 def get_buffer(df):
@@ -110,10 +120,29 @@ def fetch_updates(updated_since=LAST_UPDATED_DEFAULT, max_page=1000, start_page=
     }
 
 
+def fetch_bills_by_id(bill_ids):
+    """
+    Input: list of openstates_bill_id values
+    Output: dictionary from string keys to DataFrame values, same shape as fetch_updates
+
+    Re-fetch specific bills (ex: bills the monitor found incomplete in the snapshot)
+    """
+    logger.info(f"Re-fetching {len(bill_ids)} bills by ID...")
+    data = openstates.get_bills_by_id(bill_ids)
+    return {
+        "bills": pd.DataFrame(data=data["bills"], columns=BILL_COLUMNS),
+        "bill_actions": pd.DataFrame(data=data["bill_actions"], columns=BILL_ACTION_COLUMNS),
+        "bill_sponsors": pd.DataFrame(
+            data=data["bill_sponsors"], columns=BILL_SPONSOR_COLUMNS
+        ),
+        "bill_votes": pd.DataFrame(data=data["bill_votes"], columns=BILL_VOTE_COLUMNS),
+    }
+
+
 def upsert_bill_data(cur, bills):
     """
     Input: psycopg2 cursor, array of bill data in Openstates structure
-    Output: None (creates temporary CSV and executes SQL queries)
+    Output: rows inserted or updated (creates temporary CSV and executes SQL queries)
 
     After writing all new bills to a temp CSV file, use temp SQL table to upsert live bills table
     in the SNAPSHOT_SCHEMA
@@ -148,9 +177,10 @@ def upsert_bill_data(cur, bills):
     cur.copy_from(file=buffer, table=temp_table_name, sep="\t", columns=BILL_COLUMNS)
 
     # Insert new rows to bill table from temp and update existing rows with temp values
+    # Explicit columns: the eligibility columns are derived later by update_bill_eligibility
     update_bills_query = """
-        INSERT INTO {0}.bill
-        SELECT *
+        INSERT INTO {0}.bill ({2})
+        SELECT {2}
         FROM {1}
         ON CONFLICT (openstates_bill_id) DO UPDATE SET
             session=EXCLUDED.session,
@@ -163,9 +193,14 @@ def upsert_bill_data(cur, bills):
             last_action_date=EXCLUDED.last_action_date,
             abstract=EXCLUDED.abstract
     """
-    cur.execute(update_bills_query.format(SNAPSHOT_SCHEMA, temp_table_name))
+    cur.execute(
+        update_bills_query.format(
+            SNAPSHOT_SCHEMA, temp_table_name, ", ".join(BILL_COLUMNS)
+        )
+    )
     logger.info("Snapshot upsert main bill table")
     logger.info(cur.statusmessage)
+    return cur.rowcount
 
 
 def openstates_update_bill_data(
@@ -173,7 +208,7 @@ def openstates_update_bill_data(
 ):
     """
     Input: psycopg2 cursor, list of bill IDs, bill actions, bill sponsors, bill votes
-    Output: None (creates temporary CSV and executes SQL queries)
+    Output: dictionary of table name -> rows deleted and inserted (creates temporary CSV and executes SQL queries)
 
     Deletes existing and inserts all actions, sponsors, and votes in Openstates structure for the specified
     list of bill IDs. Creates temporary tables which are filled from CSV (via buffer), then updates live tables
@@ -221,13 +256,12 @@ def openstates_update_bill_data(
         DELETE FROM {0}.{1}
         WHERE openstates_bill_id IN ({2})
     """
+    rows_affected = {}
     logger.info("Delete old actions, sponsor, vote snapshots")
-    cur.execute(delete_query.format(SNAPSHOT_SCHEMA, bill_action, bill_ids_string))
-    logger.info(cur.statusmessage)
-    cur.execute(delete_query.format(SNAPSHOT_SCHEMA, bill_sponsor, bill_ids_string))
-    logger.info(cur.statusmessage)
-    cur.execute(delete_query.format(SNAPSHOT_SCHEMA, bill_vote, bill_ids_string))
-    logger.info(cur.statusmessage)
+    for table in [bill_action, bill_sponsor, bill_vote]:
+        cur.execute(delete_query.format(SNAPSHOT_SCHEMA, table, bill_ids_string))
+        logger.info(cur.statusmessage)
+        rows_affected[table] = cur.rowcount
 
     # Copy new data to live tables
     update_data_query = """
@@ -236,27 +270,102 @@ def openstates_update_bill_data(
         FROM {2}
     """
     logger.info("Update actions, sponsor, vote snapshots with new data")
-    cur.execute(
-        update_data_query.format(SNAPSHOT_SCHEMA, bill_action, bill_action + "_temp")
-    )
-    logger.info(cur.statusmessage)
-    cur.execute(
-        update_data_query.format(SNAPSHOT_SCHEMA, bill_sponsor, bill_sponsor + "_temp")
-    )
-    logger.info(cur.statusmessage)
-    cur.execute(
-        update_data_query.format(SNAPSHOT_SCHEMA, bill_vote, bill_vote + "_temp")
-    )
-    logger.info(cur.statusmessage)
+    for table in [bill_action, bill_sponsor, bill_vote]:
+        cur.execute(update_data_query.format(SNAPSHOT_SCHEMA, table, table + "_temp"))
+        logger.info(cur.statusmessage)
+        rows_affected[table] += cur.rowcount
+    return rows_affected
+
+
+def eligibility_rules_digest(rules=BILL_ELIGIBILITY, session=CURRENT_SESSION):
+    """
+    Output: short digest of the eligibility rules and session, stored per bill so a rule change
+    re-evaluates every bill
+    """
+    payload = json.dumps({"session": session, "rules": rules}, sort_keys=True)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def update_bill_eligibility(cur, bill_ids, rules=BILL_ELIGIBILITY):
+    """
+    Input: psycopg2 cursor, bill IDs written this run, eligibility rules
+    Output: number of bills whose eligibility fields changed
+
+    Sets bill_type, inactive_file and is_eligible for the given bills, and for any bill last
+    evaluated under different rules (including bills written before these columns existed).
+    The columns and bill_eligible_idx are added by migrate.py.
+    """
+    eligibility_query = """
+        UPDATE {0}.bill b
+        SET bill_type         = e.bill_type,
+            inactive_file     = e.inactive_file,
+            is_eligible       = e.is_eligible,
+            eligibility_rules = %(digest)s
+        FROM (
+            SELECT
+                t.openstates_bill_id,
+                t.bill_type,
+                COALESCE(t.inactive_file, FALSE) AS inactive_file,
+                -- NULL inputs (no actions yet, bill_num without a type prefix) are ineligible,
+                -- as the old view filter dropped them; is_eligible is NOT NULL
+                COALESCE(
+                    t.session = %(session)s
+                    AND t.bill_type IS NOT NULL
+                    AND t.bill_type <> ALL(%(excluded_bill_types)s)
+                    AND (
+                        COALESCE(t.last_action_date >= %(min_last_action_date)s, FALSE)
+                        OR COALESCE(t.inactive_file, FALSE)
+                        OR COALESCE(t.bill_num = ANY(%(always_include)s), FALSE)
+                    ),
+                    FALSE
+                ) AS is_eligible
+            FROM (
+                SELECT
+                    b2.openstates_bill_id,
+                    b2.session,
+                    b2.bill_num,
+                    b2.last_action_date,
+                    upper(substring(b2.bill_num FROM '^[A-Za-z]+')) AS bill_type,
+                    EXISTS (
+                        SELECT 1 FROM {0}.bill_action a
+                        WHERE a.openstates_bill_id = b2.openstates_bill_id
+                        AND a.description ILIKE %(inactive_file_pattern)s
+                    ) AS inactive_file
+                FROM {0}.bill b2
+                WHERE b2.openstates_bill_id = ANY(%(bill_ids)s)
+                OR b2.eligibility_rules IS DISTINCT FROM %(digest)s
+            ) t
+        ) e
+        WHERE b.openstates_bill_id = e.openstates_bill_id
+        AND (b.bill_type, b.inactive_file, b.is_eligible, b.eligibility_rules)
+            IS DISTINCT FROM (e.bill_type, e.inactive_file, e.is_eligible, %(digest)s)
+    """
+    params = {
+        "digest": eligibility_rules_digest(rules),
+        "session": CURRENT_SESSION,
+        "excluded_bill_types": list(rules["excluded_bill_types"]),
+        "min_last_action_date": rules["min_last_action_date"],
+        "always_include": list(rules["always_include"]),
+        "inactive_file_pattern": f"%{rules['inactive_file_pattern']}%",
+        "bill_ids": list(bill_ids),
+    }
+    cur.execute(eligibility_query.format(SNAPSHOT_SCHEMA), params)
+    logger.info(f"Updated bill eligibility: {cur.rowcount} rows affected")
+    return cur.rowcount
 
 
 def upsert(cur, response):
-    upsert_bill_data(cur, response["bills"])
-    openstates_update_bill_data(
+    """
+    Output: dictionary of snapshot table -> rows modified
+    """
+    bill_rows = upsert_bill_data(cur, response["bills"])
+    rows_affected = openstates_update_bill_data(
         cur,
         response["bills"]["openstates_bill_id"],
         response["bill_actions"],
         response["bill_sponsors"],
         response["bill_votes"],
     )
-    return
+    rows_affected["bill"] = bill_rows
+    update_bill_eligibility(cur, response["bills"]["openstates_bill_id"])
+    return rows_affected
@@ -1,7 +1,13 @@
 from config import config
-from io import StringIO
-import csv
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import db
+import json
+import psycopg2
+import re
+import time
 import sources.capitol_codex_scraper as codex
+from utils.db import copy_rows, get_state, set_state
 from yaml import safe_load
 import logging
 
@@ -11,17 +17,166 @@ logger = logging.getLogger(__name__)
 SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
 REQUEST_CONFIG = safe_load(open(config("resources")["request_config"]))
 CONTACTS_COLUMNS = REQUEST_CONFIG["CONTACTS_COLUMNS"]
+# Staging column order (district_number is joined to people_roles for openstates_people_id)
+STAGE_COLUMNS = codex.CONTACT_COLUMNS
+COPY_LINE_PATTERN = re.compile(r"line (\d+)")
+# Rejected rows tolerated per chamber before the COPY error is raised
+MAX_FAILED_ROWS = 20
+# A contact row's identity in people_contacts (indexed by people_contacts_merge_idx, see migrate.py)
+MERGE_KEY = ["openstates_people_id", "issue_area", "staffer_contact", "staffer_type"]
+# people_roles.org_classification -> Codex sheet
+SHEET_CHAMBERS = {"lower": "asm", "upper": "sen"}
+SHEET_STATE_KEY = "codex_sheet:{0}"
 
 
-def fetch_updates():
+def load_sheet_states():
+    """
+    Output: dictionary of chamber -> sheet state (sha256, etag, last_modified) stored by the last
+    committed contacts write, empty for chambers never written and for chambers whose last write
+    had rows that failed to stage (so the sheet is re-processed and those rows retried)
+    """
+    keys = {chamber: SHEET_STATE_KEY.format(chamber) for chamber in SHEET_CHAMBERS}
+    with db.get_cursor() as cur:
+        stored = get_state(cur, keys.values())
+
+    states = {}
+    for chamber, key in keys.items():
+        value, failed = stored.get(key, ("{}", 0))
+        if failed:
+            logger.info(f"[{chamber}] {failed} contact rows failed last write, re-processing sheet")
+        states[chamber] = {} if failed else json.loads(value)
+    return states
+
+
+def fetch_sheet(chamber, previous):
+    """
+    Input: chamber, sheet state from the last committed write (empty to force a re-process)
+    Output: tuple of (tidy contacts DataFrame or None if the sheet is unchanged, sheet state,
+    dictionary of download/extract seconds)
+    """
+    sheet = SHEET_CHAMBERS[chamber]
+    timings = {"download": 0.0, "extract": 0.0}
+
+    start = time.perf_counter()
+    content, etag, last_modified = codex.download_sheet(
+        sheet, previous.get("etag"), previous.get("last_modified")
+    )
+    timings["download"] = time.perf_counter() - start
+    if content is None:
+        logger.info(f"[{chamber}] Codex sheet not modified since last write, skipping")
+        return None, None, timings
+
+    digest = codex.sheet_digest(content)
+    if digest == previous.get("sha256"):
+        logger.info(f"[{chamber}] Codex sheet unchanged, skipping | digest={digest[:12]}")
+        return None, None, timings
+
+    start = time.perf_counter()
+    contact_data = codex.extract_contacts(sheet, content)
+    timings["extract"] = time.perf_counter() - start
+    return contact_data, {"sha256": digest, "etag": etag, "last_modified": last_modified}, timings
+
+
+def fetch_updates(force=False):
+    """
+    Input: whether to ignore the cached sheet state and re-process every sheet
+    Output: tuple of (dictionary of chamber -> tidy contacts DataFrame for changed sheets only,
+    dictionary of chamber -> sheet state to store once the write commits,
+    dictionary of chamber -> download/extract seconds)
+
+    Both chambers' sheets are fetched concurrently. Each is downloaded with a conditional GET and
+    the raw CSV bytes hashed; a chamber whose sheet is not modified (304) or hashes the same as the
+    last written one is left out of the updates.
+    """
     logger.info("Fetching Capitol Codex...")
-    assembly_update = codex.extract_contacts("asm")
-    senate_update = codex.extract_contacts("sen")
+    cached = {} if force else load_sheet_states()
+
+    with ThreadPoolExecutor(max_workers=len(SHEET_CHAMBERS)) as executor:
+        futures = {
+            chamber: executor.submit(fetch_sheet, chamber, cached.get(chamber, {}))
+            for chamber in SHEET_CHAMBERS
+        }
+        results = {chamber: future.result() for chamber, future in futures.items()}
 
-    return {"lower": assembly_update, "upper": senate_update}
+    updates, states, timings = {}, {}, {}
+    for chamber, (contact_data, state, chamber_timings) in results.items():
+        timings[chamber] = chamber_timings
+        if contact_data is not None:
+            updates[chamber] = contact_data
+            states[chamber] = state
+    return updates, states, timings
+
+
+def store_sheet_state(cur, chamber, state, failed=0):
+    """
+    Input: psycopg2 cursor, chamber, sheet state from fetch_updates, number of rows that failed to stage
+    Output: None (written in the contacts write transaction, so the cache only advances on commit)
+
+    A non-zero failed count makes the next run re-process the sheet even if it is unchanged.
+    """
+    set_state(cur, SHEET_STATE_KEY.format(chamber), json.dumps(state), failed)
+    return
+
+
+def copy_error_line(error):
+    """
+    Input: psycopg2 error raised by COPY
+    Output: 1-based input line number from the error context (ex: "COPY contacts_temp, line 3"),
+    or None if absent
+    """
+    context = getattr(error.diag, "context", None) or ""
+    match = COPY_LINE_PATTERN.search(context)
+    return int(match.group(1)) if match else None
+
+
+def stage_contacts(cur, temp_table_name, contact_data, chamber):
+    """
+    Input: psycopg2 cursor, staging table name, tidy contacts DataFrame, chamber
+    Output: tuple of (dictionary of issue area -> rows staged, list of rows that failed to stage)
+
+    Streams every issue for the chamber through one COPY. A row the database rejects is logged with
+    its issue, district and contact, left out, and the COPY is retried from a savepoint.
+    """
+    rows = list(contact_data[STAGE_COLUMNS].itertuples(index=False, name=None))
+    failed = []
+    while True:
+        cur.execute("SAVEPOINT stage_contacts")
+        try:
+            copy_rows(cur, temp_table_name, STAGE_COLUMNS, rows)
+            cur.execute("RELEASE SAVEPOINT stage_contacts")
+            break
+        except psycopg2.Error as e:
+            cur.execute("ROLLBACK TO SAVEPOINT stage_contacts")
+            line = copy_error_line(e)
+            if line is None or line > len(rows) or len(failed) >= MAX_FAILED_ROWS:
+                raise
+            row = dict(zip(STAGE_COLUMNS, rows.pop(line - 1)))
+            row["error"] = e.diag.message_primary
+            failed.append(row)
+            logger.error(
+                (
+                    f"[CONTACTS] [{chamber}] Skipped row {line}: issue={row['issue_area']}, "
+                    f"district={row['district_number']}, contact={row['staffer_contact']!r} | "
+                    f"{row['error']}"
+                )
+            )
+
+    issue_counts = Counter(row[STAGE_COLUMNS.index("issue_area")] for row in rows)
+    for issue, count in issue_counts.items():
+        logger.debug(f"Staged {count} rows for {issue}")
+    logger.info(
+        f"[{chamber}] Staged snapshot: {len(rows)} rows across {len(issue_counts)} issues, "
+        f"{len(failed)} failed"
+    )
+    return dict(issue_counts), failed
 
 
 def update(cur, contact_data, chamber):
+    """
+    Input: psycopg2 cursor, tidy contacts DataFrame from codex.extract_contacts, chamber
+    Output: tuple of (dictionary of snapshot table -> rows modified, merge report with inserted,
+    deleted, updated and unchanged counts and the rows that failed to stage)
+    """
     temp_table_name = "contacts_temp"
     temp_table_query = """
         DROP TABLE IF EXISTS {0};
@@ -36,57 +191,31 @@ def update(cur, contact_data, chamber):
 
     cur.execute(temp_table_query.format(temp_table_name, SNAPSHOT_SCHEMA))
 
-    # Insert contacts collected for each issue to the staging table
-    for issue, df in contact_data.items():
-        logger.debug(f"Issue: {issue}")
-        if df.empty:
-            logger.debug(f"Skipping {issue} (empty DataFrame)")
-            continue
+    # Insert contacts for every issue to the staging table in one COPY
+    _, failed = stage_contacts(cur, temp_table_name, contact_data, chamber)
 
-        try:
-            buffer = StringIO()
-
-            df.to_csv(
-                buffer,
-                index=False,
-                header=False,
-                sep="\t",
-                quoting=csv.QUOTE_NONE,
-                escapechar="\\",
-            )
-            buffer.seek(0)
-
-            cur.copy_expert(
-                sql="COPY {0} FROM STDIN WITH (FORMAT CSV, DELIMITER E'\t')".format(
-                    temp_table_name
-                ),
-                file=buffer,
-            )
-            logger.debug(f"Staged {len(df)} rows for {issue}")
-        except Exception as e:
-            logger.error(f"[CONTACTS] ERROR processing {issue}: {str(e)}")
-        finally:
-            buffer.close()
+    merge_report = merge_contacts(cur, temp_table_name, chamber)
+    merge_report["failed"] = failed
+    # Rows modified per table, for selective view refresh
+    changed = merge_report["inserted"] + merge_report["deleted"] + merge_report["updated"]
+    return {"people_contacts": changed}, merge_report
 
-    logger.info(f"[{chamber}] Staged snapshot")
 
-    flush_query = """
-        DELETE FROM {0}.people_contacts pc
-        USING {0}.people_roles pr, {1} t
-        WHERE pc.openstates_people_id = pr.openstates_people_id
-            AND t.district_number = pr.district
-            AND pr.org_classification='{2}'
+def merge_contacts(cur, temp_table_name, chamber):
     """
-    cur.execute(flush_query.format(SNAPSHOT_SCHEMA, temp_table_name, chamber))
-    # Flush snapshot
-    logger.info(f"[{chamber}] Flushing snapshot: {cur.rowcount} rows affected")
+    Input: psycopg2 cursor, staging table name, chamber (people_roles.org_classification)
+    Output: dictionary of inserted, deleted, updated and unchanged row counts
 
-    # Final bulk insert
-    logger.info("Inserting from temp to final table...")
+    Keyed merge of staged contacts into people_contacts on MERGE_KEY, for legislators whose district
+    is in the staging table: removals are deleted, additions inserted, and rows already present are
+    left alone (only generated_email is updated if it changed).
+    """
+    key_match = " AND ".join(f"pc.{column} = i.{column}" for column in MERGE_KEY)
 
-    insert_query = """
-        INSERT INTO {0}.people_contacts (openstates_people_id, staffer_contact, generated_email, issue_area, staffer_type)
-        SELECT 
+    incoming_query = """
+        DROP TABLE IF EXISTS incoming_contacts;
+        CREATE TEMPORARY TABLE incoming_contacts AS
+        SELECT DISTINCT ON ({key})
             pr.openstates_people_id,
             t.staffer_contact,
             t.generated_email,
@@ -95,6 +224,67 @@ def update(cur, contact_data, chamber):
         FROM {1} t
         JOIN {0}.people_roles pr ON t.district_number = pr.district AND pr.org_classification='{2}'
     """
-    cur.execute(insert_query.format(SNAPSHOT_SCHEMA, temp_table_name, chamber))
-    logger.info(f"Updated people_contacts snapshot: {cur.rowcount} rows affected")
-    return
+    cur.execute(
+        incoming_query.format(
+            SNAPSHOT_SCHEMA, temp_table_name, chamber, key=", ".join(MERGE_KEY)
+        )
+    )
+    cur.execute("SELECT COUNT(*) FROM incoming_contacts")
+    incoming = cur.fetchone()[0]
+
+    delete_query = """
+        DELETE FROM {0}.people_contacts pc
+        USING {0}.people_roles pr
+        WHERE pc.openstates_people_id = pr.openstates_people_id
+            AND pr.org_classification='{2}'
+            AND pr.district IN (SELECT district_number FROM {1})
+            AND NOT EXISTS (
+                SELECT 1 FROM incoming_contacts i
+                WHERE {key_match}
+            )
+    """
+    cur.execute(
+        delete_query.format(SNAPSHOT_SCHEMA, temp_table_name, chamber, key_match=key_match)
+    )
+    deleted = cur.rowcount
+
+    update_query = """
+        UPDATE {0}.people_contacts pc
+        SET generated_email = i.generated_email
+        FROM incoming_contacts i
+        WHERE {key_match}
+            AND pc.generated_email IS DISTINCT FROM i.generated_email
+    """
+    cur.execute(update_query.format(SNAPSHOT_SCHEMA, key_match=key_match))
+    updated = cur.rowcount
+
+    insert_query = """
+        INSERT INTO {0}.people_contacts (openstates_people_id, staffer_contact, generated_email, issue_area, staffer_type)
+        SELECT
+            i.openstates_people_id,
+            i.staffer_contact,
+            i.generated_email,
+            i.issue_area,
+            i.staffer_type
+        FROM incoming_contacts i
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {0}.people_contacts pc
+            WHERE {key_match}
+        )
+    """
+    cur.execute(insert_query.format(SNAPSHOT_SCHEMA, key_match=key_match))
+    inserted = cur.rowcount
+
+    report = {
+        "inserted": inserted,
+        "deleted": deleted,
+        "updated": updated,
+        "unchanged": incoming - inserted - updated,
+    }
+    logger.info(
+        (
+            f"[{chamber}] Merged people_contacts snapshot: {inserted} inserted, {deleted} deleted, "
+            f"{updated} updated, {report['unchanged']} unchanged"
+        )
+    )
+    return report
@@ -7,18 +7,32 @@ Upserts source hearing-related data into the snapshot schema.
    data so that child records (hearing_bills, hearing_deadlines) can be preserved
    for audit purposes. Past hearings are not touched. Also logs a per-hearing
    reason derived from the notes field for diagnostics.
-4. Derive committee_id values from hearing name field.
+4. Derive committee_id values from hearing name field via normalized committee aliases.
 5. Derive hearing chamber_id values from hearing name field.
-6. Stage incoming hearing-bill associations in a temporary table
+6. Resolve bill numbers to openstates_bill_id against a preloaded map of current-session
+   bills, then stage incoming hearing-bill associations in a temporary table
 7. Upsert hearing_bills based on diff between DB and staged incoming associations
 8. Hard-delete hearing_bills rows if not included in the incoming associations
 9. Log dropped bills that could not be matched for diagnostics.
-10. Sync deadlines, recalculating stale ones for rescheduled hearings
+10. Sync deadlines for hearings inserted or changed in this run (or every hearing on a full sync)
+
+Hearings carry a hearing_hash of their natural key (chamber_id, date, name, time_verbatim,
+location, room), computed by the scraper, so hearing-bill joins use a single indexed column.
+Staged hearing-bill rows also carry their openstates_bill_id, so the bill side is a key lookup
+instead of a join against the bill table.
+
+A digest of the scraped schedule is stored after each write so an identical scrape can skip
+the whole write phase.
 """
 
 import db
+import hashlib
+import json
 import sources.schedule_asm_fetch as assembly
 import sources.schedule_sen_fetch as senate
+from utils import normalize
+from utils.db import copy_rows, get_state, set_state
+from utils.scraping import canonical_bill_number
 from config import config
 import logging
 
@@ -32,6 +46,37 @@ HEARINGS_TABLE = "hearings"
 HEARING_BILLS_TABLE = "hearing_bills"
 INCOMING_HEARINGS_TABLE = "incoming_" + HEARINGS_TABLE
 INCOMING_HEARING_BILLS_TABLE = "incoming_" + HEARING_BILLS_TABLE
+# Column order matches the tuples built by utils.scraping.normalize_scraper_results;
+# openstates_bill_id is appended by resolve_bill_ids
+INCOMING_HEARINGS_COLUMNS = [
+    "chamber_id",
+    "name",
+    "date",
+    "time_verbatim",
+    "time_normalized",
+    "is_allday",
+    "location",
+    "room",
+    "notes",
+    "hearing_hash",
+]
+INCOMING_HEARING_BILLS_COLUMNS = [
+    "chamber_id",
+    "event_date",
+    "event_text",
+    "event_time_verbatim",
+    "event_location",
+    "event_room",
+    "bill_number",
+    "file_order",
+    "footnote",
+    "footnote_symbol",
+    "hearing_hash",
+    "openstates_bill_id",
+]
+COMMITTEE_ALIAS_TABLE = "committee_alias"
+
+SCHEDULE_DIGEST_KEY = "hearing_schedule_digest"
 
 
 def fetch_updates():
@@ -45,6 +90,7 @@ def fetch_updates():
     logger.info(
         f"[SEN] {len(senate_hearings)} hearings; {len(senate_bills)} bills retrieved"
     )
+    logger.info(f"Date/time normalization cache: {normalize.cache_stats()}")
 
     # join sets before returning
     final_hearings = assembly_hearings | senate_hearings
@@ -53,6 +99,44 @@ def fetch_updates():
     return final_hearings, final_bills
 
 
+def schedule_digest(hearings_data, hearing_bills_data):
+    """
+    Input: sets of hearing tuples and hearing-bill tuples from fetch_updates
+    Output: hex digest string
+
+    Canonical and order-independent: each tuple is serialized on its own line and the lines
+    are sorted before hashing.
+    """
+    digest = hashlib.sha256()
+    for label, rows in [("hearings", hearings_data), ("bills", hearing_bills_data)]:
+        lines = sorted(json.dumps(list(row), default=str) for row in rows)
+        digest.update(f"{label}:{len(lines)}\n".encode("utf-8"))
+        for line in lines:
+            digest.update(line.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def schedule_unchanged(cur, digest, bills_written=False):
+    """
+    Input: psycopg2 cursor, digest of the incoming schedule, whether bills were written this run
+    Output: True if the hearing write phase can be skipped
+
+    Hearing-bill rows that were dropped last time only need a retry if new bills arrived
+    since, so a matching digest with dropped rows still counts as unchanged when no bills were written.
+    """
+    stored = get_state(cur, [SCHEDULE_DIGEST_KEY])
+    if SCHEDULE_DIGEST_KEY not in stored:
+        return False
+    stored_digest, dropped = stored[SCHEDULE_DIGEST_KEY]
+    return stored_digest == digest and (dropped == 0 or not bills_written)
+
+
+def store_schedule_digest(cur, digest, dropped):
+    set_state(cur, SCHEDULE_DIGEST_KEY, digest, dropped)
+    logger.info(f"Stored hearing schedule digest {digest[:12]} (dropped={dropped})")
+    return
+
+
 def stage_incoming_hearings(cur, hearings_data):
 
     create_query = """
@@ -65,22 +149,16 @@ def stage_incoming_hearings(cur, hearings_data):
             is_allday       BOOLEAN,
             location        TEXT,
             room            TEXT,
-            notes           TEXT
+            notes           TEXT,
+            hearing_hash    TEXT
         )
     """.format(stage=INCOMING_HEARINGS_TABLE)
     cur.execute(create_query)
 
-    insert_query = """
-        INSERT INTO {stage} (
-            chamber_id, name, date, time_verbatim, time_normalized, is_allday,
-            location, room, notes
-        )
-        VALUES (%s, %s, %s::DATE, %s, %s::TIME, %s, %s, %s, %s)
-    """.format(stage=INCOMING_HEARINGS_TABLE)
-
-    cur.executemany(insert_query, hearings_data)
-
-    logger.info(f"Staged incoming hearings: {cur.rowcount} rows affected")
+    row_count = copy_rows(
+        cur, INCOMING_HEARINGS_TABLE, INCOMING_HEARINGS_COLUMNS, hearings_data
+    )
+    logger.info(f"Staged incoming hearings: {row_count} rows affected")
     return
 
 
@@ -88,10 +166,10 @@ def upsert_hearings(cur):
     upsert_query = """
         INSERT INTO {schema}.{hearings} (
             chamber_id, name, date, time_verbatim, time_normalized, is_allday, 
-            location, room, notes
+            location, room, notes, hearing_hash
         )
         SELECT chamber_id, name, date, time_verbatim, time_normalized, is_allday, 
-               location, room, notes
+               location, room, notes, hearing_hash
         FROM {stage}
         ON CONFLICT (chamber_id, name, date, time_verbatim) DO UPDATE SET
             time_verbatim   = EXCLUDED.time_verbatim,
@@ -100,6 +178,7 @@ def upsert_hearings(cur):
             location        = EXCLUDED.location,
             room            = EXCLUDED.room,
             notes           = EXCLUDED.notes,
+            hearing_hash    = EXCLUDED.hearing_hash,
         canceled_at         = CASE
             WHEN (
                 EXCLUDED.time_verbatim   IS DISTINCT FROM {schema}.{hearings}.time_verbatim OR
@@ -111,13 +190,24 @@ def upsert_hearings(cur):
             ) THEN NULL
             ELSE {schema}.{hearings}.canceled_at
         END
+        -- Leave unchanged rows alone so RETURNING only reports inserts and real changes
+        WHERE (
+            EXCLUDED.time_normalized IS DISTINCT FROM {schema}.{hearings}.time_normalized OR
+            EXCLUDED.is_allday       IS DISTINCT FROM {schema}.{hearings}.is_allday OR
+            EXCLUDED.location        IS DISTINCT FROM {schema}.{hearings}.location OR
+            EXCLUDED.room            IS DISTINCT FROM {schema}.{hearings}.room OR
+            EXCLUDED.notes           IS DISTINCT FROM {schema}.{hearings}.notes OR
+            EXCLUDED.hearing_hash    IS DISTINCT FROM {schema}.{hearings}.hearing_hash
+        )
+        RETURNING hearing_id
     """.format(
         schema=SNAPSHOT_SCHEMA, hearings=HEARINGS_TABLE, stage=INCOMING_HEARINGS_TABLE
     )
 
     cur.execute(upsert_query)
-    logger.info(f"Upserted hearings: {cur.rowcount} affected")
-    return
+    changed_ids = [row[0] for row in cur.fetchall()]
+    logger.info(f"Upserted hearings: {len(changed_ids)} inserted or changed")
+    return changed_ids
 
 
 # Note patterns expected from source data. Used for logging only — control
@@ -144,48 +234,65 @@ def _classify_cancellation_reason(notes: str | None) -> str:
 
 
 def cancel_missing_hearings(cur):
-    fetch_query = """
-        SELECT h.hearing_id, h.name, h.date, h.chamber_id, s.notes
-        FROM {schema}.{hearings} h
-        LEFT JOIN {stage} s
-            ON s.chamber_id       = h.chamber_id
-            AND s.name            = h.name
-            AND s.date            = h.date
-            AND s.time_normalized IS NOT DISTINCT FROM h.time_normalized -- handles null matching
-        WHERE h.canceled_at IS NULL
-        AND (
-            h.date > CURRENT_DATE OR 
-            (
-                h.date = CURRENT_DATE AND 
-                h.time_normalized > CURRENT_TIME AND
-                NOT h.is_allday
+    """
+    Soft-deletes upcoming hearings that are absent from the incoming data in a single
+    UPDATE ... RETURNING, so the rows logged are exactly the rows canceled.
+
+    The returned notes come from an incoming hearing by the same committee on the same day
+    (ex: "hearing moved to 1:30 p.m."), falling back to the canceled hearing's last notes.
+    """
+    cancel_query = """
+        WITH canceled AS (
+            UPDATE {schema}.{hearings} h
+            SET canceled_at = CURRENT_TIMESTAMP
+            WHERE h.canceled_at IS NULL
+            AND (
+                h.date > CURRENT_DATE OR 
+                (
+                    h.date = CURRENT_DATE AND 
+                    h.time_normalized > CURRENT_TIME AND
+                    NOT h.is_allday
+                    )
                 )
+            AND NOT EXISTS (
+                SELECT 1 FROM {stage} s
+                WHERE s.chamber_id = h.chamber_id
+                AND s.name         = h.name
+                AND s.date         = h.date
+                AND s.time_normalized IS NOT DISTINCT FROM h.time_normalized -- handles null matching
             )
-        AND NOT EXISTS (
-            SELECT 1 FROM {stage} incoming
-            WHERE incoming.chamber_id = h.chamber_id
-            AND incoming.name         = h.name
-            AND incoming.date         = h.date
-            AND incoming.time_normalized IS NOT DISTINCT FROM h.time_normalized
+            RETURNING h.hearing_id, h.name, h.date, h.chamber_id, h.notes
         )
+        SELECT c.hearing_id, c.name, c.date, c.chamber_id, COALESCE(s.notes, c.notes)
+        FROM canceled c
+        LEFT JOIN LATERAL (
+            SELECT incoming.notes
+            FROM {stage} incoming
+            WHERE incoming.chamber_id = c.chamber_id
+            AND incoming.name         = c.name
+            AND incoming.date         = c.date
+            AND incoming.notes <> ''
+            -- Deterministic when several incoming hearings match: earliest time, then natural key
+            ORDER BY incoming.time_normalized NULLS LAST, incoming.hearing_hash
+            LIMIT 1
+        ) s ON TRUE
     """.format(
         schema=SNAPSHOT_SCHEMA, hearings=HEARINGS_TABLE, stage=INCOMING_HEARINGS_TABLE
     )
 
-    cur.execute(fetch_query)
-
-    to_cancel = cur.fetchall()
+    cur.execute(cancel_query)
+    canceled = cur.fetchall()
 
-    if not to_cancel:
+    if not canceled:
         logger.info("No hearings to cancel")
-        return
+        return 0
 
-    # Log each cancellation with a reason before writing
-    for hearing_id, name, date, chamber_id, notes in to_cancel:
+    # Log each cancellation with a reason
+    for hearing_id, name, date, chamber_id, notes in canceled:
         reason = _classify_cancellation_reason(notes)
         logger.info(
             (
-                f"    Canceling hearing_id={hearing_id} "
+                f"    Canceled hearing_id={hearing_id} "
                 f"name='{name}' "
                 f"date={date} "
                 f"chamber={chamber_id} | "
@@ -193,45 +300,170 @@ def cancel_missing_hearings(cur):
             )
         )
 
-    # Add value to canceled_at
-    cancel_query = """
-        UPDATE {schema}.{hearings} h
-        SET canceled_at = CURRENT_TIMESTAMP
-        WHERE h.canceled_at IS NULL
-        AND h.date >= CURRENT_DATE
-        AND NOT EXISTS (
-            SELECT 1 FROM {stage} s
-            WHERE s.chamber_id = h.chamber_id
-            AND s.name         = h.name
-            AND s.date         = h.date
-            AND s.time_normalized IS NOT DISTINCT FROM h.time_normalized
-        )
+    logger.info(
+        f"Canceled hearings missing from incoming data: {len(canceled)} affected"
+    )
+    return len(canceled)
+
+
+def committee_name_sql(column):
+    # Lowercase, "&" -> "and", punctuation and repeated whitespace collapsed to one space
+    return (
+        "btrim(regexp_replace(replace(lower({0}), '&', ' and '), '[^a-z0-9]+', ' ', 'g'))"
+    ).format(column)
+
+
+def committee_alias_sql(normalized):
+    # Drops "(assembly|senate) (standing|select) committee on" prefixes and a " committee" suffix
+    return (
+        "regexp_replace(regexp_replace({0}, "
+        "'^(assembly |senate )?(standing |select )?committee on ', ''), ' committee$', '')"
+    ).format(normalized)
+
+
+def refresh_committee_aliases(cur):
+    """
+    Brings the derived rows of committee_alias in line with snapshot.committee: the normalized name
+    and its prefix/suffix-stripped form. Aliases shared by more than one committee in a chamber
+    are left out, and manual aliases (source = 'manual') always win.
+
+    Only stale derived aliases (committee renamed, removed or now ambiguous) are deleted and only
+    missing ones inserted, so a run with no committee changes writes nothing.
+    """
+    derived_query = """
+        SELECT n.chamber_id, a.alias, MIN(n.committee_id) AS committee_id
+        FROM (
+            SELECT chamber_id, committee_id, {normalized} AS base
+            FROM {schema}.committee
+        ) n
+        CROSS JOIN LATERAL (VALUES (n.base), ({stripped})) AS a(alias)
+        WHERE a.alias <> ''
+        GROUP BY n.chamber_id, a.alias
+        HAVING COUNT(DISTINCT n.committee_id) = 1
     """.format(
-        schema=SNAPSHOT_SCHEMA, hearings=HEARINGS_TABLE, stage=INCOMING_HEARINGS_TABLE
+        schema=SNAPSHOT_SCHEMA,
+        normalized=committee_name_sql("name"),
+        stripped=committee_alias_sql("n.base"),
     )
 
-    cur.execute(cancel_query)
+    delete_query = """
+        DELETE FROM {schema}.{aliases} ca
+        WHERE ca.source = 'derived'
+        AND NOT EXISTS (
+            SELECT 1 FROM ({derived}) d
+            WHERE d.chamber_id   = ca.chamber_id
+            AND d.alias          = ca.alias
+            AND d.committee_id   = ca.committee_id
+        )
+    """.format(schema=SNAPSHOT_SCHEMA, aliases=COMMITTEE_ALIAS_TABLE, derived=derived_query)
+    cur.execute(delete_query)
+    deleted = cur.rowcount
+
+    insert_query = """
+        INSERT INTO {schema}.{aliases} (chamber_id, alias, committee_id, source)
+        SELECT d.chamber_id, d.alias, d.committee_id, 'derived'
+        FROM ({derived}) d
+        ON CONFLICT (chamber_id, alias) DO NOTHING
+    """.format(schema=SNAPSHOT_SCHEMA, aliases=COMMITTEE_ALIAS_TABLE, derived=derived_query)
+    cur.execute(insert_query)
+    inserted = cur.rowcount
+
     logger.info(
-        f"Canceled hearings missing from incoming data: {cur.rowcount} affected"
+        f"Refreshed derived committee aliases: {inserted} inserted, {deleted} deleted"
     )
     return
 
 
-def update_hearing_committee_ids(cur):
+def update_hearing_committee_ids(cur, incoming_only=True):
+    """
+    Resolves committee_id for hearings in the incoming window that do not have one yet,
+    with one lookup per hearing against the committee_alias primary key.
+
+    With incoming_only=False (ex: after a committee sync, when there is no incoming stage),
+    resolves every upcoming hearing instead.
+    """
+    refresh_committee_aliases(cur)
+
+    if incoming_only:
+        scope = "h.hearing_hash IN (SELECT hearing_hash FROM {0})".format(
+            INCOMING_HEARINGS_TABLE
+        )
+    else:
+        scope = "h.date >= CURRENT_DATE"
+
+    # The exact normalized name wins over the stripped form when they match different committees
     update_query = """
         UPDATE {schema}.{hearings} h
-        SET committee_id = c.committee_id
-        FROM {schema}.committee c
-        WHERE LOWER(h.name) = LOWER(c.name)
-        AND h.chamber_id = c.chamber_id
+        SET committee_id = m.committee_id
+        FROM {schema}.{hearings} h2
+        CROSS JOIN LATERAL (
+            SELECT a.committee_id
+            FROM {schema}.{aliases} a
+            WHERE a.chamber_id = h2.chamber_id
+            AND a.alias IN ({normalized}, {stripped})
+            ORDER BY a.alias = {normalized} DESC
+            LIMIT 1
+        ) m
+        WHERE h.hearing_id = h2.hearing_id
         AND h.committee_id IS NULL
-    """.format(schema=SNAPSHOT_SCHEMA, hearings=HEARINGS_TABLE)
+        AND {scope}
+    """.format(
+        schema=SNAPSHOT_SCHEMA,
+        hearings=HEARINGS_TABLE,
+        aliases=COMMITTEE_ALIAS_TABLE,
+        scope=scope,
+        normalized=committee_name_sql("h2.name"),
+        stripped=committee_alias_sql(committee_name_sql("h2.name")),
+    )
 
     cur.execute(update_query)
+    updated = cur.rowcount
     logger.info(
-        f"Updated committee IDs where name match found: {cur.rowcount} rows affected"
+        f"Updated committee IDs where name match found: {updated} rows affected"
     )
-    return
+
+    # Names still unresolved are candidates for a manual alias
+    unresolved_query = """
+        SELECT DISTINCT h.chamber_id, h.name
+        FROM {schema}.{hearings} h
+        WHERE h.committee_id IS NULL
+        AND {scope}
+    """.format(schema=SNAPSHOT_SCHEMA, hearings=HEARINGS_TABLE, scope=scope)
+    cur.execute(unresolved_query)
+    for chamber_id, name in cur.fetchall():
+        logger.info(f"  No committee match: chamber={chamber_id}, hearing='{name}'")
+    return updated
+
+
+def load_bill_index(cur):
+    """
+    Output: dictionary of canonical bill number -> openstates_bill_id for the current session
+    """
+    cur.execute(
+        "SELECT bill_num, openstates_bill_id FROM {schema}.bill WHERE session = %s".format(
+            schema=SNAPSHOT_SCHEMA
+        ),
+        (CURRENT_SESSION,),
+    )
+    return {canonical_bill_number(bill_num): bill_id for bill_num, bill_id in cur.fetchall()}
+
+
+def resolve_bill_ids(hearing_bills_data, bill_index):
+    """
+    Input: hearing-bill tuples from fetch_updates, bill index from load_bill_index
+    Output: list of the same tuples with openstates_bill_id (or None if unmatched) appended
+    """
+    bill_number_idx = INCOMING_HEARING_BILLS_COLUMNS.index("bill_number")
+    resolved = [
+        (*row, bill_index.get(canonical_bill_number(row[bill_number_idx])))
+        for row in hearing_bills_data
+    ]
+    unmatched = sum(1 for row in resolved if row[-1] is None)
+    logger.info(
+        f"Resolved {len(resolved) - unmatched}/{len(resolved)} hearing bill numbers "
+        f"against {len(bill_index)} session bills"
+    )
+    return resolved
 
 
 def stage_hearing_bills(cur, hearing_bills_data):
@@ -246,29 +478,20 @@ def stage_hearing_bills(cur, hearing_bills_data):
             bill_number TEXT,
             file_order INT,
             footnote TEXT,
-            footnote_symbol CHAR
+            footnote_symbol CHAR,
+            hearing_hash TEXT,
+            openstates_bill_id TEXT
         );
     """.format(stage=INCOMING_HEARING_BILLS_TABLE)
     cur.execute(create_query)
 
-    insert_query = """
-        INSERT INTO {stage} (
-            chamber_id, 
-            event_date, 
-            event_text,  
-            event_time_verbatim, 
-            event_location, 
-            event_room,
-            bill_number, 
-            file_order,
-            footnote,
-            footnote_symbol
-        )
-        VALUES (%s, %s::DATE, %s, %s, %s, %s, %s, %s::INT, %s::TEXT, %s::CHAR)
-    """.format(stage=INCOMING_HEARING_BILLS_TABLE)
-
-    cur.executemany(insert_query, hearing_bills_data)
-    logger.info(f"Staged hearing-bill associations: {cur.rowcount} rows affected")
+    row_count = copy_rows(
+        cur,
+        INCOMING_HEARING_BILLS_TABLE,
+        INCOMING_HEARING_BILLS_COLUMNS,
+        hearing_bills_data,
+    )
+    logger.info(f"Staged hearing-bill associations: {row_count} rows affected")
     return
 
 
@@ -276,22 +499,15 @@ def upsert_hearing_bills(cur):
     upsert_query = """
         WITH resolved AS (
             SELECT
-                h.hearing_id, 
-                b.openstates_bill_id,
+                h.hearing_id,
+                s.openstates_bill_id,
                 s.file_order,
                 s.footnote,
                 s.footnote_symbol
             FROM {stage} s
             JOIN {schema}.{hearings} h
-                ON s.chamber_id           = h.chamber_id
-                AND s.event_date          = h.date
-                AND s.event_text          = h.name
-                AND s.event_time_verbatim = h.time_verbatim
-                AND s.event_location      = h.location
-                AND s.event_room          = h.room
-            JOIN {schema}.bill b
-                ON s.bill_number = b.bill_num
-                AND b.session = '{session}'
+                ON s.hearing_hash = h.hearing_hash
+            WHERE s.openstates_bill_id IS NOT NULL
         )
         INSERT INTO {schema}.{hearing_bills} (
             hearing_id,
@@ -311,17 +527,21 @@ def upsert_hearing_bills(cur):
             file_order      = EXCLUDED.file_order,
             footnote        = EXCLUDED.footnote,
             footnote_symbol = EXCLUDED.footnote_symbol
+        WHERE (
+            EXCLUDED.file_order      IS DISTINCT FROM {schema}.{hearing_bills}.file_order OR
+            EXCLUDED.footnote        IS DISTINCT FROM {schema}.{hearing_bills}.footnote OR
+            EXCLUDED.footnote_symbol IS DISTINCT FROM {schema}.{hearing_bills}.footnote_symbol
+        )
     """.format(
         stage=INCOMING_HEARING_BILLS_TABLE,
         schema=SNAPSHOT_SCHEMA,
         hearings=HEARINGS_TABLE,
-        session=CURRENT_SESSION,
         hearing_bills=HEARING_BILLS_TABLE,
     )
 
     cur.execute(upsert_query)
     logger.info(f"Upserted hearing-bill associations: {cur.rowcount} rows affected")
-    return
+    return cur.rowcount
 
 
 def delete_removed_hearing_bills(cur):
@@ -329,38 +549,24 @@ def delete_removed_hearing_bills(cur):
         DELETE FROM {schema}.{hearing_bills} hb
         USING {schema}.{hearings} h
         WHERE hb.hearing_id = h.hearing_id
-        AND EXISTS (
-            SELECT 1 FROM {stage} s
-            WHERE s.chamber_id        = h.chamber_id
-            AND s.event_date          = h.date
-            AND s.event_text          = h.name
-            AND s.event_time_verbatim = h.time_verbatim
-            AND s.event_location      = h.location
-            AND s.event_room          = h.room
-        )
+        AND h.hearing_hash IN (SELECT hearing_hash FROM {stage})
         AND NOT EXISTS (
             SELECT 1 FROM {stage} s
-            JOIN {schema}.bill b
-                ON s.bill_number = b.bill_num
-                AND b.session = '{session}'
-            WHERE b.openstates_bill_id = hb.openstates_bill_id
-            AND s.chamber_id = h.chamber_id
-            AND s.event_date = h.date
-            AND s.event_text = h.name
+            WHERE s.openstates_bill_id = hb.openstates_bill_id
+            AND s.hearing_hash = h.hearing_hash
         )
     """.format(
         schema=SNAPSHOT_SCHEMA,
         hearing_bills=HEARING_BILLS_TABLE,
         hearings=HEARINGS_TABLE,
         stage=INCOMING_HEARING_BILLS_TABLE,
-        session=CURRENT_SESSION,
     )
 
     cur.execute(delete_query)
     logger.info(
         f"Deleted hearing-bill associations if lost from incoming: {cur.rowcount} rows affected"
     )
-    return
+    return cur.rowcount
 
 
 def log_dropped_hearing_bills(cur):
@@ -368,25 +574,15 @@ def log_dropped_hearing_bills(cur):
     log_query = """
         SELECT s.bill_number, s.event_text, s.event_date, s.chamber_id
         FROM {stage} s
-        WHERE NOT EXISTS (
-            SELECT FROM {schema}.{hearings} h
-            WHERE s.chamber_id = h.chamber_id
-            AND s.event_date = h.date
-            AND s.event_text = h.name
-            AND s.event_time_verbatim = h.time_verbatim
-            AND s.event_location = h.location
-            AND s.event_room = h.room
-        )
+        WHERE s.openstates_bill_id IS NULL
         OR NOT EXISTS (
-            SELECT FROM {schema}.bill b
-            WHERE s.bill_number = b.bill_num
-            AND b.session = '{session}'
+            SELECT FROM {schema}.{hearings} h
+            WHERE s.hearing_hash = h.hearing_hash
         );
     """.format(
         stage=INCOMING_HEARING_BILLS_TABLE,
         schema=SNAPSHOT_SCHEMA,
         hearings=HEARINGS_TABLE,
-        session=CURRENT_SESSION,
     )
 
     cur.execute(log_query)
@@ -401,27 +597,48 @@ def log_dropped_hearing_bills(cur):
             )
     else:
         logger.info("All hearing bill rows matched successfully")
-    return
+    return len(dropped)
+
+
+# Deadline type -> days before the hearing
+DEADLINE_RULES = {"letter": 7}
+
 
+def upsert_hearing_deadlines(cur, hearing_ids=None, rules=DEADLINE_RULES):
+    """
+    Input: psycopg2 cursor, hearing IDs inserted or changed this run (None for every hearing),
+    dictionary of deadline type to lead days
+    Output: None (updates stale deadlines and inserts missing ones)
 
-DEADLINE_LEAD_DAYS = 7
-DEADLINE_TYPE = "letter"
+    Every rule is applied in one set-based pass per statement, restricted to the given hearings.
+    """
+    if hearing_ids is not None and not hearing_ids:
+        logger.info("No inserted or changed hearings, skipping deadline sync")
+        return 0
 
+    deadline_types = list(rules.keys())
+    lead_days = [rules[t] for t in deadline_types]
+    hearing_filter = "" if hearing_ids is None else "AND h.hearing_id = ANY(%(hearing_ids)s)"
+    params = {
+        "deadline_types": deadline_types,
+        "lead_days": lead_days,
+        "hearing_ids": hearing_ids,
+    }
 
-def upsert_hearing_deadlines(
-    cur, lead_days=DEADLINE_LEAD_DAYS, deadline_type=DEADLINE_TYPE
-):
     update_stale_query = """
         UPDATE {schema}.hearing_deadlines hd
-        SET deadline_date = h.date - INTERVAL '{lead} days'
-        FROM {schema}.hearings h
+        SET deadline_date = h.date - r.lead_days * INTERVAL '1 day'
+        FROM {schema}.hearings h,
+            unnest(%(deadline_types)s::TEXT[], %(lead_days)s::INT[]) AS r(deadline_type, lead_days)
         WHERE hd.hearing_id = h.hearing_id
-        AND hd.deadline_type = %s
-        AND hd.deadline_date != h.date - INTERVAL '{lead} days'
-    """.format(schema=SNAPSHOT_SCHEMA, lead=lead_days)
+        AND hd.deadline_type = r.deadline_type
+        AND hd.deadline_date != h.date - r.lead_days * INTERVAL '1 day'
+        {hearing_filter}
+    """.format(schema=SNAPSHOT_SCHEMA, hearing_filter=hearing_filter)
 
-    cur.execute(update_stale_query, (deadline_type,))
-    logger.info(f"Updated stale hearing deadlines: {cur.rowcount} rows affected")
+    cur.execute(update_stale_query, params)
+    updated = cur.rowcount
+    logger.info(f"Updated stale hearing deadlines: {updated} rows affected")
 
     insert_query = """
         INSERT INTO {schema}.hearing_deadlines (
@@ -429,38 +646,54 @@ def upsert_hearing_deadlines(
         )
         SELECT
             h.hearing_id,
-            h.date - INTERVAL '{lead} days' AS deadline_date,
-            %s AS deadline_type
-        FROM {schema}.hearings h
+            h.date - r.lead_days * INTERVAL '1 day' AS deadline_date,
+            r.deadline_type
+        FROM {schema}.hearings h,
+            unnest(%(deadline_types)s::TEXT[], %(lead_days)s::INT[]) AS r(deadline_type, lead_days)
+        WHERE TRUE
+        {hearing_filter}
         ON CONFLICT ON CONSTRAINT unique_deadline DO NOTHING;
-    """.format(schema=SNAPSHOT_SCHEMA, lead=lead_days)
+    """.format(schema=SNAPSHOT_SCHEMA, hearing_filter=hearing_filter)
 
-    cur.execute(insert_query, (deadline_type,))
+    cur.execute(insert_query, params)
 
     logger.info(
         (
-            f"Inserted new hearing deadlines ({lead_days} day lead, "
-            f"type='{deadline_type}'): {cur.rowcount} rows affected"
+            f"Inserted new hearing deadlines ({rules}, "
+            f"hearings={'all' if hearing_ids is None else len(hearing_ids)}): "
+            f"{cur.rowcount} rows affected"
         )
     )
-    return
+    return updated + cur.rowcount
 
 
-def upsert(cur, hearings_data, hearing_bills_data):
-    # -- Phase 1: Hearing-level changes
+def upsert(cur, hearings_data, hearing_bills_data, full_deadline_sync=False):
+    """
+    Output: tuple of (hearing-bill rows dropped, dictionary of snapshot table -> rows modified)
+    """
+    # -- Phase 1: Hearing-level changes (hearing_hash, its indexes and committee_alias come from
+    # migrate.py)
     stage_incoming_hearings(cur, hearings_data)
-    upsert_hearings(cur)
-    cancel_missing_hearings(cur)
+    changed_ids = upsert_hearings(cur)
+    canceled = cancel_missing_hearings(cur)
     # -- Phase 2: Update derived fields
     # NOTE: this will be incompatible with future joint committee parsing
-    update_hearing_committee_ids(cur)
+    committees_resolved = update_hearing_committee_ids(cur)
     # -- Phase 3: Bill-level changes (hearing associations + deadlines)
-    stage_hearing_bills(cur, hearing_bills_data)
-    log_dropped_hearing_bills(cur)
-    delete_removed_hearing_bills(cur)
-    upsert_hearing_bills(cur)
-    upsert_hearing_deadlines(cur)
-    return
+    bill_index = load_bill_index(cur)
+    stage_hearing_bills(cur, resolve_bill_ids(hearing_bills_data, bill_index))
+    dropped = log_dropped_hearing_bills(cur)
+    hearing_bills_changed = delete_removed_hearing_bills(cur) + upsert_hearing_bills(cur)
+    deadlines_changed = upsert_hearing_deadlines(
+        cur, None if full_deadline_sync else changed_ids
+    )
+
+    changed_rows = {
+        HEARINGS_TABLE: len(changed_ids) + canceled + committees_resolved,
+        HEARING_BILLS_TABLE: hearing_bills_changed,
+        "hearing_deadlines": deadlines_changed,
+    }
+    return dropped, changed_rows
 
 
 if __name__ == "__main__":
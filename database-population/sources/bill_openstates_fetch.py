@@ -16,7 +16,10 @@ import logging
 logger = logging.getLogger(__name__)
 # Global constants
 
-ENDPOINTS = {"bills": "https://v3.openstates.org/bills"}
+ENDPOINTS = {
+    "bills": "https://v3.openstates.org/bills",
+    "bill": "https://v3.openstates.org/bills/",  # + openstates_bill_id (ocd-bill/...)
+}
 WAIT_TIME = 10  # openstates has a rate limit of 6 requests/minute
 BASE_PARAMS = {
     "jurisdiction": "California",
@@ -198,6 +201,44 @@ def fetch_bill_batch(page, updated_since):
     return result["results"], result["pagination"]["max_page"]
 
 
+@retry(
+    retry=retry_if_exception_type(
+        (requests.exceptions.RequestException, ValueError, KeyError)
+    ),
+    wait=wait_exponential(multiplier=1, min=10, max=60),
+    stop=stop_after_attempt(3),
+)
+def fetch_bill(bill_id):
+    """
+    Input: openstates_bill_id
+    Output: JSON API response for the single bill
+
+    Same includes and rate limiting as fetch_bill_batch, for re-fetching individual bills.
+    """
+    sleep(WAIT_TIME)
+
+    params = {"apikey": BASE_PARAMS["apikey"], "include": BASE_PARAMS["include"]}
+    response = requests.get(url=ENDPOINTS["bill"] + bill_id, params=params)
+
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        logging.error(
+            f"HTTP {response.status_code} for bill {bill_id}: {response.text[:500]}"
+        )
+        raise
+
+    return response.json()
+
+
+def get_bills_by_id(bill_ids):
+    """
+    Input: list of openstates_bill_id values
+    Output: dictionary of string keys mapped to lists of data, same shape as get_bill_data
+    """
+    return process_bill_json([fetch_bill(bill_id) for bill_id in bill_ids], None)
+
+
 def get_bill_data(page=1, updated_since=None):
     """
     Input: page number, timestamp
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
-from typing import List, Union
+import hashlib
+import io
+import re
+import requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,22 +13,81 @@ SHEET_LINKS = {
     "sen": "https://docs.google.com/spreadsheets/d/1gFeGy72R_-FSFrjXbKCAAvVsvNjyV7t_TUvFoB12vys/edit?gid=1076436693#gid=1076436693",
 }
 
+REQUEST_TIMEOUT = 60
+
 KEYWORDS_TO_SKIP = {"VICE CHAIR", "CHAIR", "By issue area"}
 
 SEPARATORS = ["\\+", "/", "&", ",", " and ", ";", "\\n"]
 
+# Precompiled patterns for tidy_contacts; the cleaning patterns are applied in this order
+COMMITTEE_PATTERN = re.compile("CHAIR|CMTE")
+VICE_CHAIR_PATTERN = re.compile(r"VICE CHAIR (\\||-) ")
+CHAIR_PATTERN = re.compile("CHAIR (\\||-) ")
+SPECIFIER_PATTERN = re.compile(r"\(\w+\) ")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SEPARATOR_PATTERN = re.compile("|".join(SEPARATORS))
+
+CONTACT_COLUMNS = [
+    "district_number",
+    "staffer_contact",
+    "generated_email",
+    "issue_area",
+    "staffer_type",
+]
+
 
 def build_sheet_url(source_url: str) -> str:
     return source_url.replace("edit?", "export?format=csv&")
 
 
-def scrape_clean_sheet(chamber: str) -> pd.DataFrame:
-    ### SCRAPE
+def download_sheet(chamber: str, etag=None, last_modified=None):
+    """
+    Input: chamber key in SHEET_LINKS, validators (ETag, Last-Modified) from the previous download
+    Output: tuple of (raw CSV bytes, or None if the server answered 304 Not Modified, ETag,
+    Last-Modified)
+
+    Sends a conditional GET when validators are known. Google only returns them for some exports,
+    so callers should also compare sheet_digest of the bytes.
+    """
     # redirect edit mode into export mode
     source = build_sheet_url(SHEET_LINKS[chamber])
 
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = requests.get(source, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304:
+        logger.debug(f"[{chamber}] Google sheet not modified")
+        return None, etag, last_modified
+    response.raise_for_status()
+    return (
+        response.content,
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+    )
+
+
+def sheet_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def scrape_clean_sheet(chamber: str, content: bytes = None) -> pd.DataFrame:
+    """
+    Input: chamber key in SHEET_LINKS, optional raw CSV bytes from download_sheet (downloaded if
+    not given)
+    Output: cleaned sheet, one column per issue area + district_number
+    """
+    ### SCRAPE
+    if content is None:
+        content, _, _ = download_sheet(chamber)
+
     # read CSV into memory and convert to DF
-    df = pd.read_csv(source)
+    # every column is read as text (district IDs are converted below); dtype=str skips the
+    # per-column type inference
+    df = pd.read_csv(io.BytesIO(content), dtype=str)
     logger.debug("Google sheet loaded as CSV and converted to DataFrame")
 
     ### CLEAN
@@ -48,94 +110,83 @@ def scrape_clean_sheet(chamber: str) -> pd.DataFrame:
     return df
 
 
-def extract_contacts(chamber: str) -> List[pd.DataFrame]:
-    # Scrape sheet
-    sheet_df = scrape_clean_sheet(chamber)
-    results = dict()
+def tidy_contacts(sheet_df: pd.DataFrame, chamber: str) -> pd.DataFrame:
+    """
+    Input: cleaned sheet from scrape_clean_sheet (one column per issue area + district_number)
+    Output: one row per staffer contact with district_number, staffer_contact, generated_email,
+    issue_area and staffer_type, ordered by issue column then sheet row
 
+    Melts the sheet to long form once and runs the cleaning, splitting and email generation as a
+    single vectorized pass over every issue column.
+    """
     domain_email = f"@{chamber.lower()}.ca.gov"
-    # Loop ends before the final 'district_number' column
-    for issue in sheet_df.columns[:-1]:
-        logger.debug(f"Processing {issue}...")
-
-        # Skip null/empty/whitespace-only values at the start - no need to store
-        valid_rows = sheet_df[issue].notna() & (sheet_df[issue].str.strip() != "")
-        contacts = sheet_df.loc[valid_rows, [issue, "district_number"]].copy()
-        logger.debug("Filter empty rows")
-
-        # add default staffer type
-        contacts["staffer_type"] = "office"
-        # update staffer type for committee specifiers
-        contacts.loc[contacts[issue].str.contains("CHAIR|CMTE"), ["staffer_type"]] = (
-            "committee"
-        )
-        logger.debug("Extract staffer type")
-
-        # add issue area
-        contacts["issue_area"] = issue
-        logger.debug("Extract issue area")
-
-        # clean and normalize names: format, specifiers, nicknames, etc.
-        contacts[issue] = (
-            contacts[issue]
-            .str.replace(
-                ".", " ", regex=False
-            )  # Handle internal periods "Foo.X.Bar" -> "Foo X Bar"
-            .str.replace("CMTE/", "")
-            .str.replace(r"VICE CHAIR (\\||-) ", "", regex=True)
-            .str.replace("CHAIR (\\||-) ", "", regex=True)
-            .str.replace(r"\(\w+\) ", "", regex=True)
-            .str.replace(r"\s+", " ", regex=True)  # Collapse multiple spaces
-            .str.strip()
-        )
-        logger.debug("Normalize staffer names")
-
-        # split and explode aggregated staffers when they appear
-        contacts[issue + "_values"] = contacts[issue].str.split("|".join(SEPARATORS))
-        contacts = contacts.explode(issue + "_values").drop(columns=[issue])
-        logger.debug("Split aggregated staffer names")
-
-        # strip extra whitespace
-        contacts[f"{issue}_values"] = contacts[f"{issue}_values"].str.strip()
-
-        # rename column
-        contacts = contacts.rename(columns={f"{issue}_values": issue})
-
-        # Parse name into a list of parts
-        split_names = contacts[issue].str.strip().str.split(" ")
-
-        # Assign parts to columns (only first and last name, ignore middle name)
-        contacts["first_name"] = split_names.str.get(0)
-        contacts["last_name"] = split_names.str.get(-1)  # Always last element
-        logger.debug("Split staffer names into parts")
-
-        # Generate email (first.last@chamber.ca.gov) except for skip conditions
-        contacts["generated_email"] = np.where(
-            contacts[issue].str.strip().isin(KEYWORDS_TO_SKIP),
-            "NA",
-            contacts["first_name"].str.lower()
-            + "."
-            + contacts["last_name"].str.lower()
-            + domain_email,
-        )
-        logger.debug("Generate emails with NA value when skipping")
-
-        # Rename issue column to staffer name
-        contacts = contacts.rename(columns={issue: "staffer_contact"})
-
-        # Append
-        final = contacts[
-            [
-                "district_number",
-                "staffer_contact",
-                "generated_email",
-                "issue_area",
-                "staffer_type",
-            ]
-        ]
-        results[issue] = final
-        logger.debug(f"{issue} extraction complete")
-    return results
+    issues = [column for column in sheet_df.columns if column != "district_number"]
+
+    contacts = sheet_df.melt(
+        id_vars="district_number",
+        value_vars=issues,
+        var_name="issue_area",
+        value_name="raw",
+    )
+
+    # Skip null/empty/whitespace-only values at the start - no need to store
+    contacts = contacts.loc[contacts["raw"].notna()]
+    raw = contacts["raw"].astype(str)
+    valid_rows = raw.str.strip() != ""
+    contacts, raw = contacts.loc[valid_rows], raw.loc[valid_rows]
+    logger.debug("Filter empty cells")
+
+    # committee specifiers mark committee staff, everything else is office staff
+    contacts = contacts.assign(
+        staffer_type=np.where(raw.str.contains(COMMITTEE_PATTERN), "committee", "office")
+    )
+    logger.debug("Extract staffer type")
+
+    # clean and normalize names: format, specifiers, nicknames, etc.
+    cleaned = (
+        raw.str.replace(".", " ", regex=False)  # Handle internal periods "Foo.X.Bar" -> "Foo X Bar"
+        .str.replace("CMTE/", "", regex=False)
+        .str.replace(VICE_CHAIR_PATTERN, "", regex=True)
+        .str.replace(CHAIR_PATTERN, "", regex=True)
+        .str.replace(SPECIFIER_PATTERN, "", regex=True)
+        .str.replace(WHITESPACE_PATTERN, " ", regex=True)  # Collapse multiple spaces
+        .str.strip()
+    )
+    logger.debug("Normalize staffer names")
+
+    # split and explode aggregated staffers when they appear
+    contacts = contacts.assign(
+        staffer_contact=cleaned.str.split(SEPARATOR_PATTERN)
+    ).explode("staffer_contact")
+    contacts["staffer_contact"] = contacts["staffer_contact"].str.strip()
+    logger.debug("Split aggregated staffer names")
+
+    # Only first and last name, ignore middle name
+    split_names = contacts["staffer_contact"].str.split(" ")
+    first_name = split_names.str.get(0).str.lower()
+    last_name = split_names.str.get(-1).str.lower()
+
+    # Generate email (first.last@chamber.ca.gov) except for skip conditions
+    contacts["generated_email"] = np.where(
+        contacts["staffer_contact"].isin(KEYWORDS_TO_SKIP),
+        "NA",
+        first_name + "." + last_name + domain_email,
+    )
+    logger.debug("Generate emails with NA value when skipping")
+
+    return contacts[CONTACT_COLUMNS].reset_index(drop=True)
+
+
+def extract_contacts(chamber: str, content: bytes = None) -> pd.DataFrame:
+    """
+    Input: chamber key in SHEET_LINKS ("asm" or "sen"), optional raw CSV bytes from download_sheet
+    Output: tidy DataFrame of staffer contacts for every issue area (see tidy_contacts)
+    """
+    # Scrape sheet
+    sheet_df = scrape_clean_sheet(chamber, content)
+    contacts = tidy_contacts(sheet_df, chamber)
+    logger.debug(f"Extracted {len(contacts)} contacts across {contacts['issue_area'].nunique()} issues")
+    return contacts
 
 
 def main():
@@ -6,209 +6,211 @@ Input: URL for Assembly Daily File page (already set as default input)
 Output: set of tuples (EVENT_DATE, EVENT_TEXT, BILL_NUMBER) where EVENT_TEXT is a floor action or commitee
 hearing description.
 
-First, the page is manipulated using Playwright as a quick/dirty solution to render the agenda modal for each committee
-hearing by simulating user page navigation. This simulated-navigation step is unnecessary to wrangle committee hearing
-data. It is (typically) pre-loaded in the hidden components of the HTML and would unnecessarily complicate Playwright
-handling.
+First, the Daily File page is loaded once with Playwright and each committee hearing row is read: its details and the
+"View Agenda" link (pre-loaded in the hidden row menu). The agenda modal shows the HTML fragment behind that link, so
+each agenda is loaded directly instead of by simulating clicks on the listing.
 
-Once the HTML content is manipulated into the desired state, the contents are parsed by BeautifulSoup so we can extract
-elements marked as Daily File section items. For the committee hearings, we use the committee hearing agenda title as an
-event description, extract the specified date from the preceding h5 element, and a list of bills within this hearing
-subsection.
+The agenda fragments are parsed by BeautifulSoup so we can extract the hearing notes and the list of bills within each
+hearing.
 
 For both the floor action and committee hearing sections, we pass the event date, event text/description, and the list
 of bills into a utils function, which returns a set of tuples in the shape (DATE, EVENT_TEXT, BILL_NUMBER).
+
+Agendas are loaded concurrently on up to max_pages pages of the listing's browser context.
+scrape_committee_hearing is a synchronous wrapper around scrape_committee_hearing_async.
 """
 
-from bs4 import BeautifulSoup as bs
+from urllib.parse import urljoin
+import asyncio
 import utils.scraping as utils
 import logging
 
 logger = logging.getLogger(__name__)
 
+WELCOME_MODAL = (
+    "div.ui-dialog.was-welcome-message-modal.ui-widget.ui-widget-content.ui-front"
+)
+AGENDA_LINK = 'a[href*="/api/dailyfile/agenda"]'
+
+
+async def open_daily_file(browser, source_url, verbose=False):
+    context, page = await utils.make_page_async(browser, source_url)
+
+    # Close welcome message if detected
+    await page.wait_for_selector(WELCOME_MODAL)
+    if verbose:
+        logger.debug("Closing welcome message modal")
+    close_button = page.get_by_role("button", name="Close").first
+    await close_button.click()
+
+    # Navigate to committee hearings tab
+    await page.wait_for_selector("div.details-wrapper-committee-hearing")
+    if verbose:
+        logger.debug("Found committee hearings tab")
+    return context, page
+
+
+async def read_hearing_row(current_hearing, i, verbose=False):
+    """
+    Input: locator for a Daily File hearing row, row index
+    Output: tuple of (hearing key, hearing entry without notes/bills, agenda URL or None)
+
+    Reads the row's details and its "View Agenda" link from the listing without opening the menu.
+    """
+    # get date, name, time, location
+    details = {}
+    for detail in ["date", "time", "name", "location"]:
+        details[detail] = await utils.get_hearing_detail_async(
+            current_hearing, f"td.committee_hearing-{detail}"
+        )
 
-# TODO: refactor with Python classes for readability
-def scrape_committee_hearing(
+    # normalize details
+    details["date"] = utils.text_to_date_string(details["date"])
+    details["time"] = details["time"].replace("am", " a.m.")
+    details["time"] = details["time"].replace("pm", " p.m.")
+    details["time_verbatim"] = details["time"]
+    details["time_normalized"], details["is_allday"] = utils.normalize_hearing_time(
+        details["time_verbatim"]
+    )
+    # Only parse the 'normal' locations with typical address + room number
+    if details["location"].count(",") == 1 and "Room" in details["location"]:
+        details["location"], details["room"] = details["location"].split(", ")
+    else:
+        details["room"] = ""
+
+    hearing_key = (
+        details["date"],
+        details["name"],
+        details["time_verbatim"],
+        details["location"],
+        details["room"],
+    )
+
+    # Check if View Agenda is on the menu, else skip it
+    agenda_link = current_hearing.locator(AGENDA_LINK)
+    agenda_url = None
+    if await agenda_link.count() > 0:
+        agenda_url = await agenda_link.first.get_attribute("href")
+    elif verbose:
+        logger.debug(f"No agenda found for {details["name"]}")
+
+    return hearing_key, {
+        "chamber_id": utils.transform_chamber_id(1, details["name"]),
+        "name": details["name"],
+        "date": details["date"],
+        "time_verbatim": details["time_verbatim"],
+        "time_normalized": details["time_normalized"],
+        "is_allday": details["is_allday"],
+        "location": details["location"],
+        "room": details["room"],
+        "notes": "",  # default value
+        "bills": [],  # default value
+        "index": i,
+    }, agenda_url
+
+
+async def scrape_hearing_row(page, hearing_key, entry, agenda_url, verbose=False):
+    """
+    Input: page to load the agenda on, hearing key and entry from read_hearing_row, agenda URL
+    Output: tuple of (hearing key, hearing entry with notes and bills)
+
+    Loads the same agenda fragment the listing's modal would show and parses it.
+    """
+    if agenda_url is None:
+        return hearing_key, entry
+
+    if verbose:
+        logger.debug(f"Loading agenda for {entry['name']}")
+    response = await page.goto(agenda_url, wait_until="domcontentloaded")
+    if not response.ok:
+        raise Exception(f"HTTP {response.status} for agenda {agenda_url}")
+
+    # The response body is the agenda modal's inner HTML
+    entry["notes"], entry["bills"] = utils.parse_agenda(await response.text())
+    return hearing_key, entry
+
+
+async def scrape_hearing_rows(context, targets, max_pages, verbose=False):
+    """
+    Input: browser context of the loaded Daily File, list of read_hearing_row results, page limit
+    Output: list of (hearing key, hearing entry) in row order
+
+    Agendas are loaded on up to max_pages pages of the same context (same cookies and user agent),
+    with at most max_pages loads in flight.
+    """
+    agenda_count = sum(1 for _, _, agenda_url in targets if agenda_url)
+    pages = [await context.new_page() for _ in range(max(1, min(max_pages, agenda_count)))]
+    semaphore = asyncio.Semaphore(len(pages))
+
+    async def scrape_target(hearing_key, entry, agenda_url):
+        async with semaphore:
+            page = pages.pop()
+            try:
+                return await scrape_hearing_row(page, hearing_key, entry, agenda_url, verbose)
+            finally:
+                pages.append(page)
+
+    return await asyncio.gather(*[scrape_target(*target) for target in targets])
+
+
+async def scrape_committee_hearing_async(
     source_url="https://www.assembly.ca.gov/schedules-publications/daily-file",
     verbose=False,
+    max_pages=utils.MAX_CONCURRENT_PAGES,
 ):
-
-    # Initialize
     hearing_cache = {}  # key: (date, name) -> {'index': int, 'bills': set, ...}
+    browser, handler = None, None
 
     # Try connecting to page
     try:
-        browser, page, handler = utils.make_page(source_url)
-
-        # Close welcome message if detected
-        page.wait_for_selector(
-            "div.ui-dialog.was-welcome-message-modal.ui-widget.ui-widget-content.ui-front"
-        )
-        if verbose:
-            "Closing welcome message modal"
-        close_button = page.get_by_role("button", name="Close").first
-        close_button.click()
-
-        # Navigate to committee hearings tab
-        page.wait_for_selector("div.details-wrapper-committee-hearing")
-        if verbose:
-            logger.debug("Found committee hearings tab")
-
-        # Get pointers to each table row corresponding to a hearing
-        hearing_rows = page.locator("tr.committee-hearing-details")
-        hearing_count = hearing_rows.count()
-        if verbose:
-            logger.debug(f"Found {hearing_count} hearings")
-
-        # for each hearing
-        for i in range(hearing_count):
-            current_hearing = hearing_rows.nth(i)
-
-            # get date, name, time, location
-            details = {}
-            for detail in ["date", "time", "name", "location"]:
-                details[detail] = utils.get_hearing_detail(
-                    current_hearing, f"td.committee_hearing-{detail}"
-                )
-
-            # normalize details
-            details["date"] = utils.text_to_date_string(details["date"])
-            details["time"] = details["time"].replace("am", " a.m.")
-            details["time"] = details["time"].replace("pm", " p.m.")
-            details["time_verbatim"] = details["time"]
-            details["time_normalized"], details["is_allday"] = (
-                utils.normalize_hearing_time(details["time_verbatim"])
-            )
-            # Only parse the 'normal' locations with typical address + room number
-            if details["location"].count(",") == 1 and "Room" in details["location"]:
-                details["location"], details["room"] = details["location"].split(", ")
-            else:
-                details["room"] = ""
-
-            # Update hearing cache
-            hearing_key = (
-                details["date"],
-                details["name"],
-                details["time_verbatim"],
-                details["location"],
-                details["room"],
-            )
-            # click three-dot menu
-            hearing_menu = current_hearing.locator("button").first
-            utils.page_click(hearing_menu)
-
-            # Check if View Agenda is on the menu, else skip it
-            row_menu = current_hearing.locator("div.was-dropdown-menu.dd-show")
-            row_menu_contents = row_menu.inner_html()
-            hearing_notes = ""  # default value
-            hearing_bills = []  # default value
-
-            if "View Agenda" not in row_menu_contents:
-                if verbose:
-                    logger.debug(f"No agenda found for {details["name"]}")
-                # Close the dropdown menu by clicking the button again
-                hearing_menu.click()
-                page.wait_for_timeout(500)
-            else:  # Check for bills on the hearing agenda
-                logger.debug("Clicking current hearing agenda")
-                agenda_link = current_hearing.locator(
-                    'a[href*="/api/dailyfile/agenda"]'
-                )
-                utils.page_click(agenda_link, force=True)
-
-                # Wait for the modal to be visible
-                page.wait_for_selector(
-                    "div.agenda-container", state="visible", timeout=5000
-                )
-
-                # Get the HTML content of the modal
-                modal_html = page.locator("div.agenda-container").inner_html()
-
-                # Parse with BeautifulSoup
-                soup = bs(modal_html, "html.parser")
-
-                # with open(f"ASM_agenda-{i}.html", "w", encoding="utf-8") as f:
-                #     f.write(soup.prettify())
-                # Extract hearing notes (usually ID'ed as topic) if available
-                hearing_notes = ""
-                topics = soup.select("span.HearingTopic")
-                hearing_notes = "; ".join(
-                    [t.text.lower().strip() for t in topics if "_" not in t.text]
+        browser, handler = await utils.launch_browser_async()
+        context, page = await open_daily_file(browser, source_url, verbose)
+        try:
+            # Get pointers to each table row corresponding to a hearing, read once
+            hearing_rows = page.locator("tr.committee-hearing-details")
+            hearing_count = await hearing_rows.count()
+            if verbose:
+                logger.debug(f"Found {hearing_count} hearings")
+            targets = []
+            for i in range(hearing_count):
+                hearing_key, entry, agenda_url = await read_hearing_row(
+                    hearing_rows.nth(i), i, verbose
                 )
-                # extract FootNote span if it exists
-                footnotes = soup.select_one("span.MeasureFootNotes")
-                footnote_map = None
-                if footnotes:
-                    footnote_map = utils.extract_footnote_symbol(footnotes)
-
-                # Extract measures
-                measure_selector = soup.select("span.Measure")
-                if verbose:
-                    logger.debug("Found {} measures".format(len(measure_selector)))
-
-                hearing_bills = utils.collect_measure_order_footnotes(
-                    measure_selector, footnote_map=footnote_map
-                )
-
-                if footnotes:
-                    logger.debug(f"Hearing: {details["name"]}")
-                    logger.debug(f"Symbol to Footnote:\n{footnote_map}")
-                    logger.debug(bool(footnote_map))
-                    logger.debug(hearing_bills)
-                # Close agenda modal
-                page.keyboard.press("Escape")
-                page.wait_for_timeout(500)
-
-                # Close the dropdown menu by clicking the button again
-                hearing_menu.click()
-                page.wait_for_timeout(500)
-
-            if hearing_key not in hearing_cache:
-                hearing_cache[hearing_key] = {
-                    "chamber_id": utils.transform_chamber_id(1, details["name"]),
-                    "name": details["name"],
-                    "date": details["date"],
-                    "time_verbatim": details["time_verbatim"],
-                    "time_normalized": details["time_normalized"],
-                    "is_allday": details["is_allday"],
-                    "location": details["location"],
-                    "room": details["room"],
-                    "notes": hearing_notes,
-                    "bills": hearing_bills,
-                    "index": i,
-                }
-            elif i > hearing_cache[hearing_key]["index"]:
-                hearing_cache[hearing_key] = {
-                    "chamber_id": utils.transform_chamber_id(1, details["name"]),
-                    "name": details["name"],
-                    "date": details["date"],
-                    "time_verbatim": details["time_verbatim"],
-                    "time_normalized": details["time_normalized"],
-                    "is_allday": details["is_allday"],
-                    "location": details["location"],
-                    "room": details["room"],
-                    "notes": hearing_notes,
-                    "bills": hearing_bills,
-                    "index": i,
-                }
-                if verbose:
-                    logger.info(f"Replaced duplicate hearing: {hearing_key}")
+                if agenda_url:
+                    agenda_url = urljoin(page.url, agenda_url)
+                targets.append((hearing_key, entry, agenda_url))
+
+            logger.info(f"[ASM] Loading agendas for {hearing_count} hearings, up to {max_pages} at a time")
+            for hearing_key, entry in await scrape_hearing_rows(
+                context, targets, max_pages, verbose
+            ):
+                utils.merge_hearing_cache(hearing_cache, {hearing_key: entry})
+        finally:
+            await context.close()
 
     except Exception as e:
         logger.error(f"[ASM] Daily File scrape failed: {e}")
         return None
     finally:
-        if page:
-            page.close()
         if browser:
-            browser.close()
+            await browser.close()
         if handler:
-            handler.stop()
+            await handler.stop()
 
     # Build final results from cache
     return utils.normalize_scraper_results(hearing_cache, "ASM")
 
 
+def scrape_committee_hearing(
+    source_url="https://www.assembly.ca.gov/schedules-publications/daily-file",
+    verbose=False,
+    max_pages=utils.MAX_CONCURRENT_PAGES,
+):
+    return asyncio.run(
+        scrape_committee_hearing_async(source_url, verbose=verbose, max_pages=max_pages)
+    )
+
+
 def main():
     logging.basicConfig(level=logging.DEBUG)
     hearings, bills = scrape_committee_hearing(verbose=True)
@@ -15,55 +15,123 @@ subsection.
 
 For each individual hearing, the event date, event text/description, and the list of bills are passed into a utils
 function, which returns a set of tuples in the shape (DATE, EVENT_TEXT, BILL_NUMBER).
+
+The 30-day query window is split into date shards, each scraped on its own page under one async browser.
+scrape_committee_hearing is a synchronous wrapper around scrape_committee_hearing_async.
 """
 
-from bs4 import BeautifulSoup as bs
+import asyncio
 import utils.scraping as utils
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-# TODO: refactor with Python classes for readability
-def scrape_committee_hearing(
-    source_url="https://www.senate.ca.gov/calendar", verbose=False
-):
-    # Generate start and end dates for a query on the Senate calendar
-    start_date, end_date, query_url = utils.get_start_end_query(source_url)
-    if verbose:
-        logger.debug(
-            "Querying for Senate events from {} to {}".format(start_date, end_date)
-        )
-        logger.debug(query_url)
+# Number of date shards, each scraped on its own page and browser context
+SHARD_COUNT = 3
 
-    # Calendar v2.0
-    hearing_cache = {}  # key: (date, name) -> {'index': int, 'bills': set, ...}
 
-    # Try connecting to page
+async def scrape_hearing(page, current_hearing, current_date, j, verbose=False):
+    # Extract current hearing details
+    current_name = await utils.get_hearing_detail_async(
+        current_hearing, "div.hearing-name", "title"
+    )
+    # Extract details like time, location, room
+    current_details = None
     try:
-        browser, page, handler = utils.make_page(query_url)
-        # iterate over date wrapper blocks
-        page.wait_for_selector("div.page-events--day-wrapper")
-        if verbose:
-            logger.debug("Found events by date")
-        wrappers = page.locator("div.page-events--day-wrapper")
-        wrapper_count = wrappers.count()
-
-        logger.debug("Preparing to scrape Senate Daily File")
-        for i in range(wrapper_count):
-            # Extract current date
-            current_wrapper = wrappers.nth(i)
-            current_date = utils.text_to_date_string(
-                current_wrapper.locator("h2.page-events__date").first.inner_text()
-            )
+        current_details = await utils.get_hearing_detail_async(
+            current_hearing,
+            "div.attribute.page-events__time-location",
+            False,
+        )
+        current_time_verbatim, current_loc = current_details.split(" - ")
+        current_time_verbatim = current_time_verbatim.replace("Time: ", "")
+        current_time, is_allday = utils.normalize_hearing_time(current_time_verbatim)
+        if current_loc.count(",") == 1 and "Room" in current_loc:
+            current_location, current_room = current_loc.split(", ")
+        else:
+            current_location = current_loc
+            current_room = ""
+    except:
+        logger.warning(
+            f"No time or location details could be extracted for {current_name} on {current_date}"
+        )
+        logger.debug(current_details)
+        return None
+
+    hearing_key = (
+        current_date,
+        current_name,
+        current_time_verbatim,
+        current_location,
+        current_room,
+    )
+
+    # Extract every bill on the agenda
+    current_agenda = current_hearing.get_by_role("link", name="View Agenda")
+    await utils.page_click_async(current_agenda)
+
+    # Wait for the modal to be visible
+    await page.wait_for_selector("div.agenda-container", state="visible", timeout=5000)
+
+    # Get the HTML content of the modal and parse notes and measures
+    modal_html = await page.locator("div.agenda-container").inner_html()
+    current_note, current_bills = utils.parse_agenda(modal_html)
+
+    # Close agenda pop-up
+    close_button = page.get_by_role("button", name="Close").first
+    await close_button.click()
+
+    return hearing_key, {
+        "chamber_id": utils.transform_chamber_id(2, current_name),
+        "name": current_name,
+        "date": current_date,
+        "time_verbatim": current_time_verbatim,
+        "time_normalized": current_time,
+        "is_allday": is_allday,
+        "location": current_location,
+        "room": current_room,
+        "notes": current_note,
+        "bills": current_bills,
+        "index": j,
+    }
+
+
+# TODO: refactor with Python classes for readability
+async def scrape_shard(browser, query_url, semaphore, verbose=False):
+    """
+    Input: shared browser, Senate calendar query URL for a single date shard, concurrency limit
+    Output: tuple of (hearing cache for the shard, elapsed seconds once a page slot was acquired)
+    """
+    hearing_cache = {}  # key: (date, name) -> {'index': int, 'bills': set, ...}
+    async with semaphore:
+        start = time.time()
+        context, page = await utils.make_page_async(browser, query_url)
+        try:
+            # iterate over date wrapper blocks
+            await page.wait_for_selector("div.page-events--day-wrapper")
             if verbose:
-                logger.debug("Extracting {}".format(current_date))
-            # Detect empty content
-            empty_wrapper = page.locator("div.no-results-message")
+                logger.debug("Found events by date")
+            wrappers = page.locator("div.page-events--day-wrapper")
+            wrapper_count = await wrappers.count()
+
+            logger.debug("Preparing to scrape Senate Daily File")
+            for i in range(wrapper_count):
+                # Extract current date
+                current_wrapper = wrappers.nth(i)
+                current_date = utils.text_to_date_string(
+                    await current_wrapper.locator("h2.page-events__date").first.inner_text()
+                )
+                if verbose:
+                    logger.debug("Extracting {}".format(current_date))
+                # Detect empty content
+                empty_wrapper = page.locator("div.no-results-message")
+
+                if await empty_wrapper.count() > 0:
+                    logger.debug(f"No events scheduled for {current_date}")
+                    continue
 
-            if empty_wrapper.count() > 0:
-                logger.debug(f"No events scheduled for {current_date}")
-            else:
                 if verbose:
                     logger.debug("Looking for events")
 
@@ -74,151 +142,99 @@ def scrape_committee_hearing(
                 hearing_elements = committee_hearing_section.locator(
                     "div.page-events__item.page-events__item--committee-hearing"
                 )
+                hearing_count = await hearing_elements.count()
                 if verbose:
-                    logger.debug("Found {} hearings".format(hearing_elements.count()))
+                    logger.debug("Found {} hearings".format(hearing_count))
                 # Iterate over individual hearings
-                for j in range(hearing_elements.count()):
-                    # Extract current hearing details
-                    current_hearing = hearing_elements.nth(j)
-                    current_name = utils.get_hearing_detail(
-                        current_hearing, "div.hearing-name", "title"
+                for j in range(hearing_count):
+                    result = await scrape_hearing(
+                        page, hearing_elements.nth(j), current_date, j, verbose
                     )
-                    # Extract details like time, location, room
-                    try:
-                        current_details = utils.get_hearing_detail(
-                            current_hearing,
-                            "div.attribute.page-events__time-location",
-                            False,
-                        )
-                        current_time_verbatim, current_loc = current_details.split(
-                            " - "
-                        )
-                        current_time_verbatim = current_time_verbatim.replace(
-                            "Time: ", ""
-                        )
-                        current_time, is_allday = utils.normalize_hearing_time(
-                            current_time_verbatim
-                        )
-                        if current_loc.count(",") == 1 and "Room" in current_loc:
-                            current_location, current_room = current_loc.split(", ")
-                        else:
-                            current_location = current_loc
-                            current_room = ""
-                    except:
-                        logger.warning(
-                            f"No time or location details could be extracted for {current_name} on {current_date}"
-                        )
-                        logger.debug(current_details)
+                    if result is None:
                         continue
+                    hearing_key, entry = result
+                    if verbose and hearing_key in hearing_cache:
+                        logger.info(f"Replaced duplicate hearing: {hearing_key}")
+                    utils.merge_hearing_cache(hearing_cache, {hearing_key: entry})
+        finally:
+            await context.close()
+            logger.debug("Closed Senate page")
+    return hearing_cache, time.time() - start
+
+
+async def scrape_committee_hearing_async(
+    source_url="https://www.senate.ca.gov/calendar",
+    verbose=False,
+    shards=SHARD_COUNT,
+    max_pages=utils.MAX_CONCURRENT_PAGES,
+):
+    # Generate start and end dates for a query on the Senate calendar
+    start_date, end_date, query_url = utils.get_start_end_query(source_url)
+    if verbose:
+        logger.debug(
+            "Querying for Senate events from {} to {}".format(start_date, end_date)
+        )
+        logger.debug(query_url)
 
-                    hearing_key = (
-                        current_date,
-                        current_name,
-                        current_time_verbatim,
-                        current_location,
-                        current_room,
-                    )
-
-                    # Extract every bill on the agenda
-                    current_agenda = current_hearing.get_by_role(
-                        "link", name="View Agenda"
-                    )
-                    utils.page_click(current_agenda)
-
-                    # Extract HTML and parse as BeautifulSoup object
-                    # Wait for the modal to be visible
-                    page.wait_for_selector(
-                        "div.agenda-container", state="visible", timeout=5000
-                    )
-
-                    # Get the HTML content of the modal
-                    modal_html = page.locator("div.agenda-container").inner_html()
-
-                    # Parse with BeautifulSoup
-                    soup = bs(modal_html, "html.parser")
-
-                    # Extract hearing notes if available
-                    # use HearingTopic for general notes with "; " separator
-                    current_note = ""
-                    topics = soup.select("span.HearingTopic")
-                    logger.debug(topics)
-                    current_note = "; ".join(
-                        [t.text.lower().strip() for t in topics if "_" not in t.text]
-                    )
-                    logger.debug(f"Note extracted: {current_note}")
-
-                    # extract FootNote span if it exists
-                    has_footnotes = soup.select_one("span.MeasureFootNotes")
-                    symbol_to_footnote = None
-                    if has_footnotes:
-                        symbol_to_footnote = utils.extract_footnote_symbol(
-                            has_footnotes
-                        )
-                        logger.debug(f"Footnote to symbol map:\n{symbol_to_footnote}")
-                    # Extract all HTML elements with the measure identifier
-                    measure_selector = soup.select("span.Measure")
-                    if verbose:
-                        logger.debug("Found {} measures".format(len(measure_selector)))
-
-                    current_bills = utils.collect_measure_order_footnotes(
-                        measure_selector, footnote_map=symbol_to_footnote
-                    )
+    date_shards = utils.split_date_range(start_date, end_date, shards)
+    logger.info(
+        f"[SEN] Scraping {len(date_shards)} date shards, up to {max_pages} at a time"
+    )
 
-                    if has_footnotes:
-                        logger.debug(current_bills)
-                    if hearing_key not in hearing_cache:
-                        hearing_cache[hearing_key] = {
-                            "chamber_id": utils.transform_chamber_id(2, current_name),
-                            "name": current_name,
-                            "date": current_date,
-                            "time_verbatim": current_time_verbatim,
-                            "time_normalized": current_time,
-                            "is_allday": is_allday,
-                            "location": current_location,
-                            "room": current_room,
-                            "notes": current_note,
-                            "bills": current_bills,
-                            "index": j,
-                        }
-                    elif j > hearing_cache[hearing_key]["index"]:
-                        hearing_cache[hearing_key] = {
-                            "chamber_id": utils.transform_chamber_id(2, current_name),
-                            "name": current_name,
-                            "date": current_date,
-                            "time_verbatim": current_time_verbatim,
-                            "time_normalized": current_time,
-                            "is_allday": is_allday,
-                            "location": current_location,
-                            "room": current_room,
-                            "notes": current_note,
-                            "bills": current_bills,
-                            "index": j,
-                        }
-                        if verbose:
-                            logger.info(f"Replaced duplicate hearing: {hearing_key}")
-
-                    # Close agenda pop-up
-                    close_button = page.get_by_role("button", name="Close").first
-                    close_button.click()
-
-        browser.close()
-        logger.debug("Closed Senate browser")
+    # Calendar v2.0
+    hearing_cache = {}
+    browser, handler = None, None
+    try:
+        browser, handler = await utils.launch_browser_async()
+        semaphore = asyncio.Semaphore(max_pages)
+        # A failed shard fails the whole scrape: missing dates would otherwise
+        # look like canceled hearings downstream
+        shard_results = await asyncio.gather(
+            *[
+                scrape_shard(
+                    browser,
+                    utils.build_query_url(source_url, shard_start, shard_end),
+                    semaphore,
+                    verbose,
+                )
+                for shard_start, shard_end in date_shards
+            ]
+        )
+        for (shard_start, shard_end), (shard_cache, elapsed) in zip(
+            date_shards, shard_results
+        ):
+            logger.info(
+                f"[SEN] Shard {shard_start} to {shard_end}: "
+                f"{len(shard_cache)} hearings ({elapsed:.2f}s)"
+            )
+            utils.merge_hearing_cache(hearing_cache, shard_cache)
 
     except Exception as e:
         logger.error(f"[SEN] Daily File scrape failed: {e}")
         return None
     finally:
-        if page:
-            page.close()
         if browser:
-            browser.close()
+            await browser.close()
         if handler:
-            handler.stop()
+            await handler.stop()
 
     # Build final results from cache
     return utils.normalize_scraper_results(hearing_cache, "SEN")
 
 
+def scrape_committee_hearing(
+    source_url="https://www.senate.ca.gov/calendar",
+    verbose=False,
+    shards=SHARD_COUNT,
+    max_pages=utils.MAX_CONCURRENT_PAGES,
+):
+    return asyncio.run(
+        scrape_committee_hearing_async(
+            source_url, verbose=verbose, shards=shards, max_pages=max_pages
+        )
+    )
+
+
 def main():
     logging.basicConfig(level=logging.DEBUG)
     hearings, bills = scrape_committee_hearing(verbose=True)
@@ -1,3 +1,19 @@
+from config import config
+import csv
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index into credentials.ini for DB schema names
+SNAPSHOT_SCHEMA = config("postgresql_schemas")["snapshot_schema"]
+# Spooled COPY buffers stay in memory up to this size, then roll over to a temp file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Key/value state kept between runs (created by migrate.py)
+STATE_TABLE = "pipeline_state"
+
+
 def copy_temp_table(cur, dev, temp_table_name):
     if dev:
         print("Writing table {} to CSV for review...".format(temp_table_name))
@@ -9,3 +25,90 @@ def copy_temp_table(cur, dev, temp_table_name):
         with open("{0}.csv".format(temp_table_name), "w+") as f:
             cur.copy_expert(outputquery.format(temp_table_name), f)
     return
+
+
+class CopySpool:
+    """
+    CSV buffer that rows are appended to as they are fetched (ex: one API page at a time) and that
+    is then streamed into a table with a single COPY. Uses the same CSV quoting as copy_rows.
+    """
+
+    def __init__(self, max_bytes=SPOOL_MAX_BYTES):
+        self.buffer = tempfile.SpooledTemporaryFile(
+            max_size=max_bytes, mode="w+", newline="", encoding="utf-8"
+        )
+        self.writer = csv.writer(self.buffer, quoting=csv.QUOTE_NOTNULL)
+        self.rows = 0
+
+    def write(self, rows):
+        for row in rows:
+            self.writer.writerow(row)
+            self.rows += 1
+        return
+
+    def copy_to(self, cur, table_name, columns):
+        """
+        Input: psycopg2 cursor, target table name, list of column names
+        Output: number of rows copied (the spool is closed afterwards)
+        """
+        start = time.time()
+        self.buffer.seek(0)
+        cur.copy_expert(
+            sql="COPY {0} ({1}) FROM STDIN WITH (FORMAT CSV)".format(
+                table_name, ", ".join(columns)
+            ),
+            file=self.buffer,
+        )
+        self.buffer.close()
+
+        elapsed = time.time() - start
+        logger.info(
+            f"Copied {self.rows} rows into {table_name} ({elapsed:.2f}s, "
+            f"{self.rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return self.rows
+
+
+def copy_rows(cur, table_name, columns, rows):
+    """
+    Input: psycopg2 cursor, target table name, list of column names, iterable of row tuples
+    Output: number of rows copied
+
+    Streams Python tuples into a table with a single COPY instead of one INSERT per row.
+    Strings are always quoted and None is written unquoted, so empty strings and NULLs stay
+    distinct (requires Python 3.12 for csv.QUOTE_NOTNULL).
+    """
+    spool = CopySpool()
+    spool.write(rows)
+    return spool.copy_to(cur, table_name, columns)
+
+
+def get_state(cur, keys):
+    """
+    Input: psycopg2 cursor, list of pipeline_state keys
+    Output: dictionary of key -> (value, dropped) for the keys that have been stored
+    """
+    cur.execute(
+        "SELECT key, value, dropped FROM {schema}.{state} WHERE key = ANY(%s)".format(
+            schema=SNAPSHOT_SCHEMA, state=STATE_TABLE
+        ),
+        (list(keys),),
+    )
+    return {key: (value, dropped) for key, value, dropped in cur.fetchall()}
+
+
+def set_state(cur, key, value, dropped=0):
+    """
+    Input: psycopg2 cursor, pipeline_state key, text value, number of rows the write dropped
+    Output: None (part of the caller's transaction, so the state only advances on commit)
+    """
+    upsert_query = """
+        INSERT INTO {schema}.{state} (key, value, dropped, updated_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (key) DO UPDATE SET
+            value      = EXCLUDED.value,
+            dropped    = EXCLUDED.dropped,
+            updated_at = EXCLUDED.updated_at
+    """.format(schema=SNAPSHOT_SCHEMA, state=STATE_TABLE)
+    cur.execute(upsert_query, (key, value, dropped))
+    return
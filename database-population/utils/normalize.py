@@ -0,0 +1,176 @@
+"""
+Date and time normalization for Daily File scraper programs.
+
+Hearing dates and times repeat across hundreds of rows, so both normalizers are memoized in a bounded
+LRU cache. Each tries the exact formats published by the Assembly and Senate sites with precompiled
+patterns first, and only falls back to dateutil (dates) or the general cleanup + strptime path (times)
+when the fast path does not match.
+"""
+
+from dateutil import parser
+from functools import lru_cache
+import datetime
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 512
+
+ALLDAY_PATTERNS = re.compile(r"prior|upon|adjournment|call of the chair", re.IGNORECASE)
+
+# ex: "Tuesday, November 3, 2026", "November 3, 2026", "Nov. 3, 2026"
+NAMED_DATE_PATTERN = re.compile(
+    r"^\s*(?:[A-Za-z]+,\s+)?([A-Za-z]{3,9})\.?\s+(\d{1,2}),\s+(\d{4})\s*$"
+)
+# ex: "11/3/2026"
+NUMERIC_DATE_PATTERN = re.compile(r"^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$")
+# ex: "2026-11-03"
+ISO_DATE_PATTERN = re.compile(r"^\s*(\d{4})-(\d{2})-(\d{2})\s*$")
+# ex: "9 a.m.", "1:30 p.m.", "9:30 am", "9 a.m. to 12 p.m."
+TIME_PATTERN = re.compile(
+    r"^\s*(\d{1,2})(?::(\d{2}))?\s+(?:([ap])\.m\.|([ap])m)(?:\s+to\b.*)?\s*$",
+    re.IGNORECASE,
+)
+
+MONTHS = {
+    name.lower(): i
+    for i, name in enumerate(
+        [
+            "January",
+            "February",
+            "March",
+            "April",
+            "May",
+            "June",
+            "July",
+            "August",
+            "September",
+            "October",
+            "November",
+            "December",
+        ],
+        start=1,
+    )
+}
+MONTHS.update({name[:3]: i for name, i in list(MONTHS.items())})
+MONTHS["sept"] = 9
+
+# Number of values resolved by the slow path, for comparison with cache hits/misses
+fallback_counts = {"dates": 0, "times": 0}
+
+
+def fast_date(s):
+    """
+    Input: date string
+    Output: (year, month, day) tuple if the string is in a known site format, else None
+    """
+    match = NAMED_DATE_PATTERN.match(s)
+    if match:
+        month = MONTHS.get(match.group(1).lower())
+        if month is None:
+            return None
+        return int(match.group(3)), month, int(match.group(2))
+
+    match = NUMERIC_DATE_PATTERN.match(s)
+    if match:
+        return int(match.group(3)), int(match.group(1)), int(match.group(2))
+
+    match = ISO_DATE_PATTERN.match(s)
+    if match:
+        return int(match.group(1)), int(match.group(2)), int(match.group(3))
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_date(s):
+    """
+    Input: date string
+    Output: date string in YYYY-MM-DD format, or None if it cannot be parsed
+    """
+    parts = fast_date(s)
+    if parts:
+        try:
+            return datetime.date(*parts).strftime("%Y-%m-%d")
+        except ValueError:
+            pass  # ex: February 30; let dateutil decide
+
+    fallback_counts["dates"] += 1
+    try:
+        dt = parser.parse(s)
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        logger.warning(f"WARNING: could not parse date string {s}")
+        return None
+
+
+def fast_time(time_str):
+    """
+    Input: time string
+    Output: time string in HH:MM:SS format if the string is in a known site format, else None
+    """
+    match = TIME_PATTERN.match(time_str)
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = (match.group(3) or match.group(4)).lower()
+    if not 1 <= hour <= 12 or minute > 59:
+        return None
+
+    hour = hour % 12 + (12 if meridiem == "p" else 0)
+    return f"{hour:02d}:{minute:02d}:00"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_time(time_str):
+    """
+    Returns (time_normalized, is_allday) tuple.
+    time_normalized is a time string in HH:MM:SS format, or None if all-day.
+    """
+    if not time_str or ALLDAY_PATTERNS.search(time_str):
+        return None, True
+
+    fast = fast_time(time_str)
+    if fast:
+        return fast, False
+
+    fallback_counts["times"] += 1
+    normalized = time_str.strip().lower()
+    normalized = re.sub(
+        r"\bto\b.*$", "", normalized
+    ).strip()  # drop end time if present
+    normalized = re.sub(r"a\.m\.", "AM", normalized, flags=re.IGNORECASE)
+    normalized = re.sub(r"p\.m\.", "PM", normalized, flags=re.IGNORECASE)
+
+    for fmt in ("%I:%M %p", "%I %p"):
+        try:
+            return (
+                datetime.datetime.strptime(normalized, fmt).strftime("%H:%M:%S"),
+                False,
+            )
+        except ValueError:
+            continue
+
+    # If parsing fails, preserve as all-day and log
+    logger.warning(
+        f"WARNING: could not parse time string '{time_str}', treating as all-day"
+    )
+    return None, True
+
+
+def cache_stats():
+    """
+    Output: dictionary of cache hits, misses, size and slow-path fallbacks for dates and times
+    """
+    stats = {}
+    for key, fn in [("dates", normalize_date), ("times", normalize_time)]:
+        info = fn.cache_info()
+        stats[key] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "fallbacks": fallback_counts[key],
+        }
+    return stats
@@ -4,12 +4,15 @@ General functions for Daily File scraper programs
 
 from bs4 import BeautifulSoup as bs
 from playwright.sync_api import sync_playwright, Locator
-from dateutil import parser
+from playwright.async_api import async_playwright
+from utils import normalize
+import asyncio
 import datetime
+import hashlib
+import re
 import urllib.request
 import random
 from time import sleep
-import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +23,16 @@ USERAGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
 ]
 
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",  # /dev/shm is often too small in Docker
+    "--disable-gpu",
+]
+
+# Max pages open at once under a single async browser
+MAX_CONCURRENT_PAGES = 4
+
 detail_fns = {
     "strip": lambda x: x.strip(),
     "title": lambda x: x.strip().title(),
@@ -42,6 +55,20 @@ def resolve_chamber_id(chamber_id, name):
     return chamber_id
 
 
+def hearing_hash(chamber_id, date, name, time_verbatim, location, room):
+    """
+    Input: hearing natural key fields
+    Output: md5 hex digest of the fields joined by a unit separator (None as empty string)
+
+    Must stay in sync with HEARING_HASH_SQL in migrate.py, which backfills the same value in the
+    database. date is the normalized "YYYY-MM-DD" string. None and "" hash the same on purpose
+    (the SQL side COALESCEs NULL to ''); changing that would orphan every stored hash.
+    """
+    fields = [chamber_id, date, name, time_verbatim, location, room]
+    key = "\x1f".join("" if field is None else str(field) for field in fields)
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
 def normalize_scraper_results(hearing_cache: dict, chamber: str):
     # Build final results from cache
     hearings_normalized = set()
@@ -53,7 +80,15 @@ def normalize_scraper_results(hearing_cache: dict, chamber: str):
         resolved = resolve_chamber_id(cached["chamber_id"], cached["name"])
         if resolved != cached["chamber_id"]:
             joint_counts[resolved] += 1
-        
+
+        current_hash = hearing_hash(
+            resolved,
+            cached["date"],
+            cached["name"],
+            cached["time_verbatim"],
+            cached["location"],
+            cached["room"],
+        )
         hearings_normalized.add(
             (
                 resolved,
@@ -65,11 +100,12 @@ def normalize_scraper_results(hearing_cache: dict, chamber: str):
                 cached["location"],
                 cached["room"],
                 cached["notes"],
+                current_hash,
             )
         )
 
         for bill in cached["bills"]:
-            bill_name = f"{bill["type"]} {bill["number"]}"
+            bill_name = canonical_bill_number(f"{bill["type"]} {bill["number"]}")
 
             # Manually reorder attributes to minimize refactor
             bills_natural_key.add(
@@ -84,6 +120,7 @@ def normalize_scraper_results(hearing_cache: dict, chamber: str):
                     bill["file_order"],
                     bill["footnote"],
                     bill["note_symbol"],
+                    current_hash,
                 )
             )
 
@@ -95,10 +132,25 @@ def normalize_scraper_results(hearing_cache: dict, chamber: str):
     # Concatenate the results into a set
     return hearings_normalized, bills_natural_key
 
-def get_start_end_query(source_url):
-    start_date = datetime.date.today()
-    end_date = start_date + datetime.timedelta(days=30)
-    query_url = (
+def merge_hearing_cache(hearing_cache: dict, incoming: dict):
+    """
+    Input: hearing cache to update, hearing cache from another scrape (ex: a date shard)
+    Output: updated hearing cache
+
+    Applies the same dedup rule used while scraping: a repeated hearing key keeps the
+    entry found later on the page.
+    """
+    for hearing_key, cached in incoming.items():
+        if (
+            hearing_key not in hearing_cache
+            or cached["index"] > hearing_cache[hearing_key]["index"]
+        ):
+            hearing_cache[hearing_key] = cached
+    return hearing_cache
+
+
+def build_query_url(source_url, start_date, end_date):
+    return (
         source_url
         + "?startDate="
         + start_date.strftime("%Y-%m-%d")
@@ -106,10 +158,34 @@ def get_start_end_query(source_url):
         + end_date.strftime("%Y-%m-%d")
         + "&committeeHearings=1"
     )
+
+
+def get_start_end_query(source_url):
+    start_date = datetime.date.today()
+    end_date = start_date + datetime.timedelta(days=30)
+    query_url = build_query_url(source_url, start_date, end_date)
     return start_date, end_date, query_url
 
 
-ALLDAY_PATTERNS = re.compile(r"prior|upon|adjournment|call of the chair", re.IGNORECASE)
+def split_date_range(start_date, end_date, shards):
+    """
+    Input: start date, end date (inclusive), number of shards
+    Output: list of (shard_start, shard_end) date tuples
+
+    Splits a date window into contiguous, non-overlapping shards of near-equal length.
+    """
+    total_days = (end_date - start_date).days + 1
+    shards = max(1, min(shards, total_days))
+    shard_days, remainder = divmod(total_days, shards)
+
+    results = []
+    shard_start = start_date
+    for i in range(shards):
+        length = shard_days + (1 if i < remainder else 0)
+        shard_end = shard_start + datetime.timedelta(days=length - 1)
+        results.append((shard_start, shard_end))
+        shard_start = shard_end + datetime.timedelta(days=1)
+    return results
 
 
 def normalize_hearing_time(time_str):
@@ -117,45 +193,15 @@ def normalize_hearing_time(time_str):
     Returns (time_normalized, is_allday) tuple.
     time_normalized is a time string in HH:MM:SS format, or None if all-day.
     """
-    if not time_str or ALLDAY_PATTERNS.search(time_str):
-        return None, True
-
-    normalized = time_str.strip().lower()
-    normalized = re.sub(
-        r"\bto\b.*$", "", normalized
-    ).strip()  # drop end time if present
-    normalized = re.sub(r"a\.m\.", "AM", normalized, flags=re.IGNORECASE)
-    normalized = re.sub(r"p\.m\.", "PM", normalized, flags=re.IGNORECASE)
-
-    for fmt in ("%I:%M %p", "%I %p"):
-        try:
-            return (
-                datetime.datetime.strptime(normalized, fmt).strftime("%H:%M:%S"),
-                False,
-            )
-        except ValueError:
-            continue
-
-    # If parsing fails, preserve as all-day and log
-    logger.warning(
-        f"WARNING: could not parse time string '{time_str}', treating as all-day"
-    )
-    return None, True
+    return normalize.normalize_time(time_str)
 
 
 def text_to_date_string(s):
     """
     Input: string
-    Output: datetime object
-
-    Converts string to datetime object for easy conversion to other string formats.
+    Output: date string in YYYY-MM-DD format, or None if it cannot be parsed
     """
-    try:
-        dt = parser.parse(s)
-        return dt.strftime("%Y-%m-%d")
-    except ValueError:
-        logger.warning(f"WARNING: could not parse date string {s}")
-        return None
+    return normalize.normalize_date(s)
 
 
 def get_hearing_detail(hearing: Locator, selector: str, transform="strip"):
@@ -166,6 +212,45 @@ def get_hearing_detail(hearing: Locator, selector: str, transform="strip"):
         return result
 
 
+async def get_hearing_detail_async(hearing, selector: str, transform="strip"):
+    result = (await hearing.locator(selector).inner_text()).replace("\n", " ")
+    if transform:
+        return detail_fns[transform](result)
+    else:
+        return result
+
+
+def parse_agenda(modal_html):
+    """
+    Input: inner HTML of a hearing agenda modal
+    Output: tuple of (hearing notes string, list of measure dictionaries)
+
+    Hearing notes use HearingTopic spans with a "; " separator. Measures are collected in file order
+    and matched to their footnotes if the agenda has any.
+    """
+    soup = bs(modal_html, "html.parser")
+
+    topics = soup.select("span.HearingTopic")
+    notes = "; ".join([t.text.lower().strip() for t in topics if "_" not in t.text])
+    logger.debug(f"Note extracted: {notes}")
+
+    # extract FootNote span if it exists
+    footnotes = soup.select_one("span.MeasureFootNotes")
+    footnote_map = None
+    if footnotes:
+        footnote_map = extract_footnote_symbol(footnotes)
+        logger.debug(f"Symbol to Footnote:\n{footnote_map}")
+
+    # Extract all HTML elements with the measure identifier
+    measure_selector = soup.select("span.Measure")
+    logger.debug("Found {} measures".format(len(measure_selector)))
+
+    bills = collect_measure_order_footnotes(measure_selector, footnote_map=footnote_map)
+    if footnotes:
+        logger.debug(bills)
+    return notes, bills
+
+
 def prettify_structure(content):
     """
     Input: GET request response
@@ -217,6 +302,28 @@ def normalize_bill_number(text):
     return text.replace("\n", "").replace("No.", "").replace(".", "")
 
 
+BILL_NUMBER_PATTERN = re.compile(
+    r"^\s*([A-Za-z.\s]+?)\s*(?:No\.?)?\s*0*(\d+)\s*$", re.IGNORECASE
+)
+
+
+def canonical_bill_number(text):
+    """
+    Input: bill number string from an agenda or OpenStates, ex: "A.B. No. 412", "AB412", "AB 0412"
+    Output: "AB 412", or the stripped input if it does not look like a bill number
+
+    Used on both sides of the bill_num -> openstates_bill_id lookup so format differences
+    between sources do not drop rows.
+    """
+    if text is None:
+        return None
+    match = BILL_NUMBER_PATTERN.match(text.replace("\n", " "))
+    if not match:
+        return text.strip()
+    bill_type = re.sub(r"[^A-Za-z]", "", match.group(1)).upper()
+    return f"{bill_type} {int(match.group(2))}"
+
+
 def extract_measure_num_symbol(sel):
     m_type = sel.select_one("span.MeasureType")
     m_num = sel.select_one("span.MeasureNum")
@@ -288,15 +395,7 @@ def make_page(url, max_retries=3, timeout=30000, headless=True):
                 # Initialize Playwright handler
                 # with sync_playwright() as p:
                 handler = sync_playwright().start()
-                browser = handler.chromium.launch(
-                    headless=headless,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-setuid-sandbox",
-                        "--disable-dev-shm-usage",  # /dev/shm is often too small in Docker
-                        "--disable-gpu",
-                    ],
-                )
+                browser = handler.chromium.launch(headless=headless, args=BROWSER_ARGS)
                 # User agent, viewport, locale to avoid detection
                 context = browser.new_context(
                     user_agent=user_agent,
@@ -350,6 +449,96 @@ def make_page(url, max_retries=3, timeout=30000, headless=True):
     raise Exception("All user agents failed")
 
 
+async def page_click_async(clickable, force=False):
+    """
+    Input: Playwright async locator for a clickable object
+    Output: None (clicks the object)
+    """
+    try:
+        await clickable.wait_for(state="visible", timeout=5000)
+        await clickable.click(force=force)
+    except Exception as e:
+        logger.error(f"{str(e)}")
+        return e
+
+
+async def launch_browser_async(headless=True):
+    """
+    Returns:
+        Tuple of (browser, handler) for a single Chromium instance shared by async pages
+    """
+    handler = await async_playwright().start()
+    try:
+        browser = await handler.chromium.launch(headless=headless, args=BROWSER_ARGS)
+    except Exception:
+        await handler.stop()
+        raise
+    return browser, handler
+
+
+async def make_page_async(browser, url, max_retries=3, timeout=30000):
+    """
+    Args:
+        browser: async Playwright browser shared across pages
+        url: target webpage
+        max_retries: number of times to retry connection with the same agent
+        timeout: max buffer time before retrying connection
+    Returns:
+        Tuple of (context, page) if successful; closing the context closes the page
+    Raises:
+        Exception: If all user agents fail
+    """
+    # Shuffle possible agents
+    shuffled_agents = USERAGENTS.copy()
+    random.shuffle(shuffled_agents)
+
+    # Rotate through agents until successful connection
+    for user_agent in shuffled_agents:
+        for attempt in range(max_retries):
+            context = None
+            try:
+                # User agent, viewport, locale to avoid detection
+                context = await browser.new_context(
+                    user_agent=user_agent,
+                    viewport={"width": 1280, "height": 720},
+                    locale="en-US",
+                )
+                page = await context.new_page()
+                assert await page.evaluate("navigator.userAgent") == user_agent
+                page.set_default_timeout(timeout)
+                page.set_default_navigation_timeout(60000)  # for page.goto()
+
+                # Randomized delay, without blocking the other pages
+                delay = random.uniform(0.5, 3)
+                logger.info(
+                    f"Attempt {attempt+1}: Delay {delay:.2f}s ({user_agent[:30]}...)"
+                )
+                await asyncio.sleep(delay)
+
+                # Attempt navigation
+                response = await page.goto(
+                    url, wait_until="domcontentloaded", referer="https://www.google.com"
+                )
+                # Log error if not successful
+                if not response.ok:
+                    raise Exception(f"HTTP {response.status}")
+
+                # Log success and return
+                logger.info(f"Success with user agent: {user_agent[:50]}...")
+                return context, page
+
+            except Exception as e:
+                logger.warning(
+                    f"Attempt {attempt + 1}/{max_retries} failed ({user_agent[:30]}...): {str(e)[:100]}"
+                )
+                if context:
+                    await context.close()
+                if attempt == max_retries - 1:
+                    logger.warning(f"Exhausted retries for agent: {user_agent[:30]}...")
+
+    raise Exception("All user agents failed")
+
+
 def make_static_soup(page, tag_pattern, make_request=True):
     """
     Input: URL string OR request response, HTML tag pattern, optional request flag
@@ -78,12 +78,39 @@ def send_pipeline_success_alert(stats):
     
 • Bills updated: {stats.get('bills_updated', 0)}
 • Hearings updated: {stats.get('hearings_updated', 0)}
-• Contacts updated: {stats.get('contacts_updated', 0)}
+• Contacts updated: {stats.get('contacts_updated', 0)} ({stats.get('contacts_inserted', 0)} inserted, {stats.get('contacts_deleted', 0)} deleted, {stats.get('contacts_unchanged', 0)} unchanged, {stats.get('contacts_failed', 0)} failed to stage)
+• Codex sheets unchanged (skipped): {', '.join(stats.get('contacts_sheets_skipped', [])) or 'none'}
 • Topics updated: {stats.get('topics_updated', 0)}
 • Runtime (data fetch): {stats.get('fetch_runtime_seconds', 0):.2f} seconds
+• Runtime (Codex fetch): {', '.join(f"{chamber} {t['download']:.2f}s download + {t['extract']:.2f}s extract" for chamber, t in stats.get('contacts_fetch_seconds', {}).items()) or 'n/a'}
+• Runtime (DB write): {stats.get('db_write_runtime_seconds', 0):.2f} seconds
+• Runtime (DB refresh): {stats.get('db_view_runtime_seconds', 0):.2f} seconds (critical path {stats.get('db_view_critical_path_seconds', 0):.2f} seconds)
+• Runtime (TOTAL): {stats.get('runtime_seconds', 0):.2f} seconds
+• Views skipped (inputs unchanged): {', '.join(stats.get('views_skipped', [])) or 'none'}
+    """
+
+    send_slack_alert(message, color="good")
+
+
+def send_session_success_alert(stats):
+    """
+    Send a success alert with session update statistics.
+
+    Args:
+        stats: Dictionary containing session update statistics
+    """
+    memberships = stats.get("committee_memberships", {})
+    message = f"""✅ Session update completed successfully!
+    
+• Legislators updated: {stats.get('people_updated', 0)}
+• Committees updated: {stats.get('committees_updated', 0)}
+• Committee memberships: {memberships.get('inserted', 0)} inserted, {memberships.get('deleted', 0)} deleted, {memberships.get('updated', 0)} updated, {memberships.get('skipped', 0)} skipped
+• Contacts updated: {stats.get('contacts_updated', 0)} ({stats.get('contacts_failed', 0)} failed to stage)
+• Runtime (data fetch): {stats.get('fetch_runtime_seconds', 0):.2f} seconds
 • Runtime (DB write): {stats.get('db_write_runtime_seconds', 0):.2f} seconds
 • Runtime (DB refresh): {stats.get('db_view_runtime_seconds', 0):.2f} seconds
 • Runtime (TOTAL): {stats.get('runtime_seconds', 0):.2f} seconds
+• Views skipped (inputs unchanged): {', '.join(stats.get('views_skipped', [])) or 'none'}
     """
 
     send_slack_alert(message, color="good")
@@ -120,26 +147,38 @@ def send_monitor_success_alert():
     send_slack_alert(message, color="good")
     return
 
-def send_monitor_failure_alert(missing_bill_count):
+def send_monitor_failure_alert(missing_bill_count, stages=None):
+    stages = stages or {}
     message = f"""⚠️ Snapshot and app bill data are out of sync!
 
     Monitor detected {missing_bill_count} bills from snapshot that are missing 
-    from the app. Forcing a refresh for the materialized view...
+    from the app ({stages.get('snapshot', 0)} incomplete in snapshot, {stages.get('view', 0)} not yet in view).
+    Repairing those stages...
     """
 
     send_slack_alert(message, color="warning")
     return
 
-def send_monitor_refresh_success_alert(added_bill_count):
-    message = f"""✅ Force refresh of app data completed successfully!
+def send_monitor_refresh_success_alert(eligible_bill_count, healed_bill_count, heal_seconds):
+    message = f"""✅ Targeted repair of app data completed successfully!
 
-    Refresh added {added_bill_count} bills to the app view.
+    Repair restored {healed_bill_count} bills in {heal_seconds:.2f} seconds; all {eligible_bill_count} eligible bills are in the app view.
     """
 
     send_slack_alert(message, color="good")
 
-def send_monitor_refresh_failure_alert():
-    message = """⚠️ *Bills still missing after forced refresh!*
+def send_monitor_error_alert(description, error_message):
+    message = f"""⚠️ *Monitor listener error while {description}!*
+
+    Error: {error_message}
+    The listener keeps running; please review monitor logs.
+    """
+
+    send_slack_alert(message, color="warning")
+    return
+
+def send_monitor_refresh_failure_alert(missing_bill_count, heal_seconds):
+    message = f"""⚠️ *{missing_bill_count} bills still missing after targeted repair ({heal_seconds:.2f} seconds)!*
 
     Please review pipeline logs to diagnose.
     """